@@ -5,22 +5,24 @@ import os.path as osp
 import xml.etree.ElementTree as ET
 import numpy as np
 
-from PIL import Image
-from multiprocessing import Pool
 from functools import partial
 
-from .misc import get_classes, img_exts
+from .index import map_with_index
+from .misc import get_classes, img_exts, read_img_size
 
 
-def load_dior_hbb(img_dir, ann_dir=None, classes=None, nproc=10):
-    return load_dior(img_dir, ann_dir, classes, 'hbb', nproc)
+def load_dior_hbb(img_dir, ann_dir=None, classes=None, nproc=10,
+                  index_file=None):
+    return load_dior(img_dir, ann_dir, classes, 'hbb', nproc, index_file)
 
 
-def load_dior_obb(img_dir, ann_dir=None, classes=None, nproc=10):
-    return load_dior(img_dir, ann_dir, classes, 'obb', nproc)
+def load_dior_obb(img_dir, ann_dir=None, classes=None, nproc=10,
+                  index_file=None):
+    return load_dior(img_dir, ann_dir, classes, 'obb', nproc, index_file)
 
 
-def load_dior(img_dir, ann_dir=None, classes=None, xmltype='obb', nproc=10):
+def load_dior(img_dir, ann_dir=None, classes=None, xmltype='obb', nproc=10,
+              index_file=None):
     assert xmltype in ['hbb', 'obb']
     classes = get_classes('DIOR' if classes is None else classes)
     cls2lbl = {cls: i for i, cls in enumerate(classes)}
@@ -33,12 +35,8 @@ def load_dior(img_dir, ann_dir=None, classes=None, xmltype='obb', nproc=10):
                          ann_dir=ann_dir,
                          cls2lbl=cls2lbl,
                          xmltype=xmltype)
-    if nproc > 1:
-        pool = Pool(nproc)
-        contents = pool.map(_load_func, os.listdir(img_dir))
-        pool.close()
-    else:
-        contents = list(map(_load_func, os.listdir(img_dir)))
+    contents = map_with_index(_load_func, img_dir, ann_dir, '.xml',
+                              index_file, ('dior', xmltype, classes), nproc)
     contents = [c for c in contents if c is not None]
     end_time = time.time()
     print(f'Finishing loading DIOR {xmltype}, get {len(contents)} images,',
@@ -59,7 +57,7 @@ def _load_dior_single(imgfile, img_dir, ann_dir, cls2lbl, xmltype):
 
     if not ('width' in content and 'height' in content):
         imgpath = osp.join(img_dir, imgfile)
-        size = Image.open(imgpath).size
+        size = read_img_size(imgpath)
         content.update(dict(width=size[0], height=size[1]))
     content.update(dict(filename=imgfile, id=img_id))
     return content
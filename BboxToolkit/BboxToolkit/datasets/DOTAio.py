@@ -6,18 +6,17 @@ import warnings
 import os.path as osp
 import numpy as np
 
-from PIL import Image
 from functools import reduce, partial
-from multiprocessing import Pool
 from collections import defaultdict
 
 from .io import load_imgs
-from .misc import get_classes, img_exts
+from .index import map_with_index
+from .misc import get_classes, img_exts, read_img_size
 from ..utils import get_bbox_type
 from ..geometry import bbox2type
 
 
-def load_dota(img_dir, ann_dir=None, classes=None, nproc=10):
+def load_dota(img_dir, ann_dir=None, classes=None, nproc=10, index_file=None):
     classes = get_classes('DOTA' if classes is None else classes)
     cls2lbl = {cls: i for i, cls in enumerate(classes)}
 
@@ -27,12 +26,8 @@ def load_dota(img_dir, ann_dir=None, classes=None, nproc=10):
                         img_dir=img_dir,
                         ann_dir=ann_dir,
                         cls2lbl=cls2lbl)
-    if nproc > 1:
-        pool = Pool(nproc)
-        contents = pool.map(_load_func, os.listdir(img_dir))
-        pool.close()
-    else:
-        contents = list(map(_load_func, os.listdir(img_dir)))
+    contents = map_with_index(_load_func, img_dir, ann_dir, '.txt',
+                              index_file, ('dota', classes), nproc)
     contents = [c for c in contents if c is not None]
     end_time = time.time()
     print(f'Finishing loading DOTA, get {len(contents)} iamges,',
@@ -47,7 +42,7 @@ def _load_dota_single(imgfile, img_dir, ann_dir, cls2lbl):
         return None
 
     imgpath = osp.join(img_dir, imgfile)
-    size = Image.open(imgpath).size
+    size = read_img_size(imgpath)
     txtfile = None if ann_dir is None else osp.join(ann_dir, img_id+'.txt')
     content = _load_dota_txt(txtfile, cls2lbl)
 
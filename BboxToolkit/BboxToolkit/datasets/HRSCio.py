@@ -5,14 +5,13 @@ import os.path as osp
 import xml.etree.ElementTree as ET
 import numpy as np
 
-from PIL import Image
 from functools import partial
-from multiprocessing import Pool
-from .misc import img_exts
+from .index import map_with_index
+from .misc import img_exts, read_img_size
 
 
 def load_hrsc(img_dir, ann_dir, classes=None, img_keys=dict(),
-              obj_keys=dict(), nproc=10):
+              obj_keys=dict(), nproc=10, index_file=None):
     if classes is not None:
         print('load_hrsc loads all objects as ship, arguments classes is no use')
 
@@ -24,12 +23,10 @@ def load_hrsc(img_dir, ann_dir, classes=None, img_keys=dict(),
                          ann_dir=ann_dir,
                          img_keys=img_keys,
                          obj_keys=obj_keys)
-    if nproc > 1:
-        pool = Pool(nproc)
-        contents = pool.map(_load_func, os.listdir(img_dir))
-        pool.close()
-    else:
-        contents = list(map(_load_func, os.listdir(img_dir)))
+    index_key = ('hrsc', tuple(sorted(img_keys.items())),
+                 tuple(sorted(obj_keys.items())))
+    contents = map_with_index(_load_func, img_dir, ann_dir, '.xml',
+                              index_file, index_key, nproc)
     contents = [c for c in contents if c is not None]
     end_time = time.time()
     print(f'Finishing loading HRSC, get {len(contents)} images,',
@@ -47,7 +44,7 @@ def _load_hrsc_single(imgfile, img_dir, ann_dir, img_keys, obj_keys):
 
     if not ('width' in content and 'height' in content):
         imgpath = osp.join(img_dir, imgfile)
-        size = Image.open(imgpath).size
+        size = read_img_size(imgpath)
         content.update(dict(width=size[0], height=size[1]))
     content.update(dict(filename=imgfile, id=img_id))
     return content
@@ -2,6 +2,8 @@ from .mean_ap import eval_map
 from .misc import (get_classes, change_cls_order, merge_prior_contents,
                    split_imgset)
 from .io import load_imgs, load_pkl, save_pkl
+from .columnar import ColumnarContents, load_columnar, save_columnar
+from .imgblob import ImgBlob, save_img_blob
 from .DOTAio import load_dota, load_dota_submission, save_dota_submission
 from .DIORio import load_dior_hbb, load_dior_obb, load_dior
 from .HRSCio import load_hrsc
@@ -0,0 +1,147 @@
+import os
+import pickle
+import time
+import os.path as osp
+import numpy as np
+
+from collections.abc import Sequence
+from .misc import get_classes, change_cls_order
+
+
+class ColumnarContents(Sequence):
+    """Read-only contents backed by flat arrays.
+
+    Image fields are stored as one array per key and annotation fields are
+    concatenated over images with an offsets array, so that indexing builds
+    a content dict whose ``ann`` arrays are views of the (memory-mapped)
+    flat arrays. Fields which can't be stored as arrays, e.g. a gsd of None,
+    are kept as lists.
+    """
+
+    def __init__(self, img_fields, ann_fields, offsets, inds=None,
+                 lbl_mapper=None):
+        self.img_fields = img_fields
+        self.ann_fields = ann_fields
+        self.offsets = offsets
+        self.inds = np.arange(len(offsets) - 1) if inds is None else inds
+        self.lbl_mapper = lbl_mapper
+
+    def __len__(self):
+        return len(self.inds)
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return self.subset(self.inds[idx], absolute=True)
+        if not isinstance(idx, (int, np.integer)):
+            return self.subset(idx)
+
+        i = int(self.inds[idx])
+        content = dict()
+        for k, v in self.img_fields.items():
+            content[k] = v[i] if isinstance(v, list) else v[i].item()
+
+        start, stop = int(self.offsets[i]), int(self.offsets[i+1])
+        ann = dict()
+        for k, v in self.ann_fields.items():
+            ann[k] = v[start:stop]
+        if self.lbl_mapper is not None:
+            new_labels = self.lbl_mapper[ann['labels']]
+            keep = new_labels != -1
+            if not keep.all():
+                ann = {k: v[keep] for k, v in ann.items()}
+            ann['labels'] = new_labels[keep]
+        content['ann'] = ann
+        return content
+
+    def subset(self, inds, absolute=False):
+        inds = np.asarray(inds, dtype=np.int64)
+        if not absolute:
+            inds = self.inds[inds]
+        return ColumnarContents(self.img_fields, self.ann_fields,
+                                self.offsets, inds, self.lbl_mapper)
+
+    def num_objects(self):
+        return np.diff(self.offsets)[self.inds]
+
+    def set_lbl_mapper(self, lbl_mapper):
+        if self.lbl_mapper is not None:
+            lbl_mapper = np.where(self.lbl_mapper == -1, -1,
+                                  lbl_mapper[self.lbl_mapper])
+        self.lbl_mapper = lbl_mapper
+
+
+def _to_array(values):
+    if any(v is None for v in values):
+        return None
+    try:
+        array = np.array(values)
+    except ValueError:
+        return None
+    return None if array.dtype == object else array
+
+
+def save_columnar(save_dir, contents, classes):
+    if not osp.exists(save_dir):
+        os.makedirs(save_dir)
+
+    img_keys = [k for k in contents[0] if k != 'ann'] if contents else []
+    ann_keys = list(contents[0]['ann']) if contents else []
+    num_objs = [len(content['ann']['labels']) for content in contents]
+    offsets = np.zeros((len(contents)+1, ), dtype=np.int64)
+    offsets[1:] = np.cumsum(num_objs)
+    np.save(osp.join(save_dir, 'offsets.npy'), offsets)
+
+    list_fields = dict()
+    for k in img_keys:
+        values = [content.get(k) for content in contents]
+        array = _to_array(values)
+        if array is None:
+            list_fields[k] = values
+        else:
+            np.save(osp.join(save_dir, f'img_{k}.npy'), array)
+
+    for k in ann_keys:
+        values = [np.asarray(content['ann'][k]) for content in contents]
+        if any(v.dtype == object for v in values):
+            raise TypeError(f'ann field {k} can not be stored as array')
+        np.save(osp.join(save_dir, f'ann_{k}.npy'),
+                np.concatenate(values, axis=0))
+
+    meta = dict(cls=classes, img_keys=img_keys, ann_keys=ann_keys,
+                list_fields=list_fields)
+    with open(osp.join(save_dir, 'meta.pkl'), 'wb') as f:
+        pickle.dump(meta, f)
+
+
+def load_columnar(ann_dir, img_dir=None, classes=None, nproc=10,
+                  mmap_mode='r'):
+    print('Starting loading columnar information')
+    start_time = time.time()
+    with open(osp.join(ann_dir, 'meta.pkl'), 'rb') as f:
+        meta = pickle.load(f)
+    offsets = np.load(osp.join(ann_dir, 'offsets.npy'))
+
+    img_fields = dict()
+    for k in meta['img_keys']:
+        if k in meta['list_fields']:
+            img_fields[k] = meta['list_fields'][k]
+        else:
+            img_fields[k] = np.load(osp.join(ann_dir, f'img_{k}.npy'),
+                                    mmap_mode=mmap_mode)
+    ann_fields = {k: np.load(osp.join(ann_dir, f'ann_{k}.npy'),
+                             mmap_mode=mmap_mode)
+                  for k in meta['ann_keys']}
+    contents = ColumnarContents(img_fields, ann_fields, offsets)
+
+    if img_dir is not None:
+        print('img_dir is no use in load_columnar function')
+    old_classes = meta['cls']
+    if classes is None:
+        classes = old_classes
+    else:
+        classes = get_classes(classes)
+        change_cls_order(contents, old_classes, classes)
+    end_time = time.time()
+    print(f'Finishing loading columnar, get {len(contents)} images,',
+          f'using {end_time-start_time:.3f}s.')
+    return contents, classes
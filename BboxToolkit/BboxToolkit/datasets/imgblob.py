@@ -0,0 +1,106 @@
+import os
+import cv2
+import time
+import pickle
+import os.path as osp
+import numpy as np
+
+from multiprocessing import Pool
+from .misc import img_exts
+
+
+def _decode_img(imgpath):
+    return cv2.imread(imgpath, cv2.IMREAD_COLOR)
+
+
+def save_img_blob(img_dir, save_dir, disk_budget=None, nproc=10):
+    """Decode all images in img_dir into one raw uint8 blob.
+
+    The blob is saved as images.bin, and meta.pkl holds the filenames, the
+    shape table and the byte offsets of every image in it.
+
+    Args:
+        img_dir (str): images dir, e.g. the output of img_split.
+        save_dir (str): dir of the blob.
+        disk_budget (float, optional): the maximum size of the blob in GB,
+            the images beyond it are left out and decoded as usual.
+        nproc (int): the procession number for decoding.
+    """
+    print('Starting building image blob')
+    start_time = time.time()
+    if not osp.exists(save_dir):
+        os.makedirs(save_dir)
+
+    imgfiles = sorted([f for f in os.listdir(img_dir)
+                       if osp.splitext(f)[-1] in img_exts])
+    imgpaths = [osp.join(img_dir, f) for f in imgfiles]
+    max_bytes = np.inf if disk_budget is None else disk_budget * 1024**3
+
+    filenames, shapes, offsets = [], [], [0]
+    blob_file = osp.join(save_dir, 'images.bin')
+    tmp_file = blob_file + f'.{os.getpid()}.tmp'
+    pool = Pool(nproc) if nproc > 1 else None
+    imgs = pool.imap(_decode_img, imgpaths, chunksize=4) if pool else \
+            map(_decode_img, imgpaths)
+    with open(tmp_file, 'wb') as f:
+        for imgfile, img in zip(imgfiles, imgs):
+            if img is None or offsets[-1] + img.nbytes > max_bytes:
+                continue
+            f.write(np.ascontiguousarray(img).tobytes())
+            filenames.append(imgfile)
+            shapes.append(img.shape)
+            offsets.append(offsets[-1] + img.nbytes)
+    if pool is not None:
+        pool.close()
+    os.replace(tmp_file, blob_file)
+
+    meta = dict(filenames=filenames,
+                shapes=np.array(shapes, dtype=np.int64).reshape(-1, 3),
+                offsets=np.array(offsets, dtype=np.int64),
+                color_type='color')
+    with open(osp.join(save_dir, 'meta.pkl'), 'wb') as f:
+        pickle.dump(meta, f)
+    end_time = time.time()
+    print(f'Finishing building image blob, get {len(filenames)} of',
+          f'{len(imgfiles)} images, {offsets[-1]/1024**3:.2f}GB,',
+          f'using {end_time-start_time:.3f}s.')
+
+
+class ImgBlob:
+    """Reader of the blob saved by save_img_blob.
+
+    The blob is memory-mapped lazily in every process, so the reader can be
+    sent to dataloader workers cheaply, and get returns read-only views of
+    the mapped pages without decoding or copying.
+    """
+
+    def __init__(self, blob_dir):
+        self.blob_dir = blob_dir
+        with open(osp.join(blob_dir, 'meta.pkl'), 'rb') as f:
+            meta = pickle.load(f)
+        self.color_type = meta['color_type']
+        self.shapes = meta['shapes']
+        self.offsets = meta['offsets']
+        self.index = {name: i for i, name in enumerate(meta['filenames'])}
+        self._data = None
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, filename):
+        return filename in self.index
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_data'] = None
+        return state
+
+    def get(self, filename):
+        i = self.index.get(filename)
+        if i is None:
+            return None
+        if self._data is None:
+            self._data = np.memmap(osp.join(self.blob_dir, 'images.bin'),
+                                   dtype=np.uint8, mode='r')
+        start, stop = self.offsets[i], self.offsets[i+1]
+        return self._data[start:stop].reshape(self.shapes[i])
@@ -0,0 +1,110 @@
+import os
+import pickle
+import os.path as osp
+
+from multiprocessing import Pool
+
+
+def load_index(index_file):
+    if index_file is None or not osp.isfile(index_file):
+        return dict()
+    try:
+        with open(index_file, 'rb') as f:
+            return pickle.load(f)
+    except (EOFError, pickle.UnpicklingError):
+        print(f'{index_file} is broken, the index will be rebuilt')
+        return dict()
+
+
+def save_index(index_file, index):
+    filepath = osp.split(index_file)[0]
+    if filepath and not osp.exists(filepath):
+        os.makedirs(filepath)
+
+    # write then rename, so that a killed run never leaves half an index
+    tmp_file = index_file + f'.{os.getpid()}.tmp'
+    with open(tmp_file, 'wb') as f:
+        pickle.dump(index, f)
+    os.replace(tmp_file, index_file)
+
+
+def _file_stamp(filepath):
+    try:
+        stat = os.stat(filepath)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def map_with_index(load_func, img_dir, ann_dir=None, ann_ext=None,
+                   index_file=None, index_key=None, nproc=10):
+    """Map load_func over the files in img_dir with a persistent index.
+
+    Every result in index_file is stamped by the (mtime, size) of its image
+    and annotation file, only new or changed files go through load_func.
+
+    Args:
+        load_func (callable): function taking an image filename and
+            returning its content or None.
+        img_dir (str): images dir.
+        ann_dir (str, optional): annotations dir.
+        ann_ext (str, optional): annotation file extension, e.g. '.txt'.
+        index_file (str, optional): the index file, no index is used if None.
+        index_key (tuple): loader name and the arguments which change the
+            parsed contents, e.g. the classes.
+        nproc (int): the procession number for the changed files.
+
+    Returns:
+        list[dict]: contents in the order of os.listdir(img_dir), Nones are
+            kept.
+    """
+    imgfiles = os.listdir(img_dir)
+    if index_file is None:
+        if nproc > 1:
+            pool = Pool(nproc)
+            contents = pool.map(load_func, imgfiles)
+            pool.close()
+        else:
+            contents = list(map(load_func, imgfiles))
+        return contents
+
+    index = load_index(index_file)
+    bucket_key = (osp.abspath(img_dir),
+                  None if ann_dir is None else osp.abspath(ann_dir),
+                  index_key)
+    old_bucket = index.get(bucket_key, dict())
+
+    stamps, contents, missing = [], [], []
+    for i, imgfile in enumerate(imgfiles):
+        stamp = _file_stamp(osp.join(img_dir, imgfile))
+        if ann_dir is not None:
+            img_id = osp.splitext(imgfile)[0]
+            stamp = (stamp, _file_stamp(osp.join(ann_dir, img_id+ann_ext)))
+        stamps.append(stamp)
+
+        record = old_bucket.get(imgfile)
+        if record is not None and record[0] == stamp:
+            contents.append(record[1])
+        else:
+            contents.append(None)
+            missing.append(i)
+
+    if missing:
+        missing_files = [imgfiles[i] for i in missing]
+        if nproc > 1 and len(missing) > 1:
+            pool = Pool(min(nproc, len(missing)))
+            new_contents = pool.map(load_func, missing_files)
+            pool.close()
+        else:
+            new_contents = list(map(load_func, missing_files))
+        for i, content in zip(missing, new_contents):
+            contents[i] = content
+
+    # deleted files are dropped by rebuilding the whole bucket
+    if missing or len(old_bucket) != len(imgfiles):
+        index[bucket_key] = {imgfile: (stamp, content) for imgfile, stamp,
+                             content in zip(imgfiles, stamps, contents)}
+        save_index(index_file, index)
+    print(f'Reuse {len(imgfiles)-len(missing)} files in index, '
+          f'load {len(missing)} new or changed files.')
+    return contents
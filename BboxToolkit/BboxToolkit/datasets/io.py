@@ -4,28 +4,25 @@ import pickle
 import time
 import numpy as np
 
+from functools import partial
 from multiprocessing import Pool
 
 from ..utils import get_bbox_dim
+from .index import map_with_index
 from .misc import read_img_info, change_cls_order, get_classes
 
 
 def load_imgs(img_dir, ann_dir=None, classes=None, nproc=10,
-              def_bbox_type='poly'):
+              def_bbox_type='poly', index_file=None):
     assert def_bbox_type in ['hbb', 'obb', 'poly']
     if ann_dir is not None:
         print('ann_dir is no use in load_pseudo function')
 
     print('Starting loading images information')
     start_time = time.time()
-    imgpaths = [osp.join(img_dir, imgfile)
-                for imgfile in os.listdir(img_dir)]
-    if nproc > 1:
-        pool = Pool(nproc)
-        infos = pool.map(read_img_info, imgpaths)
-        pool.close()
-    else:
-        infos = list(map(read_img_info, imgpaths))
+    _load_func = partial(_read_img_info_in_dir, img_dir=img_dir)
+    infos = map_with_index(_load_func, img_dir, index_file=index_file,
+                           index_key=('imgs', ), nproc=nproc)
 
     contents = []
     for info in infos:
@@ -43,6 +40,10 @@ def load_imgs(img_dir, ann_dir=None, classes=None, nproc=10,
     return contents, classes
 
 
+def _read_img_info_in_dir(imgfile, img_dir):
+    return read_img_info(osp.join(img_dir, imgfile))
+
+
 def load_pkl(ann_dir, img_dir=None, classes=None, nproc=10):
     print('Starting loading pkl information')
     start_time = time.time()
@@ -1,3 +1,4 @@
+import struct
 import os.path as osp
 import numpy as np
 import warnings
@@ -43,11 +44,50 @@ def read_img_info(imgpath):
     if ext not in img_exts:
         return None
 
-    size = Image.open(imgpath).size
+    size = read_img_size(imgpath)
     content = dict(width=size[0], height=size[1], filename=imgfile, id=img_id)
     return content
 
 
+def read_img_size(imgpath):
+    # Parse (width, height) from the header of png, jpg and bmp files,
+    # other formats and unexpected headers are left to PIL.
+    with open(imgpath, 'rb') as f:
+        head = f.read(26)
+        try:
+            if head.startswith(b'\x89PNG\r\n\x1a\n') and head[12:16] == b'IHDR':
+                return struct.unpack('>II', head[16:24])
+            if head.startswith(b'BM'):
+                width, height = struct.unpack('<ii', head[18:26])
+                return width, abs(height)
+            if head.startswith(b'\xff\xd8'):
+                size = _read_jpg_size(f)
+                if size is not None:
+                    return size
+        except struct.error:
+            pass
+    return Image.open(imgpath).size
+
+
+def _read_jpg_size(f):
+    f.seek(2)
+    while True:
+        marker = f.read(2)
+        if len(marker) < 2 or marker[0] != 0xff:
+            return None
+        while marker[1] == 0xff:
+            marker = marker[1:] + f.read(1)
+        code = marker[1]
+        if code in (0x01, 0xd8) or 0xd0 <= code <= 0xd7:
+            continue
+        length, = struct.unpack('>H', f.read(2))
+        # SOF0-SOF15 except DHT(c4), JPG(c8) and DAC(cc)
+        if 0xc0 <= code <= 0xcf and code not in (0xc4, 0xc8, 0xcc):
+            height, width = struct.unpack('>xHH', f.read(5))
+            return width, height
+        f.seek(length - 2, 1)
+
+
 def get_classes(alias_or_list):
     if isinstance(alias_or_list, str):
         if osp.isfile(alias_or_list):
@@ -89,6 +129,10 @@ def change_cls_order(contents, old_classes, new_classes):
     lbl_mapper = [new_cls2lbl[cls] if cls in new_cls2lbl else -1
                   for cls in old_classes]
     lbl_mapper = np.array(lbl_mapper)
+    if hasattr(contents, 'set_lbl_mapper'):
+        # columnar contents are read-only, labels are mapped when indexed
+        contents.set_lbl_mapper(lbl_mapper)
+        return
 
     for content in contents:
         new_labels = lbl_mapper[content['ann']['labels']]
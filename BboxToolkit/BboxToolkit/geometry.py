@@ -5,8 +5,10 @@ from .transforms import bbox2type
 from .utils import get_bbox_type
 
 
-def bbox_overlaps(bboxes1, bboxes2, mode='iou', is_aligned=False, eps=1e-6):
+def bbox_overlaps(bboxes1, bboxes2, mode='iou', is_aligned=False, eps=1e-6,
+                  backend='numpy'):
     assert mode in ['iou', 'iof']
+    assert backend in ['numpy', 'shapely']
     assert get_bbox_type(bboxes1) != 'notype'
     assert get_bbox_type(bboxes2) != 'notype'
     rows = bboxes1.shape[0]
@@ -39,6 +41,22 @@ def bbox_overlaps(bboxes1, bboxes2, mode='iou', is_aligned=False, eps=1e-6):
             unions = areas1
 
 
+    elif backend == 'numpy':
+        polys1 = bbox2type(bboxes1, 'poly').reshape(rows, 4, 2)
+        polys2 = bbox2type(bboxes2, 'poly').reshape(cols, 4, 2)
+        areas1 = _poly_areas(polys1)
+        if not is_aligned:
+            areas1 = areas1[:, None]
+
+        overlaps = np.zeros(h_overlaps.shape)
+        pairs = np.nonzero(h_overlaps)
+        overlaps[pairs] = _poly_overlaps(polys1, polys2, pairs[0], pairs[-1])
+
+        if mode == 'iou':
+            unions = areas1 + _poly_areas(polys2) - overlaps
+        else:
+            unions = areas1
+
     else:
         polys1 = bbox2type(bboxes1, 'poly')
         polys2 = bbox2type(bboxes2, 'poly')
@@ -65,6 +83,124 @@ def bbox_overlaps(bboxes1, bboxes2, mode='iou', is_aligned=False, eps=1e-6):
     return outputs
 
 
+def _poly_signed_areas(polys):
+    next_polys = np.roll(polys, -1, axis=-2)
+    return 0.5 * (polys[..., 0] * next_polys[..., 1] -
+                  next_polys[..., 0] * polys[..., 1]).sum(-1)
+
+
+def _poly_areas(polys):
+    return np.abs(_poly_signed_areas(polys))
+
+
+def _clip_by_halfplane(pts, nums, start, end):
+    # Sutherland-Hodgman step, keep the left side of edge start->end
+    # pts: (k, c, 2) vertices, nums: (k, ) valid vertex numbers
+    k, c = pts.shape[:2]
+    direction = end - start
+    rel = pts - start[:, None, :]
+    dist = direction[:, None, 0] * rel[..., 1] - \
+            direction[:, None, 1] * rel[..., 0]
+    slots = np.arange(c)[None, :]
+    valid = slots < nums[:, None]
+    inside = (dist >= 0) & valid
+
+    prev_inds = np.where(slots == 0, nums[:, None] - 1, slots - 1)
+    prev_inds = np.clip(prev_inds, 0, c - 1)
+    prev_pts = np.take_along_axis(pts, prev_inds[..., None], axis=1)
+    prev_dist = np.take_along_axis(dist, prev_inds, axis=1)
+    prev_inside = np.take_along_axis(inside, prev_inds, axis=1)
+
+    cross = valid & (inside != prev_inside)
+    denom = np.where(cross, prev_dist - dist, 1)
+    ratio = (prev_dist / denom)[..., None]
+    cross_pts = prev_pts + ratio * (pts - prev_pts)
+
+    # each slot emits [crossing point, current point] in order
+    cand_pts = np.stack([cross_pts, pts], axis=2).reshape(k, 2*c, 2)
+    cand_mask = np.stack([cross, inside], axis=2).reshape(k, 2*c)
+    order = np.argsort(~cand_mask, axis=1, kind='stable')[:, :c]
+    out_pts = np.take_along_axis(cand_pts, order[..., None], axis=1)
+    return out_pts, cand_mask.sum(1)
+
+
+def _convex_intersection_areas(polys1, polys2):
+    # polys1, polys2: (k, 4, 2) convex quadrilaterals in ccw order
+    # clipping a convex quadrilateral by 4 halfplanes gives at most 8 points
+    k = polys1.shape[0]
+    pts = np.zeros((k, 8, 2))
+    pts[:, :4] = polys1
+    nums = np.full((k, ), 4)
+    for i in range(4):
+        pts, nums = _clip_by_halfplane(
+            pts, nums, polys2[:, i], polys2[:, (i+1)%4])
+
+    slots = np.arange(8)[None, :]
+    next_inds = np.where(slots + 1 >= nums[:, None], 0, slots + 1)
+    next_pts = np.take_along_axis(pts, next_inds[..., None], axis=1)
+    cross = pts[..., 0] * next_pts[..., 1] - next_pts[..., 0] * pts[..., 1]
+    cross = np.where(slots < nums[:, None], cross, 0)
+    return np.abs(0.5 * cross.sum(1))
+
+
+def _poly_overlaps(polys1, polys2, inds1, inds2, chunk_size=65536):
+    # intersection areas of polys1[inds1] and polys2[inds2]
+    if inds1.size == 0:
+        return np.zeros((0, ))
+
+    signed_areas1 = _poly_signed_areas(polys1)
+    signed_areas2 = _poly_signed_areas(polys2)
+    polys1 = np.where((signed_areas1 < 0)[:, None, None],
+                      polys1[:, ::-1], polys1)
+    polys2 = np.where((signed_areas2 < 0)[:, None, None],
+                      polys2[:, ::-1], polys2)
+    convex1, convex2 = _is_convex(polys1), _is_convex(polys2)
+    degenerate1 = np.abs(signed_areas1) == 0
+    degenerate2 = np.abs(signed_areas2) == 0
+
+    overlaps = np.zeros(inds1.shape)
+    fast = convex1[inds1] & convex2[inds2]
+    fast_inds = np.nonzero(fast)[0]
+    for i in range(0, fast_inds.size, chunk_size):
+        chunk = fast_inds[i:i+chunk_size]
+        chunk_polys1 = polys1[inds1[chunk]]
+        chunk_polys2 = polys2[inds2[chunk]]
+        chunk_overlaps = _convex_intersection_areas(chunk_polys1, chunk_polys2)
+        # keep iou and iof exactly 1 for contained polygons
+        inside1 = _is_inside(chunk_polys1, chunk_polys2)
+        inside2 = _is_inside(chunk_polys2, chunk_polys1)
+        chunk_overlaps[inside2] = np.abs(signed_areas2[inds2[chunk]][inside2])
+        chunk_overlaps[inside1] = np.abs(signed_areas1[inds1[chunk]][inside1])
+        overlaps[chunk] = chunk_overlaps
+
+    # concave or self-intersecting polygons go through shapely
+    for i in np.nonzero(~fast)[0]:
+        p1 = shgeo.Polygon(polys1[inds1[i]])
+        p2 = shgeo.Polygon(polys2[inds2[i]])
+        overlaps[i] = p1.intersection(p2).area
+
+    overlaps[degenerate1[inds1] | degenerate2[inds2]] = 0
+    return overlaps
+
+
+def _is_inside(pts, polys):
+    # whether all pts are inside the convex ccw polys
+    starts = polys[:, None, :, :]
+    directions = np.roll(polys, -1, axis=-2)[:, None] - starts
+    rel = pts[:, :, None, :] - starts
+    dist = directions[..., 0] * rel[..., 1] - directions[..., 1] * rel[..., 0]
+    return (dist >= 0).all(axis=(1, 2))
+
+
+def _is_convex(polys):
+    # polys must be in ccw order
+    edges = np.roll(polys, -1, axis=-2) - polys
+    next_edges = np.roll(edges, -1, axis=-2)
+    turns = edges[..., 0] * next_edges[..., 1] - \
+            edges[..., 1] * next_edges[..., 0]
+    return (turns >= 0).all(-1)
+
+
 def bbox_areas(bboxes):
     bbox_type = get_bbox_type(bboxes)
     assert bbox_type != 'notype'
@@ -86,41 +222,44 @@ def bbox_areas(bboxes):
         return np.abs(areas)
 
 
-def bbox_nms(bboxes, scores, iou_thr=0.5, score_thr=0.01):
+def bbox_nms(bboxes, scores, iou_thr=0.5, score_thr=0.01, max_pairs=2**22):
     assert get_bbox_type(bboxes) != 'notype'
     order = scores.argsort()[::-1]
     order = order[scores[order] > score_thr]
-    keep = []
-
-    while order.size > 0:
-        i = order[0]
-        keep.append(i)
-
-        keep_bbox = bboxes[[i]]
-        other_bboxes = bboxes[order[1:]]
-        ious = bbox_overlaps(keep_bbox, other_bboxes)
-
-        idx = np.where(ious <= iou_thr)[1]
-        order = order[idx + 1]
+    return _tiled_nms(bboxes, order, iou_thr, max_pairs)
 
-    return np.array(keep, dtype=np.int)
 
-
-def bbox_area_nms(bboxes, iou_thr=0.5):
+def bbox_area_nms(bboxes, iou_thr=0.5, max_pairs=2**22):
     assert get_bbox_type(bboxes) != 'notype'
     areas = bbox_areas(bboxes)
     order = areas.argsort()[::-1]
-    keep = []
+    return _tiled_nms(bboxes, order, iou_thr, max_pairs)
 
-    while order.size > 0:
-        i = order[0]
-        keep.append(i)
 
-        keep_bbox = bboxes[[i]]
-        other_bboxes = bboxes[order[1:]]
-        ious = bbox_overlaps(keep_bbox, other_bboxes)
+def _tiled_nms(bboxes, order, iou_thr, max_pairs):
+    # Greedy nms over the sorted bboxes. The IoU matrix is computed once
+    # per tile of rows against all the later bboxes, and at most max_pairs
+    # IoUs are held in memory. Rows and columns already suppressed by
+    # earlier tiles are left out of the matrix.
+    bboxes = bboxes[order]
+    num = bboxes.shape[0]
+    tile_size = max(1, max_pairs // max(num, 1))
+    removed = np.zeros((num, ), dtype=np.bool_)
+    keep = []
+
+    for start in range(0, num, tile_size):
+        stop = min(start + tile_size, num)
+        rows = np.nonzero(~removed[start:stop])[0] + start
+        if rows.size == 0:
+            continue
+        cols = np.nonzero(~removed[start:])[0] + start
+        suppress = bbox_overlaps(bboxes[rows], bboxes[cols]) > iou_thr
+        suppress &= cols[None, :] > rows[:, None]
 
-        idx = np.where(ious <= iou_thr)[1]
-        order = order[idx + 1]
+        for i, row in enumerate(rows):
+            if removed[row]:
+                continue
+            keep.append(row)
+            removed[cols[suppress[i]]] = True
 
-    return np.array(keep, dtype=np.int)
+    return np.array(order[keep], dtype=np.int)
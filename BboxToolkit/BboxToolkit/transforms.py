@@ -9,27 +9,68 @@ def poly2obb(polys):
     # [-90 90)
     order = polys.shape[:-1]
     num_points = polys.shape[-1] // 2
-    polys = polys.reshape(-1, num_points, 2)
-    polys = polys.astype(np.float32)
-
-    obboxes = []
-    for poly in polys:
-        (x, y), (w, h), angle = cv2.minAreaRect(poly)
-        if w >= h:
-            angle = -angle
-        else:
-            w, h = h, w
-            angle = -90 - angle
-        theta = angle / 180 * pi
-        obboxes.append([x, y, w, h, theta])
-
-    if not obboxes:
-        obboxes = np.zeros((0, 5))
+    points = polys.reshape(-1, num_points, 2)
+
+    if num_points <= 4:
+        # the hull edges are among all point pairs of quadrilaterals
+        inds1, inds2 = np.triu_indices(num_points, 1)
+        obboxes = _min_area_rects(points.astype(np.float64), inds1, inds2)
     else:
-        obboxes = np.array(obboxes)
+        rects = [cv2.minAreaRect(p) for p in points.astype(np.float32)]
+        rects = np.array([[x, y, w, h, angle] for (x, y), (w, h), angle
+                          in rects]).reshape(-1, 5)
+        # the w side of cv2 rects is along (cos(angle), sin(angle))
+        obboxes = _regular_obbs(rects[:, 0], rects[:, 1], rects[:, 2],
+                                rects[:, 3], -rects[:, 4] / 180 * np.pi)
     return obboxes.reshape(*order, 5)
 
 
+def _regular_obbs(x, y, w, h, theta):
+    # make w the long side and regularize theta to [-pi/2, pi/2)
+    theta = np.where(w >= h, theta, theta + np.pi/2)
+    theta = (theta + np.pi/2) % np.pi - np.pi/2
+    w, h = np.maximum(w, h), np.minimum(w, h)
+    return np.stack([x, y, w, h, theta], axis=-1)
+
+
+def _min_area_rects(points, inds1, inds2):
+    # Rotating calipers: the minimum area rectangle of a convex hull has a
+    # side collinear with one of the hull edges, so every edge inds1->inds2
+    # is tried as the rectangle direction for all polygons at once.
+    if points.shape[0] == 0:
+        return np.zeros((0, 5))
+    x, y = points[..., 0], points[..., 1]
+    ux, uy = x[:, inds2] - x[:, inds1], y[:, inds2] - y[:, inds1]
+    norms = np.sqrt(ux * ux + uy * uy)
+    valid = norms > 0
+    norms[~valid] = 1
+    ux, uy = np.where(valid, ux / norms, 1), np.where(valid, uy / norms, 0)
+
+    # extents of the projections on the edge directions and their normals,
+    # accumulated point by point to keep all arrays (num_polys, num_edges)
+    umin = vmin = np.full(ux.shape, np.inf)
+    umax = vmax = np.full(ux.shape, -np.inf)
+    for i in range(points.shape[1]):
+        px, py = x[:, i:i+1], y[:, i:i+1]
+        proj_u = ux * px + uy * py
+        proj_v = ux * py - uy * px
+        umin, umax = np.minimum(umin, proj_u), np.maximum(umax, proj_u)
+        vmin, vmax = np.minimum(vmin, proj_v), np.maximum(vmax, proj_v)
+    areas = np.where(valid, (umax - umin) * (vmax - vmin), np.inf)
+    best = np.argmin(areas, axis=1)
+
+    inds = np.arange(points.shape[0])
+    ux, uy = ux[inds, best], uy[inds, best]
+    umin, umax = umin[inds, best], umax[inds, best]
+    vmin, vmax = vmin[inds, best], vmax[inds, best]
+    cu, cv = (umin + umax) / 2, (vmin + vmax) / 2
+    w, h = umax - umin, vmax - vmin
+
+    # theta is anti-clockwise in image coordinates as in obb2poly
+    theta = np.arctan2(-uy, ux)
+    return _regular_obbs(ux*cu - uy*cv, uy*cu + ux*cv, w, h, theta)
+
+
 def rectpoly2obb(polys):
     theta = np.arctan2(-(polys[..., 3] - polys[..., 1]),
                        polys[..., 2] - polys[..., 0])
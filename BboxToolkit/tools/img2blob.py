@@ -0,0 +1,26 @@
+import BboxToolkit as bt
+
+import argparse
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='decode the images of a splitted dataset into one blob')
+    parser.add_argument('img_dir', type=str, help='images dir')
+    parser.add_argument('save_dir', type=str, help='dir to save the blob')
+    parser.add_argument('--disk_budget', type=float, default=None,
+                        help='the maximum size of the blob in GB')
+    parser.add_argument('--nproc', type=int, default=10,
+                        help='the procession number')
+    args = parser.parse_args()
+    return args
+
+
+def main():
+    args = parse_args()
+    bt.save_img_blob(args.img_dir, args.save_dir, args.disk_budget,
+                     args.nproc)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,10 +1,13 @@
 import BboxToolkit as bt
 
 import os
+import sys
 import cv2
 import time
 import json
+import shutil
 import argparse
+import resource
 import itertools
 import numpy as np
 import os.path as osp
@@ -20,6 +23,14 @@ def add_parser(parser):
                         help='json config file for split images')
     parser.add_argument('--nproc', type=int, default=10,
                         help='the procession number')
+    parser.add_argument('--img_reader', type=str, default='cv2',
+                        help='cv2 decodes the whole image in every worker, '
+                        'mmap crops windows from a raw cache of the image')
+    parser.add_argument('--cache_dir', type=str, default=None,
+                        help='dir of the raw image cache for mmap reader, '
+                        'a temporary dir in save_dir is used if not given')
+    parser.add_argument('--cache_nproc', type=int, default=1,
+                        help='the procession number for building image cache')
 
     #argument for loading data
     parser.add_argument('--load_type', type=str, default=None,
@@ -30,6 +41,9 @@ def add_parser(parser):
                         help='annotations dirs, optional')
     parser.add_argument('--classes', nargs='+', type=str, default=None,
                         help='the classes and order for loading data')
+    parser.add_argument('--index_file', type=str, default=None,
+                        help='persistent index of loaded images and '
+                        'annotations, only changed files are reloaded')
     parser.add_argument('--prior_annfile', type=str, default=None,
                         help='prior annotations merge to data')
     parser.add_argument('--merge_type', type=str, default='addition',
@@ -56,6 +70,9 @@ def add_parser(parser):
                         help='to save pkl and splitted images')
     parser.add_argument('--save_ext', type=str, default='.png',
                         help='the extension of saving images')
+    parser.add_argument('--save_columnar', action='store_true',
+                        help='also save annotations in memory-mappable '
+                        'columnar format')
 
 
 def parse_args():
@@ -80,6 +97,7 @@ def parse_args():
     assert args.ann_dirs is None or len(args.ann_dirs) == len(args.img_dirs)
     assert args.prior_annfile is None or args.prior_annfile.endswith('.pkl')
     assert args.merge_type in ['addition', 'replace']
+    assert args.img_reader in ['cv2', 'mmap']
     assert len(args.sizes) == len(args.gaps)
     assert len(args.sizes) == 1 or len(args.rates) == 1
     assert args.save_ext in ['.png', '.jpg', 'bmp', '.tif']
@@ -127,14 +145,73 @@ def get_sliding_window(info, sizes, gaps, img_rate_thr):
     return windows[img_rates > img_rate_thr]
 
 
+def build_grid_index(bboxes, cell_size):
+    hbboxes = bt.bbox2type(bboxes, 'hbb')
+    cells = np.floor(hbboxes / cell_size).astype(np.int64)
+    x_min, y_min = cells[:, 0].min(), cells[:, 1].min()
+    x_max, y_max = cells[:, 2].max(), cells[:, 3].max()
+    cells -= np.array([x_min, y_min, x_min, y_min])
+    ny = y_max - y_min + 1
+
+    # expand every object to all the cells covered by its hbb
+    cols = cells[:, 2] - cells[:, 0] + 1
+    rows = cells[:, 3] - cells[:, 1] + 1
+    counts = cols * rows
+    obj_inds = np.repeat(np.arange(len(cells)), counts)
+    local = np.arange(counts.sum()) - np.repeat(np.cumsum(counts)-counts, counts)
+    cx = cells[obj_inds, 0] + local // rows[obj_inds]
+    cy = cells[obj_inds, 1] + local % rows[obj_inds]
+
+    keys = cx * ny + cy
+    order = np.argsort(keys, kind='stable')
+    return dict(cell_size=cell_size, origin=(x_min, y_min),
+                grid=(x_max-x_min+1, ny), keys=keys[order],
+                inds=obj_inds[order])
+
+
+def query_grid_index(index, window):
+    nx, ny = index['grid']
+    x_min, y_min = index['origin']
+    cells = np.floor(np.asarray(window) / index['cell_size']).astype(np.int64)
+    cells -= np.array([x_min, y_min, x_min, y_min])
+    cells[0::2] = np.clip(cells[0::2], 0, nx-1)
+    cells[1::2] = np.clip(cells[1::2], 0, ny-1)
+
+    cx, cy = np.meshgrid(np.arange(cells[0], cells[2]+1),
+                         np.arange(cells[1], cells[3]+1))
+    query_keys = (cx * ny + cy).ravel()
+    starts = np.searchsorted(index['keys'], query_keys, side='left')
+    stops = np.searchsorted(index['keys'], query_keys, side='right')
+    inds = [index['inds'][i:j] for i, j in zip(starts, stops) if j > i]
+    if not inds:
+        return np.zeros((0, ), dtype=np.int64)
+    return np.unique(np.concatenate(inds))
+
+
 def get_window_obj(info, windows, iof_thr):
     bboxes = info['ann']['bboxes']
-    iofs = bt.bbox_overlaps(bboxes, windows, mode='iof')
+    num_objs, num_wins = bboxes.shape[0], windows.shape[0]
+    if num_objs == 0 or iof_thr <= 0:
+        obj_inds = np.tile(np.arange(num_objs), num_wins)
+        win_inds = np.repeat(np.arange(num_wins), num_objs)
+    else:
+        # only the objects in the grid cells of a window are candidates
+        win_sizes = np.minimum(windows[:, 2] - windows[:, 0],
+                               windows[:, 3] - windows[:, 1])
+        index = build_grid_index(bboxes, max(win_sizes.min() / 4, 1))
+        cand_inds = [query_grid_index(index, win) for win in windows]
+        obj_inds = np.concatenate(cand_inds)
+        win_inds = np.repeat(np.arange(num_wins),
+                             [len(inds) for inds in cand_inds])
+    iofs = bt.bbox_overlaps(bboxes[obj_inds], windows[win_inds],
+                            mode='iof', is_aligned=True)[:, 0]
 
     window_anns = []
-    for i in range(windows.shape[0]):
-        win_iofs = iofs[:, i]
-        pos_inds = np.nonzero(win_iofs >= iof_thr)[0].tolist()
+    bounds = np.searchsorted(win_inds, np.arange(num_wins+1))
+    for i in range(num_wins):
+        win_iofs = iofs[bounds[i]:bounds[i+1]]
+        pos_mask = win_iofs >= iof_thr
+        pos_inds = obj_inds[bounds[i]:bounds[i+1]][pos_mask].tolist()
 
         win_ann = dict()
         for k, v in info['ann'].items():
@@ -142,14 +219,48 @@ def get_window_obj(info, windows, iof_thr):
                 win_ann[k] = v[pos_inds]
             except TypeError:
                 win_ann[k] = [v[i] for i in pos_inds]
-        win_ann['trunc'] = win_iofs[pos_inds] < 1
+        win_ann['trunc'] = win_iofs[pos_mask] < 1
         window_anns.append(win_ann)
-    return window_anns
+    return window_anns, len(obj_inds)
+
+
+def get_peak_rss():
+    # ru_maxrss is in bytes on macOS and in kilobytes on Linux
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == 'darwin':
+        peak_rss /= 1024
+    return peak_rss / 1024
+
+
+def build_img_cache(arguments, cache_dir):
+    info, img_dir = arguments
+    imgpath = osp.join(img_dir, info['filename'])
+    cachepath = osp.join(cache_dir, info['id']+'.npy')
+    if osp.exists(cachepath) and \
+       osp.getmtime(cachepath) >= osp.getmtime(imgpath):
+        return cachepath
+
+    img = cv2.imread(imgpath)
+    tmppath = cachepath + '.tmp'
+    cache = np.lib.format.open_memmap(
+        tmppath, mode='w+', dtype=img.dtype, shape=img.shape)
+    cache[...] = img
+    cache.flush()
+    del cache, img
+    os.replace(tmppath, cachepath)
+    return cachepath
+
+
+def load_img(info, img_dir, cache_dir=None):
+    if cache_dir is None:
+        return cv2.imread(osp.join(img_dir, info['filename']))
+    # only the pages of cropped windows are read from the raw cache
+    return np.load(osp.join(cache_dir, info['id']+'.npy'), mmap_mode='r')
 
 
 def crop_and_save_img(info, windows, window_anns, img_dir, no_padding,
-                      padding_value, save_dir, img_ext):
-    img = cv2.imread(osp.join(img_dir, info['filename']))
+                      padding_value, save_dir, img_ext, cache_dir=None):
+    img = load_img(info, img_dir, cache_dir)
     patch_infos = []
     for i in range(windows.shape[0]):
         patch_info = dict()
@@ -168,7 +279,7 @@ def crop_and_save_img(info, windows, window_anns, img_dir, no_padding,
         ann['bboxes'] = bt.translate(ann['bboxes'], -x_start, -y_start)
         patch_info['ann'] = ann
 
-        patch = img[y_start:y_stop, x_start:x_stop]
+        patch = np.ascontiguousarray(img[y_start:y_stop, x_start:x_stop])
         if not no_padding:
             height = y_stop - y_start
             width = x_stop - x_start
@@ -191,15 +302,20 @@ def crop_and_save_img(info, windows, window_anns, img_dir, no_padding,
 
 
 def single_split(arguments, sizes, gaps, img_rate_thr, iof_thr,
-                 no_padding, padding_value, save_dir, img_ext):
+                 no_padding, padding_value, save_dir, img_ext,
+                 cache_dir=None):
     info, img_dir = arguments
     windows = get_sliding_window(info, sizes, gaps, img_rate_thr)
-    window_anns = get_window_obj(info, windows, iof_thr)
+    window_anns, num_cands = get_window_obj(info, windows, iof_thr)
     patch_infos = crop_and_save_img(info, windows, window_anns, img_dir,
-                                    no_padding, padding_value, save_dir, img_ext)
+                                    no_padding, padding_value, save_dir, img_ext,
+                                    cache_dir)
     assert patch_infos
     print(f"\t{info['id']} generates {len(patch_infos)} patches")
-    return patch_infos
+    stats = dict(candidates=num_cands,
+                 pairs=windows.shape[0] * info['ann']['bboxes'].shape[0],
+                 peak_rss=get_peak_rss())
+    return patch_infos, stats
 
 
 def main():
@@ -221,12 +337,15 @@ def main():
     print('Loading original data!!!')
     infos, img_dirs = [], []
     load_func = getattr(bt.datasets, 'load_'+args.load_type)
+    load_kwargs = dict() if args.index_file is None else \
+            dict(index_file=args.index_file)
     for img_dir, ann_dir in zip(args.img_dirs, args.ann_dirs):
         _infos, classes = load_func(
             img_dir=img_dir,
             ann_dir=ann_dir,
             classes=args.classes,
-            nproc=args.nproc)
+            nproc=args.nproc,
+            **load_kwargs)
         _img_dirs = [img_dir for _ in range(len(_infos))]
         infos.extend(_infos)
         img_dirs.extend(_img_dirs)
@@ -234,6 +353,24 @@ def main():
         prior_infos, _ = bt.load_pkl(args.prior_annfile, classes=classes)
         bt.merge_prior_contents(infos, prior_infos, merge_type=args.merge_type)
 
+    cache_dir = None
+    if args.img_reader == 'mmap':
+        cache_dir = args.cache_dir if args.cache_dir is not None \
+                else osp.join(args.save_dir, 'cache')
+        os.makedirs(cache_dir, exist_ok=True)
+
+        print('Building raw image cache!!!')
+        start = time.time()
+        cache_worker = partial(build_img_cache, cache_dir=cache_dir)
+        if args.cache_nproc > 1:
+            pool = Pool(args.cache_nproc)
+            pool.map(cache_worker, zip(infos, img_dirs))
+            pool.close()
+        else:
+            list(map(cache_worker, zip(infos, img_dirs)))
+        stop = time.time()
+        print(f'Finish building cache in {int(stop - start)} second!!!')
+
     print('Start splitting images!!!')
     start = time.time()
     worker = partial(single_split,
@@ -244,19 +381,29 @@ def main():
                      no_padding=args.no_padding,
                      padding_value=padding_value,
                      save_dir=save_imgs,
-                     img_ext=args.save_ext)
+                     img_ext=args.save_ext,
+                     cache_dir=cache_dir)
 
     if args.nproc > 1:
         pool = Pool(args.nproc)
-        patch_infos = pool.map(worker, zip(infos, img_dirs))
+        results = pool.map(worker, zip(infos, img_dirs))
         pool.close()
     else:
-        patch_infos = list(map(worker, zip(infos, img_dirs)))
+        results = list(map(worker, zip(infos, img_dirs)))
+    patch_infos, stats = zip(*results)
 
     patch_infos = reduce(lambda x, y: x+y, patch_infos)
     stop = time.time()
     print(f'Finish splitting images in {int(stop - start)} second!!!')
     print(f'Total images number: {len(patch_infos)}')
+    num_cands = sum([stat['candidates'] for stat in stats])
+    num_pairs = sum([stat['pairs'] for stat in stats])
+    peak_rss = max([stat['peak_rss'] for stat in stats])
+    print(f'Object-window candidates: {num_cands} of {num_pairs} pairs')
+    print(f'Peak RSS of splitting worker: {peak_rss:.1f} MB')
+
+    if args.img_reader == 'mmap' and args.cache_dir is None:
+        shutil.rmtree(cache_dir)
 
     print('Save information of splitted dataset!!!')
     arg_dict = vars(args)
@@ -265,6 +412,10 @@ def main():
         json.dump(arg_dict, f, indent=4)
     bt.save_pkl(osp.join(save_files, 'ori_annfile.pkl'), infos, classes)
     bt.save_pkl(osp.join(save_files, 'patch_annfile.pkl'), patch_infos, classes)
+    if args.save_columnar:
+        bt.save_columnar(osp.join(save_files, 'ori_annfile'), infos, classes)
+        bt.save_columnar(osp.join(save_files, 'patch_annfile'), patch_infos,
+                         classes)
 
 
 if __name__ == '__main__':
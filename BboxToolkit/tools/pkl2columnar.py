@@ -0,0 +1,25 @@
+import BboxToolkit as bt
+
+import argparse
+import os.path as osp
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='convert annfiles of a splitted dataset to columnar')
+    parser.add_argument('ann_dir', type=str,
+                        help='dir with ori_annfile.pkl and patch_annfile.pkl')
+    args = parser.parse_args()
+    return args
+
+
+def main():
+    args = parse_args()
+    for name in ['ori_annfile', 'patch_annfile']:
+        pkl_file = osp.join(args.ann_dir, name+'.pkl')
+        contents, classes = bt.load_pkl(pkl_file)
+        bt.save_columnar(osp.join(args.ann_dir, name), contents, classes)
+
+
+if __name__ == '__main__':
+    main()
@@ -7,12 +7,10 @@ train_pipeline = [
     dict(type='LoadOBBAnnotations', with_bbox=True,
          with_label=True, with_poly_as_mask=True),
     dict(type='LoadDOTASpecialInfo'),
-    dict(type='Resize', img_scale=(1024, 1024), keep_ratio=True),
-    dict(type='OBBRandomFlip', h_flip_ratio=0.5, v_flip_ratio=0.5),
-    dict(type='Normalize', **img_norm_cfg),
-    dict(type='RandomOBBRotate', rotate_after_flip=True,
-         angles=(0, 0), vert_rate=0.5, vert_cls=['roundabout', 'storage-tank']),
-    dict(type='Pad', size_divisor=32),
+    dict(type='OBBGeometricAug', img_scale=(1024, 1024), keep_ratio=True,
+         h_flip_ratio=0.5, v_flip_ratio=0.5, rotate_after_flip=True,
+         angles=(0, 0), vert_rate=0.5, vert_cls=['roundabout', 'storage-tank'],
+         img_norm_cfg=img_norm_cfg, size_divisor=32),
     dict(type='DOTASpecialIgnore', ignore_size=2),
     dict(type='FliterEmpty'),
     dict(type='Mask2OBB', obb_type='obb'),
@@ -3,8 +3,13 @@ from .inference import (async_inference_detector, inference_detector,
 from .test import multi_gpu_test, single_gpu_test
 from .train import get_root_logger, set_random_seed, train_detector
 
+from .obb import (get_windows, inference_detector_huge_image,
+                  merge_patch_results)
+
 __all__ = [
     'get_root_logger', 'set_random_seed', 'train_detector', 'init_detector',
     'async_inference_detector', 'inference_detector', 'show_result_pyplot',
-    'multi_gpu_test', 'single_gpu_test'
+    'multi_gpu_test', 'single_gpu_test',
+
+    'get_windows', 'inference_detector_huge_image', 'merge_patch_results'
 ]
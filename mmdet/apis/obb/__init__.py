@@ -0,0 +1,6 @@
+from .huge_img_inference import (get_windows, inference_detector_huge_image,
+                                 merge_patch_results)
+
+__all__ = [
+    'get_windows', 'inference_detector_huge_image', 'merge_patch_results'
+]
@@ -0,0 +1,222 @@
+import BboxToolkit as bt
+
+import warnings
+import itertools
+import mmcv
+import numpy as np
+import torch
+
+from math import ceil
+from mmcv.parallel import collate, scatter
+
+from mmdet.datasets.pipelines import Compose
+from mmdet.ops import RoIAlign, RoIPool
+from mmdet.ops.nms import nms
+from mmdet.ops.nms_rotated import obb_nms, BT_nms
+
+
+def get_windows(width, height, sizes, gaps, img_rate_thr=0.6):
+    """Generate sliding windows over a large image.
+
+    Same logic as ``get_sliding_window`` in ``BboxToolkit/tools/img_split.py``
+    so that in-memory inference sees the same patches as the split dataset.
+
+    Args:
+        width (int): width of the large image.
+        height (int): height of the large image.
+        sizes (list[int]): sizes of sliding windows.
+        gaps (list[int]): overlaps between neighbouring windows.
+        img_rate_thr (float): the minimal rate of image in a window.
+
+    Returns:
+        np.ndarray: windows in (x_start, y_start, x_stop, y_stop) format.
+    """
+    eps = 0.01
+    windows = []
+    for size, gap in zip(sizes, gaps):
+        assert size > gap, f'invaild size gap pair [{size} {gap}]'
+        step = size - gap
+
+        x_num = 1 if width <= size else ceil((width-size)/step+1)
+        x_start = [step * i for i in range(x_num)]
+        if len(x_start) > 1 and x_start[-1]+size > width:
+            x_start[-1] = width - size
+
+        y_num = 1 if height <= size else ceil((height-size)/step+1)
+        y_start = [step * i for i in range(y_num)]
+        if len(y_start) > 1 and y_start[-1]+size > height:
+            y_start[-1] = height - size
+
+        start = np.array(list(itertools.product(x_start, y_start)))
+        stop = start + size
+        windows.append(np.concatenate([start, stop], axis=1))
+    windows = np.concatenate(windows, axis=0)
+
+    img_in_wins = windows.copy()
+    img_in_wins[:, 0::2] = np.clip(img_in_wins[:, 0::2], 0, width)
+    img_in_wins[:, 1::2] = np.clip(img_in_wins[:, 1::2], 0, height)
+    img_areas = (img_in_wins[:, 2] - img_in_wins[:, 0]) * \
+            (img_in_wins[:, 3] - img_in_wins[:, 1])
+    win_areas = (windows[:, 2] - windows[:, 0]) * \
+            (windows[:, 3] - windows[:, 1])
+    img_rates = img_areas / win_areas
+    if not (img_rates > img_rate_thr).any():
+        max_rate = img_rates.max()
+        img_rates[abs(img_rates - max_rate) < eps] = 1
+    return windows[img_rates > img_rate_thr]
+
+
+class LoadPatch(object):
+    """Crop a window from an in-memory large image.
+
+    The patch is padded to the window size with ``padding_value`` in the
+    same way as ``crop_and_save_img`` in ``img_split.py``.
+    """
+
+    def __init__(self, padding_value=0):
+        self.padding_value = padding_value
+
+    def __call__(self, results):
+        img = results['img']
+        x_start, y_start, x_stop, y_stop = results['patch_win']
+        patch = img[y_start:y_stop, x_start:x_stop]
+
+        height, width = y_stop - y_start, x_stop - x_start
+        if height > patch.shape[0] or width > patch.shape[1]:
+            padding_patch = np.empty(
+                (height, width, patch.shape[-1]), dtype=np.uint8)
+            padding_patch[...] = self.padding_value
+            padding_patch[:patch.shape[0], :patch.shape[1], ...] = patch
+            patch = padding_patch
+        else:
+            patch = np.ascontiguousarray(patch)
+
+        results['filename'] = None
+        results['ori_filename'] = None
+        results['img'] = patch
+        results['img_fields'] = ['img']
+        results['img_shape'] = patch.shape
+        results['ori_shape'] = patch.shape
+        return results
+
+
+def merge_patch_results(patch_results, windows, iou_thr=0.1, task='Task1',
+                        device_id=None):
+    """Shift patch detections back to the large image and merge them.
+
+    Args:
+        patch_results (list[list[np.ndarray]]): per-patch, per-class
+            detections, each with the score at the last column.
+        windows (np.ndarray): windows corresponding to ``patch_results``.
+        iou_thr (float): IoU threshold of the per-class merging NMS.
+        task (str): 'Task1' keeps the original bbox type, 'Task2' converts
+            the merged results to hbb.
+        device_id (int, optional): run the merging NMS on this GPU.
+
+    Returns:
+        list[np.ndarray]: per-class detections of the large image.
+    """
+    assert task in ['Task1', 'Task2']
+    num_classes = len(patch_results[0])
+    collector = [[] for _ in range(num_classes)]
+    for result, window in zip(patch_results, windows):
+        x_start, y_start = window[:2].tolist()
+        for i, dets in enumerate(result):
+            bboxes, scores = dets[:, :-1], dets[:, [-1]]
+            bboxes = bt.translate(bboxes, x_start, y_start)
+            collector[i].append(np.concatenate([bboxes, scores], axis=1))
+
+    merged_results = []
+    for cls_dets in collector:
+        cls_dets = np.concatenate(cls_dets, axis=0)
+        nms_ops = bt.choice_by_type(nms, obb_nms, BT_nms,
+                                    cls_dets, with_score=True)
+        nms_dets, _ = nms_ops(cls_dets, iou_thr, device_id=device_id)
+
+        if task == 'Task2':
+            bboxes = bt.bbox2type(nms_dets[:, :-1], 'hbb')
+            nms_dets = np.concatenate([bboxes, nms_dets[:, -1:]], axis=1)
+        merged_results.append(nms_dets)
+    return merged_results
+
+
+def inference_detector_huge_image(model, img, split_cfg, merge_cfg,
+                                  samples_per_gpu=1):
+    """Inference a large image with sliding windows, all in memory.
+
+    Windows are generated with the same rule as the splitting tool, cropped
+    from the decoded image without writing patches to disk, fed into the
+    detector ``samples_per_gpu`` patches at a time, and the patch results
+    are shifted back and merged by a per-class rotated NMS.
+
+    Args:
+        model (nn.Module): The loaded detector.
+        img (str or np.ndarray): Image filename or loaded image.
+        split_cfg (dict): keys of ``sizes``, ``gaps`` and optionally
+            ``rates``, ``img_rate_thr`` and ``padding_value``, same as the
+            arguments of ``img_split.py``.
+        merge_cfg (dict): keys of ``iou_thr`` and optionally ``task``.
+        samples_per_gpu (int): number of patches in one forward. Values
+            larger than 1 need a detector whose ``simple_test`` returns one
+            result per image.
+
+    Returns:
+        list[np.ndarray]: per-class detection results of the large image.
+    """
+    cfg = model.cfg
+    device = next(model.parameters()).device  # model device
+    # build the data pipeline
+    padding_value = split_cfg.get('padding_value', 0)
+    if not isinstance(padding_value, (int, float)) and len(padding_value) == 1:
+        padding_value = padding_value[0]
+    test_pipeline = [LoadPatch(padding_value)] + cfg.data.test.pipeline[1:]
+    test_pipeline = Compose(test_pipeline)
+
+    img = mmcv.imread(img)
+    height, width = img.shape[:2]
+    sizes, gaps = [], []
+    for rate in split_cfg.get('rates', [1.]):
+        sizes += [int(size / rate) for size in split_cfg['sizes']]
+        gaps += [int(gap / rate) for gap in split_cfg['gaps']]
+    windows = get_windows(width, height, sizes, gaps,
+                          split_cfg.get('img_rate_thr', 0.6))
+
+    if not next(model.parameters()).is_cuda:
+        # Use torchvision ops for CPU mode instead
+        for m in model.modules():
+            if isinstance(m, (RoIPool, RoIAlign)):
+                if not m.aligned:
+                    # aligned=False is not implemented on CPU
+                    # set use_torchvision on-the-fly
+                    m.use_torchvision = True
+        warnings.warn('We set use_torchvision=True in CPU mode.')
+
+    patch_results = []
+    prog_bar = mmcv.ProgressBar(len(windows))
+    for i in range(0, len(windows), samples_per_gpu):
+        chunk = windows[i:i+samples_per_gpu]
+        # prepare data
+        datas = [test_pipeline(dict(img=img, patch_win=win.tolist()))
+                 for win in chunk]
+        data = collate(datas, samples_per_gpu=len(datas))
+        if next(model.parameters()).is_cuda:
+            # scatter to specified GPU
+            data = scatter(data, [device])[0]
+        else:
+            # just get the actual data from DataContainer
+            data['img_metas'] = [m.data[0] for m in data['img_metas']]
+
+        # forward the model
+        with torch.no_grad():
+            results = model(return_loss=False, rescale=True, **data)
+        if len(chunk) == 1:
+            results = [results]
+        patch_results.extend(results)
+        for _ in range(len(chunk)):
+            prog_bar.update()
+
+    device_id = device.index if device.type == 'cuda' else None
+    return merge_patch_results(patch_results, windows,
+                               iou_thr=merge_cfg.get('iou_thr', 0.1),
+                               task=merge_cfg.get('task', 'Task1'),
+                               device_id=device_id)
@@ -25,13 +25,19 @@ def single_gpu_test(model,
         with torch.no_grad():
             result = model(return_loss=False, rescale=True, **data)
 
+        batch_size = len(data['img_metas'][0].data[0])
+        if batch_size == 1:
+            result = [result]
+
         if show or out_dir:
             img_tensor = data['img'][0]
+            if not isinstance(img_tensor, torch.Tensor):
+                img_tensor = img_tensor.data[0]
             img_metas = data['img_metas'][0].data[0]
             imgs = tensor2imgs(img_tensor, **img_metas[0]['img_norm_cfg'])
             assert len(imgs) == len(img_metas)
 
-            for img, img_meta in zip(imgs, img_metas):
+            for img, img_meta, img_result in zip(imgs, img_metas, result):
                 h, w, _ = img_meta['img_shape']
                 img_show = img[:h, :w, :]
 
@@ -45,19 +51,19 @@ def single_gpu_test(model,
 
                 model.module.show_result(
                     img_show,
-                    result,
+                    img_result,
                     show=show,
                     out_file=out_file,
                     score_thr=show_score_thr)
 
         # encode mask results
-        if isinstance(result, tuple):
-            bbox_results, mask_results = result
-            encoded_mask_results = encode_mask_results(mask_results)
-            result = bbox_results, encoded_mask_results
-        results.append(result)
+        for j, img_result in enumerate(result):
+            if isinstance(img_result, tuple):
+                bbox_results, mask_results = img_result
+                encoded_mask_results = encode_mask_results(mask_results)
+                result[j] = bbox_results, encoded_mask_results
+        results.extend(result)
 
-        batch_size = len(data['img_metas'][0].data)
         for _ in range(batch_size):
             prog_bar.update()
     return results
@@ -92,15 +98,19 @@ def multi_gpu_test(model, data_loader, tmpdir=None, gpu_collect=False):
     for i, data in enumerate(data_loader):
         with torch.no_grad():
             result = model(return_loss=False, rescale=True, **data)
-            # encode mask results
-            if isinstance(result, tuple):
-                bbox_results, mask_results = result
+
+        batch_size = len(data['img_metas'][0].data[0])
+        if batch_size == 1:
+            result = [result]
+        # encode mask results
+        for j, img_result in enumerate(result):
+            if isinstance(img_result, tuple):
+                bbox_results, mask_results = img_result
                 encoded_mask_results = encode_mask_results(mask_results)
-                result = bbox_results, encoded_mask_results
-        results.append(result)
+                result[j] = bbox_results, encoded_mask_results
+        results.extend(result)
 
         if rank == 0:
-            batch_size = len(data['img_metas'][0].data)
             for _ in range(batch_size * world_size):
                 prog_bar.update()
 
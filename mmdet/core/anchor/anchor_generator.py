@@ -1,3 +1,5 @@
+from collections import OrderedDict
+
 import mmcv
 import numpy as np
 import torch
@@ -36,6 +38,10 @@ class AnchorGenerator(object):
         center_offset (float): The offset of center in propotion to anchors'
             width and height. By default it is 0 in V2.0.
 
+    Grid anchors and valid flags are cached by feature map sizes, device and
+    pad shape, the `cache_size` latest results of each are kept. The cached
+    tensors are shared by the callers, so they must not be changed in place.
+
     Examples:
         >>> from mmdet.core import AnchorGenerator
         >>> self = AnchorGenerator([16], [1.], [1.], [9])
@@ -55,6 +61,8 @@ class AnchorGenerator(object):
         tensor([[-9., -9., 9., 9.]])]
     """
 
+    cache_size = 16
+
     def __init__(self,
                  strides,
                  ratios,
@@ -203,6 +211,29 @@ class AnchorGenerator(object):
         else:
             return yy, xx
 
+    def cache_info(self):
+        """dict: hits, misses and current sizes of the anchor caches."""
+        info = dict(self.__dict__.get('_cache_counts', {}))
+        for name, cache in self.__dict__.get('_caches', {}).items():
+            info[f'{name}_size'] = len(cache)
+        return info
+
+    def _cached(self, name, key, func, *args):
+        # created lazily since some subclasses do not call __init__ of this
+        # class
+        cache = self.__dict__.setdefault('_caches', {}).setdefault(
+            name, OrderedDict())
+        counts = self.__dict__.setdefault('_cache_counts', {})
+        if key in cache:
+            cache.move_to_end(key)
+            counts[f'{name}_hits'] = counts.get(f'{name}_hits', 0) + 1
+        else:
+            counts[f'{name}_misses'] = counts.get(f'{name}_misses', 0) + 1
+            cache[key] = func(*args)
+            if len(cache) > self.cache_size:
+                cache.popitem(last=False)
+        return list(cache[key])
+
     def grid_anchors(self, featmap_sizes, device='cuda'):
         """Generate grid anchors in multiple feature levels
 
@@ -219,6 +250,11 @@ class AnchorGenerator(object):
                 num_base_anchors is the number of anchors for that level.
         """
         assert self.num_levels == len(featmap_sizes)
+        key = (tuple(tuple(size) for size in featmap_sizes), str(device))
+        return self._cached('anchors', key, self._grid_anchors,
+                            featmap_sizes, device)
+
+    def _grid_anchors(self, featmap_sizes, device):
         multi_level_anchors = []
         for i in range(self.num_levels):
             anchors = self.single_level_grid_anchors(
@@ -279,6 +315,12 @@ class AnchorGenerator(object):
             list(torch.Tensor): Valid flags of anchors in multiple levels.
         """
         assert self.num_levels == len(featmap_sizes)
+        key = (tuple(tuple(size) for size in featmap_sizes),
+               tuple(pad_shape[:2]), str(device))
+        return self._cached('flags', key, self._valid_flags, featmap_sizes,
+                            pad_shape, device)
+
+    def _valid_flags(self, featmap_sizes, pad_shape, device):
         multi_level_flags = []
         for i in range(self.num_levels):
             anchor_stride = self.strides[i]
@@ -8,31 +8,67 @@ pi = 3.141592
 
 
 def poly2obb(polys):
-    polys_np = polys.detach().cpu().numpy()
-
-    order = polys_np.shape[:-1]
-    num_points = polys_np.shape[-1] // 2
-    polys_np = polys_np.reshape(-1, num_points, 2)
-    polys_np = polys_np.astype(np.float32)
-
-    obboxes = []
-    for poly in polys_np:
-        (x, y), (w, h), angle = cv2.minAreaRect(poly)
-        if w >= h:
-            angle = -angle
-        else:
-            w, h = h, w
-            angle = -90 - angle
-        theta = angle / 180 * pi
-        obboxes.append([x, y, w, h, theta])
-
-    if not obboxes:
-        obboxes = np.zeros((0, 5))
+    order = polys.shape[:-1]
+    num_points = polys.size(-1) // 2
+    points = polys.reshape(-1, num_points, 2)
+
+    if num_points <= 4:
+        # the hull edges are among all point pairs of quadrilaterals
+        inds1, inds2 = torch.triu_indices(
+            num_points, num_points, 1, device=polys.device)
+        obboxes = _min_area_rects(points.double(), inds1, inds2)
     else:
-        obboxes = np.array(obboxes)
-
-    obboxes = obboxes.reshape(*order, 5)
-    return polys.new_tensor(obboxes)
+        points_np = points.detach().cpu().numpy().astype(np.float32)
+        rects = [cv2.minAreaRect(p) for p in points_np]
+        rects = polys.new_tensor([[x, y, w, h, angle] for (x, y), (w, h),
+                                  angle in rects], dtype=torch.float64)
+        rects = rects.reshape(-1, 5)
+        # the w side of cv2 rects is along (cos(angle), sin(angle))
+        obboxes = _regular_obbs(rects[:, 0], rects[:, 1], rects[:, 2],
+                                rects[:, 3], -rects[:, 4] / 180 * np.pi)
+    return obboxes.to(polys.dtype).reshape(*order, 5)
+
+
+def _regular_obbs(x, y, w, h, theta):
+    # make w the long side and regularize theta to [-pi/2, pi/2)
+    theta = torch.where(w >= h, theta, theta + np.pi/2)
+    theta = torch.remainder(theta + np.pi/2, np.pi) - np.pi/2
+    w, h = torch.max(w, h), torch.min(w, h)
+    return torch.stack([x, y, w, h, theta], dim=-1)
+
+
+def _min_area_rects(points, inds1, inds2):
+    # Rotating calipers: the minimum area rectangle of a convex hull has a
+    # side collinear with one of the hull edges, so every edge inds1->inds2
+    # is tried as the rectangle direction for all polygons at once.
+    if points.size(0) == 0:
+        return points.new_zeros((0, 5))
+    x, y = points[..., 0], points[..., 1]
+    ux, uy = x[:, inds2] - x[:, inds1], y[:, inds2] - y[:, inds1]
+    norms = torch.sqrt(ux * ux + uy * uy)
+    valid = norms > 0
+    norms = torch.where(valid, norms, torch.ones_like(norms))
+    ux = torch.where(valid, ux / norms, torch.ones_like(ux))
+    uy = torch.where(valid, uy / norms, torch.zeros_like(uy))
+
+    # extents of the projections on the edge directions and their normals
+    proj_u = ux[..., None] * x[:, None] + uy[..., None] * y[:, None]
+    proj_v = ux[..., None] * y[:, None] - uy[..., None] * x[:, None]
+    umin, umax = proj_u.min(dim=-1)[0], proj_u.max(dim=-1)[0]
+    vmin, vmax = proj_v.min(dim=-1)[0], proj_v.max(dim=-1)[0]
+    areas = (umax - umin) * (vmax - vmin)
+    areas = torch.where(valid, areas, torch.full_like(areas, float('inf')))
+    best = areas.argmin(dim=1, keepdim=True)
+
+    ux, uy = ux.gather(1, best)[:, 0], uy.gather(1, best)[:, 0]
+    umin, umax = umin.gather(1, best)[:, 0], umax.gather(1, best)[:, 0]
+    vmin, vmax = vmin.gather(1, best)[:, 0], vmax.gather(1, best)[:, 0]
+    cu, cv = (umin + umax) / 2, (vmin + vmax) / 2
+    w, h = umax - umin, vmax - vmin
+
+    # theta is anti-clockwise in image coordinates as in obb2poly
+    theta = torch.atan2(-uy, ux)
+    return _regular_obbs(ux*cu - uy*cv, uy*cu + ux*cv, w, h, theta)
 
 
 def rectpoly2obb(polys):
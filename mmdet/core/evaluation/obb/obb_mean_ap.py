@@ -78,6 +78,25 @@ def tpfp_default(det_bboxes,
         tuple[np.ndarray]: (tp, fp) whose elements are 0 and 1. The shape of
             each array is (num_scales, m).
     """
+    tp, fp = tpfp_multi_thrs(det_bboxes, gt_bboxes, gt_bboxes_ignore,
+                             [iou_thr], area_ranges)
+    return tp[0], fp[0]
+
+
+def tpfp_multi_thrs(det_bboxes,
+                    gt_bboxes,
+                    gt_bboxes_ignore=None,
+                    iou_thrs=(0.5, ),
+                    area_ranges=None):
+    """Same as `tpfp_default()`, but the IoUs between dets and gts are
+    computed once and shared by all the IoU thresholds and area ranges.
+
+    Returns:
+        tuple[np.ndarray]: (tp, fp) whose elements are 0 and 1. The shape of
+            each array is (num_thrs, num_scales, m).
+    """
+    if gt_bboxes_ignore is None:
+        gt_bboxes_ignore = np.empty((0, gt_bboxes.shape[1]), dtype=np.float32)
     # an indicator of ignored gts
     gt_ignore_inds = np.concatenate(
         (np.zeros(gt_bboxes.shape[0], dtype=np.bool),
@@ -86,62 +105,87 @@ def tpfp_default(det_bboxes,
     gt_bboxes = np.vstack((gt_bboxes, gt_bboxes_ignore))
 
     num_dets = det_bboxes.shape[0]
-    num_gts = gt_bboxes.shape[0]
     if area_ranges is None:
         area_ranges = [(None, None)]
+    num_thrs = len(iou_thrs)
     num_scales = len(area_ranges)
-    # tp and fp are of shape (num_scales, num_gts), each row is tp or fp of
-    # a certain scale
-    tp = np.zeros((num_scales, num_dets), dtype=np.float32)
-    fp = np.zeros((num_scales, num_dets), dtype=np.float32)
+    # tp and fp are of shape (num_thrs, num_scales, num_dets), each row is
+    # tp or fp of a certain threshold and scale
+    tp = np.zeros((num_thrs, num_scales, num_dets), dtype=np.float32)
+    fp = np.zeros((num_thrs, num_scales, num_dets), dtype=np.float32)
+    if num_dets == 0:
+        return tp, fp
+    if area_ranges != [(None, None)]:
+        det_areas = bt.bbox_areas(det_bboxes[:, :-1])
 
     # if there is no gt bboxes in this image, then all det bboxes
     # within area range are false positives
     if gt_bboxes.shape[0] == 0:
-        if area_ranges == [(None, None)]:
-            fp[...] = 1
-        else:
-            det_areas = bt.bbox_areas(det_bboxes[:, :-1])  #-------------------------------------------------
-            for i, (min_area, max_area) in enumerate(area_ranges):
-                fp[i, (det_areas >= min_area) & (det_areas < max_area)] = 1
+        for k, (min_area, max_area) in enumerate(area_ranges):
+            if min_area is None:
+                fp[:, k] = 1
+            else:
+                fp[:, k, (det_areas >= min_area) & (det_areas < max_area)] = 1
         return tp, fp
 
-    ious = bt.bbox_overlaps(det_bboxes[:, :-1], gt_bboxes) #------------------------------
+    ious = bt.bbox_overlaps(det_bboxes[:, :-1], gt_bboxes)
     # for each det, the max iou with all gts
     ious_max = ious.max(axis=1)
     # for each det, which gt overlaps most with it
     ious_argmax = ious.argmax(axis=1)
     # sort all dets in descending order by scores
     sort_inds = np.argsort(-det_bboxes[:, -1])
+    gt_areas = bt.bbox_areas(gt_bboxes)
     for k, (min_area, max_area) in enumerate(area_ranges):
-        gt_covered = np.zeros(num_gts, dtype=bool)
         # if no area range is specified, gt_area_ignore is all False
         if min_area is None:
-            gt_area_ignore = np.zeros_like(gt_ignore_inds, dtype=bool)
+            gt_ignore = gt_ignore_inds
+            det_in_range = np.ones(num_dets, dtype=bool)
         else:
-            gt_areas = bt.bbox_areas(gt_bboxes)     #------------------------------------
-            gt_area_ignore = (gt_areas < min_area) | (gt_areas >= max_area)
-        for i in sort_inds:
-            if ious_max[i] >= iou_thr:
-                matched_gt = ious_argmax[i]
-                if not (gt_ignore_inds[matched_gt]
-                        or gt_area_ignore[matched_gt]):
-                    if not gt_covered[matched_gt]:
-                        gt_covered[matched_gt] = True
-                        tp[k, i] = 1
-                    else:
-                        fp[k, i] = 1
-                # otherwise ignore this detected bbox, tp = 0, fp = 0
-            elif min_area is None:
-                fp[k, i] = 1
-            else:
-                bbox = det_bboxes[i:i+1, :-1]
-                area = bt.bbox_areas(bbox)    #--------------------------------------------
-                if area >= min_area and area < max_area:
-                    fp[k, i] = 1
+            gt_ignore = gt_ignore_inds | (gt_areas < min_area) | (
+                gt_areas >= max_area)
+            det_in_range = (det_areas >= min_area) & (det_areas < max_area)
+        for t, iou_thr in enumerate(iou_thrs):
+            matched = ious_max >= iou_thr
+            # the first det by score covering a gt is tp, the others are fp
+            # dets matched to ignored gts are neither tp nor fp
+            valid = matched & ~gt_ignore[ious_argmax]
+            valid_inds = sort_inds[valid[sort_inds]]
+            _, first = np.unique(ious_argmax[valid_inds], return_index=True)
+            fp[t, k, valid_inds] = 1
+            fp[t, k, valid_inds[first]] = 0
+            tp[t, k, valid_inds[first]] = 1
+            fp[t, k, ~matched & det_in_range] = 1
     return tp, fp
 
 
+def _tpfp_single_img(det_result, ann, iou_thrs, area_ranges):
+    # tp, fp and gt numbers of all classes in one image
+    outputs = []
+    for class_id, det_bboxes in enumerate(det_result):
+        gt_inds = ann['labels'] == class_id
+        gt_bboxes = ann['bboxes'][gt_inds, :]
+        if ann.get('labels_ignore', None) is not None:
+            ignore_inds = ann['labels_ignore'] == class_id
+            gt_bboxes_ignore = ann['bboxes_ignore'][ignore_inds, :]
+        else:
+            gt_bboxes_ignore = np.empty((0, gt_bboxes.shape[1]),
+                                        dtype=np.float32)
+        tp, fp = tpfp_multi_thrs(det_bboxes, gt_bboxes, gt_bboxes_ignore,
+                                 iou_thrs, area_ranges)
+
+        # ignored gts or gts beyond the specific scale are not counted
+        if area_ranges is None:
+            num_gts = np.array([gt_bboxes.shape[0]])
+        else:
+            gt_areas = bt.bbox_areas(gt_bboxes)
+            num_gts = np.array([
+                np.sum((gt_areas >= min_area) & (gt_areas < max_area))
+                for min_area, max_area in area_ranges])
+        outputs.append((tp, fp, num_gts))
+    return outputs
+
+
 def get_cls_results(det_results, annotations, class_id):
     """Get det results and gt information of a certain class.
 
@@ -195,102 +239,110 @@ def eval_arb_map(det_results,
             in the format [(min1, max1), (min2, max2), ...]. A range of
             (32, 64) means the area range between (32**2, 64**2).
             Default: None.
-        iou_thr (float): IoU threshold to be considered as matched.
-            Default: 0.5.
+        iou_thr (float | list[float]): IoU threshold(s) to be considered as
+            matched, IoUs are computed once for all thresholds. Default: 0.5.
         dataset (list[str] | str | None): Dataset name or dataset classes,
             there are minor differences in metrics for different datsets, e.g.
             "voc07", "imagenet_det", etc. Default: None.
         logger (logging.Logger | str | None): The way to print the mAP
             summary. See `mmdet.utils.print_log()` for details. Default: None.
-        nproc (int): Processes used for computing TP and FP.
-            Default: 4.
+        nproc (int): Processes used for computing TP and FP, images are
+            distributed to processes in one pass. Default: 4.
 
     Returns:
-        tuple: (mAP, [dict, dict, ...])
+        tuple: (mAP, [dict, dict, ...]). With more than one IoU threshold,
+            both are lists with one item per threshold.
     """
     assert len(det_results) == len(annotations)
 
+    multi_thrs = isinstance(iou_thr, (list, tuple)) and len(iou_thr) > 1
+    iou_thrs = list(iou_thr) if isinstance(iou_thr, (list, tuple)) \
+            else [iou_thr]
     num_imgs = len(det_results)
     num_scales = len(scale_ranges) if scale_ranges is not None else 1
     num_classes = len(det_results[0])  # positive class num
     area_ranges = ([(rg[0]**2, rg[1]**2) for rg in scale_ranges]
                    if scale_ranges is not None else None)
 
-    pool = Pool(nproc)
-    eval_results = []
+    # compute tp and fp of all classes and thresholds for each image
+    if nproc > 1:
+        pool = Pool(nproc)
+        img_results = pool.starmap(
+            _tpfp_single_img,
+            zip(det_results, annotations,
+                [iou_thrs for _ in range(num_imgs)],
+                [area_ranges for _ in range(num_imgs)]),
+            chunksize=max(1, num_imgs // (nproc * 4)))
+        pool.close()
+    else:
+        img_results = [
+            _tpfp_single_img(det_result, ann, iou_thrs, area_ranges)
+            for det_result, ann in zip(det_results, annotations)]
+
+    all_eval_results = [[] for _ in iou_thrs]
     for i in range(num_classes):
-        # get gt and det bboxes of this class
-        cls_dets, cls_gts, cls_gts_ignore = get_cls_results(
-            det_results, annotations, i)
-        # compute tp and fp for each image with multiple processes
-        tpfp = pool.starmap(
-            tpfp_default,
-            zip(cls_dets, cls_gts, cls_gts_ignore,
-                [iou_thr for _ in range(num_imgs)],
-                [area_ranges for _ in range(num_imgs)]))
-        tp, fp = tuple(zip(*tpfp))
+        tp, fp, num_gts = tuple(zip(*[r[i] for r in img_results]))
         # calculate gt number of each scale
-        # ignored gts or gts beyond the specific scale are not counted
-        num_gts = np.zeros(num_scales, dtype=int)
-        for j, bbox in enumerate(cls_gts):
-            if area_ranges is None:
-                num_gts[0] += bbox.shape[0]
-            else:
-                gt_areas = bt.bbox_areas(bbox)   #---------------------------------------
-                # gt_areas = (bbox[:, 2] - bbox[:, 0]) * (
-                    # bbox[:, 3] - bbox[:, 1])
-                for k, (min_area, max_area) in enumerate(area_ranges):
-                    num_gts[k] += np.sum((gt_areas >= min_area)
-                                         & (gt_areas < max_area))
+        num_gts = np.sum(num_gts, axis=0).astype(int)
         # sort all det bboxes by score, also sort tp and fp
-        cls_dets = np.vstack(cls_dets)
+        cls_dets = np.vstack([img_res[i] for img_res in det_results])
         num_dets = cls_dets.shape[0]
         sort_inds = np.argsort(-cls_dets[:, -1])
-        tp = np.hstack(tp)[:, sort_inds]
-        fp = np.hstack(fp)[:, sort_inds]
+        tp = np.concatenate(tp, axis=-1)[..., sort_inds]
+        fp = np.concatenate(fp, axis=-1)[..., sort_inds]
         # calculate recall and precision with tp and fp
-        tp = np.cumsum(tp, axis=1)
-        fp = np.cumsum(fp, axis=1)
+        tp = np.cumsum(tp, axis=-1)
+        fp = np.cumsum(fp, axis=-1)
         eps = np.finfo(np.float32).eps
-        recalls = tp / np.maximum(num_gts[:, np.newaxis], eps)
-        precisions = tp / np.maximum((tp + fp), eps)
-        # calculate AP
-        if scale_ranges is None:
-            recalls = recalls[0, :]
-            precisions = precisions[0, :]
-            num_gts = num_gts.item()
-        mode = 'area' if not use_07_metric else '11points'
-        ap = average_precision(recalls, precisions, mode)
-        eval_results.append({
-            'num_gts': num_gts,
-            'num_dets': num_dets,
-            'recall': recalls,
-            'precision': precisions,
-            'ap': ap
-        })
-    pool.close()
-    if scale_ranges is not None:
-        # shape (num_classes, num_scales)
-        all_ap = np.vstack([cls_result['ap'] for cls_result in eval_results])
-        all_num_gts = np.vstack(
-            [cls_result['num_gts'] for cls_result in eval_results])
-        mean_ap = []
-        for i in range(num_scales):
-            if np.any(all_num_gts[:, i] > 0):
-                mean_ap.append(all_ap[all_num_gts[:, i] > 0, i].mean())
-            else:
-                mean_ap.append(0.0)
-    else:
-        aps = []
-        for cls_result in eval_results:
-            if cls_result['num_gts'] > 0:
-                aps.append(cls_result['ap'])
-        mean_ap = np.array(aps).mean().item() if aps else 0.0
-
-    print_map_summary(
-        mean_ap, eval_results, dataset, area_ranges, logger=logger)
-
-    return mean_ap, eval_results
+        for t in range(len(iou_thrs)):
+            recalls = tp[t] / np.maximum(num_gts[:, np.newaxis], eps)
+            precisions = tp[t] / np.maximum((tp[t] + fp[t]), eps)
+            # calculate AP
+            cls_num_gts = num_gts
+            if scale_ranges is None:
+                recalls = recalls[0, :]
+                precisions = precisions[0, :]
+                cls_num_gts = num_gts.item()
+            mode = 'area' if not use_07_metric else '11points'
+            ap = average_precision(recalls, precisions, mode)
+            all_eval_results[t].append({
+                'num_gts': cls_num_gts,
+                'num_dets': num_dets,
+                'recall': recalls,
+                'precision': precisions,
+                'ap': ap
+            })
+
+    all_mean_ap = []
+    for thr, eval_results in zip(iou_thrs, all_eval_results):
+        if scale_ranges is not None:
+            # shape (num_classes, num_scales)
+            all_ap = np.vstack(
+                [cls_result['ap'] for cls_result in eval_results])
+            all_num_gts = np.vstack(
+                [cls_result['num_gts'] for cls_result in eval_results])
+            mean_ap = []
+            for i in range(num_scales):
+                if np.any(all_num_gts[:, i] > 0):
+                    mean_ap.append(all_ap[all_num_gts[:, i] > 0, i].mean())
+                else:
+                    mean_ap.append(0.0)
+        else:
+            aps = []
+            for cls_result in eval_results:
+                if cls_result['num_gts'] > 0:
+                    aps.append(cls_result['ap'])
+            mean_ap = np.array(aps).mean().item() if aps else 0.0
+
+        if multi_thrs:
+            print_log(f'\nIoU threshold {thr}', logger=logger)
+        print_map_summary(
+            mean_ap, eval_results, dataset, area_ranges, logger=logger)
+        all_mean_ap.append(mean_ap)
+
+    if multi_thrs:
+        return all_mean_ap, all_eval_results
+    return all_mean_ap[0], all_eval_results[0]
 
 
 def print_map_summary(mean_ap,
@@ -1,8 +1,8 @@
 from .mask_target import mask_target
-from .structures import BitmapMasks, PolygonMasks
+from .structures import ArrayPolygonMasks, BitmapMasks, PolygonMasks
 from .utils import encode_mask_results, split_combined_polys
 
 __all__ = [
     'split_combined_polys', 'mask_target', 'BitmapMasks', 'PolygonMasks',
-    'encode_mask_results'
+    'ArrayPolygonMasks', 'encode_mask_results'
 ]
@@ -559,6 +559,188 @@ class PolygonMasks(BaseInstanceMasks):
         return torch.tensor(ndarray_masks, dtype=dtype, device=device)
 
 
+class ArrayPolygonMasks(BaseInstanceMasks):
+    """This class represents single polygon masks with a fixed number of
+    points, e.g. the quadrilaterals of oriented boxes, as one array.
+
+    All transforms work on the whole array at once, so it is much cheaper
+    than :obj:`PolygonMasks` for images with many small objects.
+
+    Args:
+        masks (ndarray): Polygons in shape (n, 2 * num_points).
+        height (int): height of masks
+        width (int): width of masks
+    """
+
+    def __init__(self, masks, height, width):
+        masks = np.asarray(masks, dtype=np.float32)
+        if masks.size == 0:
+            masks = masks.reshape(0, 8)
+        assert masks.ndim == 2 and masks.shape[1] % 2 == 0
+
+        self.height = height
+        self.width = width
+        self.masks = masks
+
+    def __getitem__(self, index):
+        """Index the polygon masks.
+
+        Args:
+            index (ndarray | List | int | slice): The indices.
+
+        Returns:
+            :obj:`ArrayPolygonMasks`: The indexed polygon masks.
+        """
+        if isinstance(index, list):
+            index = np.asarray(index, dtype=np.int64)
+        try:
+            masks = self.masks[index]
+        except Exception:
+            raise ValueError(
+                f'Unsupported input of type {type(index)} for indexing!')
+        return ArrayPolygonMasks(
+            masks.reshape(-1, self.masks.shape[1]), self.height, self.width)
+
+    def __iter__(self):
+        # the same three levels as PolygonMasks
+        return iter([[poly] for poly in self.masks])
+
+    def __repr__(self):
+        s = self.__class__.__name__ + '('
+        s += f'num_masks={len(self.masks)}, '
+        s += f'height={self.height}, '
+        s += f'width={self.width})'
+        return s
+
+    def __len__(self):
+        """Number of masks."""
+        return len(self.masks)
+
+    def rescale(self, scale, interpolation=None):
+        """see :func:`BaseInstanceMasks.rescale()`"""
+        new_w, new_h = mmcv.rescale_size((self.width, self.height), scale)
+        return self.resize((new_h, new_w))
+
+    def resize(self, out_shape, interpolation=None):
+        """see :func:`BaseInstanceMasks.resize()`"""
+        h_scale = out_shape[0] / self.height
+        w_scale = out_shape[1] / self.width
+        masks = self.masks.copy()
+        masks[:, 0::2] *= w_scale
+        masks[:, 1::2] *= h_scale
+        return ArrayPolygonMasks(masks, *out_shape)
+
+    def flip(self, flip_direction='horizontal'):
+        """see :func:`BaseInstanceMasks.flip()`"""
+        assert flip_direction in ('horizontal', 'vertical')
+        if flip_direction == 'horizontal':
+            dim = self.width
+            idx = 0
+        else:
+            dim = self.height
+            idx = 1
+        masks = self.masks.copy()
+        masks[:, idx::2] = dim - masks[:, idx::2]
+        return ArrayPolygonMasks(masks, self.height, self.width)
+
+    def crop(self, bbox):
+        """see :func:`BaseInstanceMasks.crop()`"""
+        assert isinstance(bbox, np.ndarray)
+        assert bbox.ndim == 1
+
+        # clip the boundary
+        bbox = bbox.copy()
+        bbox[0::2] = np.clip(bbox[0::2], 0, self.width)
+        bbox[1::2] = np.clip(bbox[1::2], 0, self.height)
+        x1, y1, x2, y2 = bbox
+        w = np.maximum(x2 - x1, 1)
+        h = np.maximum(y2 - y1, 1)
+
+        # pycocotools will clip the boundary
+        masks = self.masks.copy()
+        masks[:, 0::2] -= bbox[0]
+        masks[:, 1::2] -= bbox[1]
+        return ArrayPolygonMasks(masks, h, w)
+
+    def pad(self, out_shape, pad_val=0):
+        """padding has no effect on polygons`"""
+        return ArrayPolygonMasks(self.masks, *out_shape)
+
+    def expand(self, expanded_h, expanded_w, top, left):
+        """see `transforms.Expand`."""
+        masks = self.masks.copy()
+        masks[:, 0::2] += left
+        masks[:, 1::2] += top
+        return ArrayPolygonMasks(masks, expanded_h, expanded_w)
+
+    def crop_and_resize(self,
+                        bboxes,
+                        out_shape,
+                        inds,
+                        device='cpu',
+                        interpolation='bilinear'):
+        """see :func:`BaseInstanceMasks.crop_and_resize()`"""
+        out_h, out_w = out_shape
+        if len(self.masks) == 0:
+            return ArrayPolygonMasks(self.masks, out_h, out_w)
+
+        bboxes = np.asarray(bboxes, dtype=np.float32)
+        w = np.maximum(bboxes[:, 2] - bboxes[:, 0], 1)
+        h = np.maximum(bboxes[:, 3] - bboxes[:, 1], 1)
+        h_scale = out_h / np.maximum(h, 0.1)  # avoid too large scale
+        w_scale = out_w / np.maximum(w, 0.1)
+
+        # pycocotools will clip the boundary
+        masks = self.masks[np.asarray(inds)].copy()
+        masks[:, 0::2] -= bboxes[:, 0:1]
+        masks[:, 1::2] -= bboxes[:, 1:2]
+        masks[:, 0::2] *= w_scale[:, None]
+        masks[:, 1::2] *= h_scale[:, None]
+        return ArrayPolygonMasks(masks, *out_shape)
+
+    def to_polygon(self):
+        """convert to :obj:`PolygonMasks`"""
+        return PolygonMasks([[poly] for poly in self.masks], self.height,
+                            self.width)
+
+    def to_bitmap(self):
+        """convert polygon masks to bitmap masks"""
+        bitmap_masks = self.to_ndarray()
+        return BitmapMasks(bitmap_masks, self.height, self.width)
+
+    @property
+    def areas(self):
+        """Compute areas of masks with the shoelace formula.
+
+        Return:
+            ndarray: areas of each instance
+        """
+        masks = self.masks.astype(np.float64)
+        x, y = masks[:, 0::2], masks[:, 1::2]
+        return 0.5 * np.abs(
+            (x * np.roll(y, 1, axis=1)).sum(1) -
+            (y * np.roll(x, 1, axis=1)).sum(1))
+
+    def to_ndarray(self):
+        """Convert masks to the format of ndarray."""
+        if len(self.masks) == 0:
+            return np.empty((0, self.height, self.width), dtype=np.uint8)
+        bitmap_masks = []
+        for poly in self.masks.astype(np.float64):
+            bitmap_masks.append(
+                polygon_to_bitmap([poly], self.height, self.width))
+        return np.stack(bitmap_masks)
+
+    def to_tensor(self, dtype, device):
+        """See :func:`BaseInstanceMasks.to_tensor()`."""
+        if len(self.masks) == 0:
+            return torch.empty((0, self.height, self.width),
+                               dtype=dtype,
+                               device=device)
+        ndarray_masks = self.to_ndarray()
+        return torch.tensor(ndarray_masks, dtype=dtype, device=device)
+
+
 def polygon_to_bitmap(polygons, height, width):
     """Convert masks from the form of polygons to bitmaps.
 
@@ -2,12 +2,14 @@ from .bbox_nms import multiclass_nms
 from .merge_augs import (merge_aug_bboxes, merge_aug_masks,
                          merge_aug_proposals, merge_aug_scores)
 
-from .obb import (multiclass_arb_nms, merge_rotate_aug_proposals, merge_rotate_aug_hbb,
+from .obb import (multiclass_arb_nms, multi_img_multiclass_arb_nms,
+                  merge_rotate_aug_proposals, merge_rotate_aug_hbb,
                   merge_rotate_aug_obb, merge_rotate_aug_arb)
 
 __all__ = [
     'multiclass_nms', 'merge_aug_proposals', 'merge_aug_bboxes',
     'merge_aug_scores', 'merge_aug_masks',
-    'multiclass_arb_nms', 'merge_rotate_aug_proposals', 'merge_rotate_aug_hbb',
+    'multiclass_arb_nms', 'multi_img_multiclass_arb_nms',
+    'merge_rotate_aug_proposals', 'merge_rotate_aug_hbb',
     'merge_rotate_aug_obb', 'merge_rotate_aug_arb'
 ]
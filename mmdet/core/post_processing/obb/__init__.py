@@ -1,4 +1,4 @@
-from .obb_nms import multiclass_arb_nms
+from .obb_nms import multiclass_arb_nms, multi_img_multiclass_arb_nms
 from .obb_merge_augs import (merge_rotate_aug_proposals, merge_rotate_aug_hbb,
                              merge_rotate_aug_obb, merge_rotate_aug_poly,
                              merge_rotate_aug_arb)
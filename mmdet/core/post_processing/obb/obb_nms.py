@@ -1,16 +1,11 @@
 import torch
 
-from mmdet.ops.nms_rotated import arb_batched_nms
+from mmdet.ops.nms_rotated import arb_batched_nms, multi_img_arb_batched_nms
 from mmdet.core.bbox.transforms_obb import get_bbox_dim
 
 
-def multiclass_arb_nms(multi_bboxes,
-                       multi_scores,
-                       score_thr,
-                       nms_cfg,
-                       max_num=-1,
-                       score_factors=None,
-                       bbox_type='hbb'):
+def _filter_scores(multi_bboxes, multi_scores, score_thr, score_factors,
+                   bbox_type):
     bbox_dim = get_bbox_dim(bbox_type)
     num_classes = multi_scores.size(1) - 1
     # exclude background category
@@ -26,7 +21,20 @@ def multiclass_arb_nms(multi_bboxes,
     if score_factors is not None:
         scores = scores * score_factors[:, None]
     scores = scores[valid_mask]
-    labels = valid_mask.nonzero()[:, 1]
+    valid_inds = valid_mask.nonzero()
+    return bboxes, scores, valid_inds[:, 1], valid_inds[:, 0]
+
+
+def multiclass_arb_nms(multi_bboxes,
+                       multi_scores,
+                       score_thr,
+                       nms_cfg,
+                       max_num=-1,
+                       score_factors=None,
+                       bbox_type='hbb'):
+    bbox_dim = get_bbox_dim(bbox_type)
+    bboxes, scores, labels, _ = _filter_scores(
+        multi_bboxes, multi_scores, score_thr, score_factors, bbox_type)
 
     if bboxes.numel() == 0:
         bboxes = multi_bboxes.new_zeros((0, bbox_dim+1))
@@ -40,3 +48,35 @@ def multiclass_arb_nms(multi_bboxes,
         keep = keep[:max_num]
 
     return dets, labels[keep]
+
+
+def multi_img_multiclass_arb_nms(multi_bboxes,
+                                 multi_scores,
+                                 img_inds,
+                                 num_imgs,
+                                 score_thr,
+                                 nms_cfg,
+                                 max_num=-1,
+                                 score_factors=None,
+                                 bbox_type='hbb'):
+    """multiclass_arb_nms of several images with one nms call.
+
+    Args:
+        img_inds (Tensor): image index of every row of multi_bboxes.
+        num_imgs (int): number of images.
+
+    Returns:
+        list[tuple[Tensor, Tensor]]: dets and labels of every image.
+    """
+    bboxes, scores, labels, rows = _filter_scores(
+        multi_bboxes, multi_scores, score_thr, score_factors, bbox_type)
+    results = multi_img_arb_batched_nms(
+        bboxes, scores, img_inds[rows], labels, nms_cfg, num_imgs)
+
+    det_results = []
+    for dets, keep in results:
+        if max_num > 0:
+            dets = dets[:max_num]
+            keep = keep[:max_num]
+        det_results.append((dets, labels[keep]))
+    return det_results
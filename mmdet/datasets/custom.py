@@ -91,7 +91,11 @@ class CustomDataset(Dataset):
         # filter images too small
         if not test_mode:
             valid_inds = self._filter_imgs()
-            self.data_infos = [self.data_infos[i] for i in valid_inds]
+            if isinstance(self.data_infos, list):
+                self.data_infos = [self.data_infos[i] for i in valid_inds]
+            else:
+                # array-backed infos, e.g. bt.ColumnarContents
+                self.data_infos = self.data_infos[valid_inds]
             if self.proposals is not None:
                 self.proposals = [self.proposals[i] for i in valid_inds]
         # set group flag for the sampler
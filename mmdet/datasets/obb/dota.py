@@ -22,9 +22,12 @@ class DOTADataset(CustomDataset):
     def __init__(self,
                  task,
                  *args,
+                 ann_backend='pkl',
                  **kwargs):
         assert task in ['Task1', 'Task2']
+        assert ann_backend in ['pkl', 'columnar']
         self.task = task
+        self.ann_backend = ann_backend
         super(DOTADataset, self).__init__(*args, **kwargs)
 
     @classmethod
@@ -40,17 +43,27 @@ class DOTADataset(CustomDataset):
         split_config = osp.join(ann_file, 'split_config.json')
         self.split_info = mmcv.load(split_config)
 
-        ori_annfile = osp.join(ann_file, 'ori_annfile.pkl')
-        self.ori_infos = mmcv.load(ori_annfile)['content']
+        if self.ann_backend == 'columnar':
+            # flat memory-mapped arrays, shared by dataloader workers
+            self.ori_infos, _ = bt.load_columnar(
+                osp.join(ann_file, 'ori_annfile'))
+            contents, cls = bt.load_columnar(
+                osp.join(ann_file, 'patch_annfile'))
+        else:
+            ori_annfile = osp.join(ann_file, 'ori_annfile.pkl')
+            self.ori_infos = mmcv.load(ori_annfile)['content']
 
-        patch_annfile = osp.join(ann_file, 'patch_annfile.pkl')
-        patch_dict = mmcv.load(patch_annfile)
-        cls, contents = patch_dict['cls'], patch_dict['content']
+            patch_annfile = osp.join(ann_file, 'patch_annfile.pkl')
+            patch_dict = mmcv.load(patch_annfile)
+            cls, contents = patch_dict['cls'], patch_dict['content']
         self.ori_CLASSES = cls
         if self.CLASSES is None:
             self.CLASSES = cls
 
-        if not self.test_mode:
+        if not self.test_mode and self.ann_backend == 'columnar':
+            data_infos = contents.subset(
+                np.nonzero(contents.num_objects() != 0)[0])
+        elif not self.test_mode:
             data_infos = []
             for content in contents:
                 if len(content['ann']['bboxes']) != 0:
@@ -75,6 +88,7 @@ class DOTADataset(CustomDataset):
                        iou_thr=0.5,
                        nproc=4,
                        save_dir=None,
+                       merge_batch=16,
                        **kwargs):
         task = self.task
         if mmcv.is_list_of(results, tuple):
@@ -128,13 +142,25 @@ class DOTADataset(CustomDataset):
             new_result = np.concatenate(new_result, axis=0)
             collector[data_info['ori_id']].append(new_result)
 
-        merge_func = partial(_merge_func, CLASSES=self.CLASSES, iou_thr=iou_thr, task=task)
+        if merge_batch:
+            # one nms call for all classes of merge_batch images
+            items = list(collector.items())
+            merge_inputs = [items[i:i+merge_batch]
+                            for i in range(0, len(items), merge_batch)]
+            merge_func = partial(_batched_merge_func, CLASSES=self.CLASSES,
+                                 iou_thr=iou_thr, task=task)
+        else:
+            merge_inputs = list(collector.items())
+            merge_func = partial(_merge_func, CLASSES=self.CLASSES,
+                                 iou_thr=iou_thr, task=task)
         if nproc > 1:
             pool = Pool(nproc)
-            merged_results = pool.map(merge_func, list(collector.items()))
+            merged_results = pool.map(merge_func, merge_inputs)
             pool.close()
         else:
-            merged_results = list(map(merge_func, list(collector.items())))
+            merged_results = list(map(merge_func, merge_inputs))
+        if merge_batch:
+            merged_results = [r for results in merged_results for r in results]
 
         if save_dir is not None:
             id_list, dets_list = zip(*merged_results)
@@ -212,6 +238,13 @@ class DOTADataset(CustomDataset):
                 dataset=self.CLASSES,
                 logger=logger,
                 nproc=nproc)
+            if isinstance(eval_iou_thr, (list, tuple)) and \
+               len(eval_iou_thr) > 1:
+                # IoUs are shared by all thresholds, e.g. mAP@[.5:.95]
+                for thr, thr_mean_ap in zip(eval_iou_thr, mean_ap):
+                    eval_results[f'AP{int(round(thr * 100)):02d}'] = \
+                            thr_mean_ap
+                mean_ap = np.mean(mean_ap, axis=0).tolist()
             eval_results['mAP'] = mean_ap
         elif metric == 'recall':
             assert mmcv.is_list_of(results, np.ndarray)
@@ -256,6 +289,62 @@ def _merge_func(info, CLASSES, iou_thr, task):
     return img_id, big_img_results
 
 
+def _batched_merge_func(infos, CLASSES, iou_thr, task):
+    num_classes = len(CLASSES)
+    img_ids, dets, groups = [], [], []
+    for i, (img_id, label_dets) in enumerate(infos):
+        img_ids.append(img_id)
+        label_dets = np.concatenate(label_dets, axis=0)
+        labels, img_dets = label_dets[:, 0], label_dets[:, 1:]
+        # keep the per-class order, so score ties break as in _merge_func
+        for j in range(num_classes):
+            cls_dets = img_dets[labels == j]
+            dets.append(cls_dets)
+            groups.append(np.full((cls_dets.shape[0], ), i * num_classes + j,
+                                  dtype=np.int64))
+    dets = np.concatenate(dets, axis=0)
+    groups = np.concatenate(groups, axis=0)
+    nms_ops = bt.choice_by_type(nms, obb_nms, BT_nms,
+                                dets, with_score=True)
+
+    bboxes_for_nms = _offset_by_groups(dets[:, :-1], groups)
+    _, keep = nms_ops(
+        np.concatenate([bboxes_for_nms, dets[:, -1:]], axis=1), iou_thr)
+    # nms keeps dets in score order, a stable sort splits them by groups
+    keep = keep[np.argsort(groups[keep], kind='stable')]
+    keep_groups = groups[keep]
+    bounds = np.searchsorted(keep_groups,
+                             np.arange(len(infos) * num_classes + 1))
+
+    merged_results = []
+    for i, img_id in enumerate(img_ids):
+        big_img_results = []
+        for j in range(num_classes):
+            g = i * num_classes + j
+            nms_dets = dets[keep[bounds[g]:bounds[g+1]]]
+            if task == 'Task2':
+                bboxes = bt.bbox2type(nms_dets[:, :-1], 'hbb')
+                nms_dets = np.concatenate([bboxes, nms_dets[:, -1:]], axis=1)
+            big_img_results.append(nms_dets)
+        merged_results.append((img_id, big_img_results))
+    return merged_results
+
+
+def _offset_by_groups(bboxes, groups):
+    # groups are shifted along x, so they never overlap each other
+    if bboxes.shape[0] == 0:
+        return bboxes
+    hbboxes = bt.bbox2type(bboxes, 'hbb')
+    offsets = groups * (hbboxes.max() - hbboxes.min() + 1)
+
+    bboxes = bboxes.copy()
+    if bt.get_bbox_type(bboxes) == 'obb':
+        bboxes[:, 0] = bboxes[:, 0] + offsets
+    else:
+        bboxes[:, 0::2] = bboxes[:, 0::2] + offsets[:, None]
+    return bboxes
+
+
 def _list_mask_2_obb(dets, segments):
     new_dets = []
     for cls_dets, cls_segments in zip(dets, segments):
@@ -13,7 +13,7 @@ from .transforms import (Albu, Expand, MinIoURandomCrop, Normalize, Pad,
 from .obb.base import mask2obb, mask2poly, poly2mask
 from .obb.base import (LoadOBBAnnotations, Mask2OBB, OBBDefaultFormatBundle,
                        OBBRandomFlip, RandomOBBRotate, MultiScaleFlipRotateAug,
-                       FliterEmpty)
+                       OBBGeometricAug, FliterEmpty)
 from .obb.dota import LoadDOTASpecialInfo, DOTASpecialIgnore
 
 __all__ = [
@@ -24,5 +24,6 @@ __all__ = [
     'MinIoURandomCrop', 'Expand', 'PhotoMetricDistortion', 'Albu',
     'InstaBoost', 'RandomCenterCropPad', 'AutoAugment',
     'LoadOBBAnnotations', 'Mask2OBB', 'OBBDefaultFormatBundle', 'OBBRandomFlip',
-    'RandomOBBRotate', 'LoadDOTASpecialInfo', 'DOTASpecialIgnore', 'FliterEmpty'
+    'RandomOBBRotate', 'LoadDOTASpecialInfo', 'DOTASpecialIgnore', 'FliterEmpty',
+    'OBBGeometricAug'
 ]
@@ -1,13 +1,81 @@
 import os.path as osp
+from collections import OrderedDict
 
 import mmcv
 import numpy as np
 import pycocotools.mask as maskUtils
 
 from mmdet.core import BitmapMasks, PolygonMasks
+from mmdet.utils import get_root_logger
 from ..builder import PIPELINES
 
 
+class ImageCache(object):
+    """Decoded image cache with a disk tier and an in-RAM LRU tier.
+
+    The disk tier is a blob built by ``BboxToolkit.save_img_blob`` and is
+    read through zero-copy views of its memory map, whose pages are cached
+    by the OS. Images which are not in the blob are kept in RAM after
+    decoding until ``ram_budget`` is used up, then the least recently used
+    ones are dropped. Every dataloader worker has its own RAM tier. Cached
+    images are read-only, so transforms must not change them in place.
+
+    Args:
+        blob_dir (str, optional): dir of the image blob.
+        ram_budget (float): the size of the RAM tier in MB.
+        log_interval (int): log the hit rates every log_interval loads, 0
+            for no logging.
+    """
+
+    def __init__(self, blob_dir=None, ram_budget=0, log_interval=1000):
+        self.blob = None
+        if blob_dir is not None:
+            import BboxToolkit as bt
+            self.blob = bt.ImgBlob(blob_dir)
+        self.ram_budget = ram_budget * 1024**2
+        self.log_interval = log_interval
+        self.ram_cache = OrderedDict()
+        self.ram_bytes = 0
+        self.ram_hits = self.blob_hits = self.misses = 0
+
+    def get(self, filename, key, color_type='color'):
+        img = self.ram_cache.get(key)
+        if img is not None:
+            self.ram_cache.move_to_end(key)
+            self.ram_hits += 1
+        elif self.blob is not None and color_type == self.blob.color_type:
+            img = self.blob.get(filename)
+            self.blob_hits += img is not None
+        if img is None:
+            self.misses += 1
+        self._log()
+        return img
+
+    def put(self, key, img):
+        if img.nbytes > self.ram_budget or key in self.ram_cache:
+            return
+        img.flags.writeable = False
+        self.ram_cache[key] = img
+        self.ram_bytes += img.nbytes
+        while self.ram_bytes > self.ram_budget:
+            _, old_img = self.ram_cache.popitem(last=False)
+            self.ram_bytes -= old_img.nbytes
+
+    def hit_rates(self):
+        num = max(self.ram_hits + self.blob_hits + self.misses, 1)
+        return dict(ram=self.ram_hits / num, blob=self.blob_hits / num)
+
+    def _log(self):
+        num = self.ram_hits + self.blob_hits + self.misses
+        if self.log_interval > 0 and num % self.log_interval == 0:
+            rates = self.hit_rates()
+            get_root_logger().info(
+                f'image cache: {num} loads, RAM hit rate {rates["ram"]:.3f}, '
+                f'blob hit rate {rates["blob"]:.3f}, '
+                f'{len(self.ram_cache)} images in RAM '
+                f'({self.ram_bytes / 1024**2:.0f}MB)')
+
+
 @PIPELINES.register_module()
 class LoadImageFromFile(object):
     """Load an image from file.
@@ -26,16 +94,22 @@ class LoadImageFromFile(object):
         file_client_args (dict): Arguments to instantiate a FileClient.
             See :class:`mmcv.fileio.FileClient` for details.
             Defaults to ``dict(backend='disk')``.
+        cache_cfg (dict, optional): Arguments of :class:`ImageCache`, e.g.
+            ``dict(blob_dir='data/split/blob', ram_budget=2048)``. Images
+            are always decoded from files if None.
     """
 
     def __init__(self,
                  to_float32=False,
                  color_type='color',
-                 file_client_args=dict(backend='disk')):
+                 file_client_args=dict(backend='disk'),
+                 cache_cfg=None):
         self.to_float32 = to_float32
         self.color_type = color_type
         self.file_client_args = file_client_args.copy()
         self.file_client = None
+        self.cache_cfg = cache_cfg
+        self.cache = None if cache_cfg is None else ImageCache(**cache_cfg)
 
     def __call__(self, results):
         """Call functions to load image and get image meta information.
@@ -56,8 +130,15 @@ class LoadImageFromFile(object):
         else:
             filename = results['img_info']['filename']
 
-        img_bytes = self.file_client.get(filename)
-        img = mmcv.imfrombytes(img_bytes, flag=self.color_type)
+        img = None
+        if self.cache is not None:
+            img = self.cache.get(results['img_info']['filename'], filename,
+                                 self.color_type)
+        if img is None:
+            img_bytes = self.file_client.get(filename)
+            img = mmcv.imfrombytes(img_bytes, flag=self.color_type)
+            if self.cache is not None:
+                self.cache.put(filename, img)
         if self.to_float32:
             img = img.astype(np.float32)
 
@@ -73,7 +154,8 @@ class LoadImageFromFile(object):
         repr_str = (f'{self.__class__.__name__}('
                     f'to_float32={self.to_float32}, '
                     f"color_type='{self.color_type}', "
-                    f'file_client_args={self.file_client_args})')
+                    f'file_client_args={self.file_client_args}, '
+                    f'cache_cfg={self.cache_cfg})')
         return repr_str
 
 
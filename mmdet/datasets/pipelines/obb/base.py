@@ -8,18 +8,20 @@ import numpy as np
 import pycocotools.mask as maskUtils
 
 from mmcv.parallel import DataContainer as DC
-from mmdet.core import PolygonMasks, BitmapMasks
+from mmdet.core import ArrayPolygonMasks, PolygonMasks, BitmapMasks
 from mmdet.datasets.builder import PIPELINES
 
 from ..loading import LoadAnnotations
 from ..formating import DefaultFormatBundle, Collect, to_tensor
-from ..transforms import RandomFlip
+from ..transforms import RandomFlip, Resize
 from ..compose import Compose
 
 
 def mask2obb(gt_masks):
     obboxes = []
-    if isinstance(gt_masks, PolygonMasks):
+    if isinstance(gt_masks, ArrayPolygonMasks):
+        return bt.bbox2type(gt_masks.masks, 'obb')
+    elif isinstance(gt_masks, PolygonMasks):
         for mask in gt_masks.masks:
             all_mask_points = np.concatenate(mask, axis=0)[None, ...]
             obboxes.append(bt.bbox2type(all_mask_points, 'obb'))
@@ -46,7 +48,12 @@ def mask2obb(gt_masks):
 
 def mask2poly(gt_masks):
     polys = []
-    if isinstance(gt_masks, PolygonMasks):
+    if isinstance(gt_masks, ArrayPolygonMasks):
+        if gt_masks.masks.shape[1] == 8:
+            return gt_masks.masks.copy()
+        obboxes = bt.bbox2type(gt_masks.masks, 'obb')
+        return bt.bbox2type(obboxes, 'poly').astype(np.float32)
+    elif isinstance(gt_masks, PolygonMasks):
         for mask in gt_masks.masks:
             if len(mask) == 1 and mask[0].size == 8:
                 polys.append(mask)
@@ -77,8 +84,10 @@ def mask2poly(gt_masks):
 
 
 def poly2mask(polys, w, h, mask_type='polygon'):
-    assert mask_type in ['polygon', 'bitmap']
-    if mask_type == 'bitmap':
+    assert mask_type in ['array', 'polygon', 'bitmap']
+    if mask_type == 'array':
+        gt_masks = ArrayPolygonMasks(polys, h, w)
+    elif mask_type == 'bitmap':
         masks = []
         for poly in polys:
             rles = maskUtils.frPyObjects([poly.tolist()], h, w)
@@ -90,6 +99,17 @@ def poly2mask(polys, w, h, mask_type='polygon'):
     return gt_masks
 
 
+def _mask_type(gt_masks):
+    if isinstance(gt_masks, ArrayPolygonMasks):
+        return 'array'
+    elif isinstance(gt_masks, BitmapMasks):
+        return 'bitmap'
+    elif isinstance(gt_masks, PolygonMasks):
+        return 'polygon'
+    else:
+        raise NotImplementedError
+
+
 @PIPELINES.register_module()
 class FliterEmpty:
 
@@ -132,7 +152,7 @@ class LoadOBBAnnotations(LoadAnnotations):
         if self.with_poly_as_mask:
             h, w = results['img_info']['height'], results['img_info']['width']
             polys = bt.bbox2type(gt_bboxes.copy(), 'poly')
-            mask_type = 'bitmap' if self.poly2mask else 'polygon'
+            mask_type = 'bitmap' if self.poly2mask else 'array'
             gt_masks = poly2mask(polys, w, h, mask_type)
             results['gt_masks'] = gt_masks
             results['mask_fields'].append('gt_masks')
@@ -152,7 +172,7 @@ class OBBRandomFlip(RandomFlip):
         self.h_flip_ratio = h_flip_ratio
         self.v_flip_ratio = v_flip_ratio
 
-    def __call__(self, results):
+    def get_random_flip(self, results):
         if 'flip' in results:
             if 'flip_direction' in results:
                 direction = results['flip_direction']
@@ -171,6 +191,8 @@ class OBBRandomFlip(RandomFlip):
             v_flip = True if np.random.rand() < self.v_flip_ratio else False
             results['v_flip'] = v_flip
 
+    def __call__(self, results):
+        self.get_random_flip(results)
         if results['h_flip']:
             # flip image
             for key in results.get('img_fields', ['img']):
@@ -358,12 +380,8 @@ class RandomOBBRotate(object):
                     # return True
                 warped_polys = warped_polys[if_inwindow]
 
-            if isinstance(results['gt_masks'], BitmapMasks):
-                results['gt_masks'] = poly2mask(warped_polys, w, h, 'bitmap')
-            elif isinstance(results['gt_masks'], PolygonMasks):
-                results['gt_masks'] = poly2mask(warped_polys, w, h, 'polygon')
-            else:
-                raise NotImplementedError
+            results['gt_masks'] = poly2mask(
+                warped_polys, w, h, _mask_type(results['gt_masks']))
 
             if 'gt_bboxes' in results:
                 results['gt_bboxes'] = bt.bbox2type(warped_polys, 'hbb')
@@ -420,12 +438,8 @@ class RandomOBBRotate(object):
             if self.keep_shape:
                 iofs = bt.bbox_overlaps(warped_polys, img_bound, mode='iof')
                 warped_polys = warped_polys[iofs[:, 0] > self.keep_iof_thr]
-            if isinstance(results[k], BitmapMasks):
-                results[k] = poly2mask(warped_polys, w, h, 'bitmap')
-            elif isinstance(results[k], PolygonMasks):
-                results[k] = poly2mask(warped_polys, w, h, 'polygon')
-            else:
-                raise NotImplementedError
+            results[k] = poly2mask(
+                warped_polys, w, h, _mask_type(results[k]))
 
         for k in results.get('seg_fields', []):
             results[k] = cv2.warpAffine(results[k], matrix, (w, h))
@@ -433,6 +447,228 @@ class RandomOBBRotate(object):
         return results
 
 
+@PIPELINES.register_module()
+class OBBGeometricAug(object):
+    """Resize, flip, rotate and pad images with one affine warp.
+
+    It is a fused version of Resize -> OBBRandomFlip -> Normalize ->
+    RandomOBBRotate -> Pad. All steps are composed into one matrix, so the
+    uint8 image is warped once and normalized afterwards, and the boxes are
+    mapped with the same matrix. The meta keys are the same as the separate
+    transforms, so the mapping back functions are still valid.
+
+    Args:
+        img_scale, multiscale_mode, ratio_range, keep_ratio: see `Resize`.
+        h_flip_ratio, v_flip_ratio: see `OBBRandomFlip`.
+        rotate_after_flip, angles, rotate_mode, vert_rate, vert_cls,
+            keep_shape, keep_iof_thr: see `RandomOBBRotate`.
+        img_norm_cfg (dict, optional): mean, std and to_rgb of `Normalize`,
+            the image is kept in uint8 if None.
+        size, size_divisor, pad_val: see `Pad`, no padding if both size and
+            size_divisor are None.
+    """
+
+    def __init__(self,
+                 img_scale=None,
+                 multiscale_mode='range',
+                 ratio_range=None,
+                 keep_ratio=True,
+                 h_flip_ratio=None,
+                 v_flip_ratio=None,
+                 rotate_after_flip=True,
+                 angles=(0, 90),
+                 rotate_mode='range',
+                 vert_rate=0.5,
+                 vert_cls=None,
+                 keep_shape=True,
+                 keep_iof_thr=0.7,
+                 img_norm_cfg=None,
+                 size=None,
+                 size_divisor=None,
+                 pad_val=0):
+        assert size is None or size_divisor is None
+        self.resize = Resize(img_scale, multiscale_mode, ratio_range,
+                             keep_ratio)
+        self.flip = OBBRandomFlip(h_flip_ratio, v_flip_ratio)
+        self.rotate = RandomOBBRotate(rotate_after_flip, angles, rotate_mode,
+                                      vert_rate, vert_cls, keep_shape,
+                                      keep_iof_thr)
+        if img_norm_cfg is not None:
+            img_norm_cfg = dict(
+                mean=np.array(img_norm_cfg['mean'], dtype=np.float32),
+                std=np.array(img_norm_cfg['std'], dtype=np.float32),
+                to_rgb=img_norm_cfg.get('to_rgb', True))
+        self.img_norm_cfg = img_norm_cfg
+        self.size = size
+        self.size_divisor = size_divisor
+        self.pad_val = pad_val
+
+    def get_scale_factor(self, results):
+        if 'scale' not in results:
+            if 'scale_factor' in results:
+                img_shape = results['img'].shape[:2]
+                scale_factor = results['scale_factor']
+                assert isinstance(scale_factor, float)
+                results['scale'] = tuple(
+                    [int(x * scale_factor) for x in img_shape][::-1])
+            else:
+                self.resize._random_scale(results)
+        else:
+            assert 'scale_factor' not in results, (
+                "scale and scale_factor cannot be both set.")
+
+        h, w = results['img'].shape[:2]
+        if self.resize.keep_ratio:
+            new_w, new_h = mmcv.rescale_size((w, h), results['scale'])
+        else:
+            new_w, new_h = results['scale']
+        w_scale, h_scale = new_w / w, new_h / h
+        results['scale_factor'] = np.array(
+            [w_scale, h_scale, w_scale, h_scale], dtype=np.float32)
+        results['keep_ratio'] = self.resize.keep_ratio
+        return new_w, new_h
+
+    def get_matrices(self, results):
+        """Matrices of the boxes and the image, the image one is used on the
+        pixel indices as cv2.resize and mmcv.imflip do."""
+        new_w, new_h = self.get_scale_factor(results)
+        w_scale, h_scale = results['scale_factor'][:2]
+        bbox_matrix = np.diag([w_scale, h_scale, 1.])
+        img_matrix = np.array([[w_scale, 0, 0.5 * w_scale - 0.5],
+                               [0, h_scale, 0.5 * h_scale - 0.5],
+                               [0, 0, 1.]])
+
+        self.flip.get_random_flip(results)
+        results['img_shape'] = (new_h, new_w) + results['img'].shape[2:]
+        results['rotate_after_flip'] = self.rotate.rotate_after_flip
+        if 'angle' not in results:
+            results['angle'] = self.rotate.get_random_angle(results)
+        if results['angle'] == 0:
+            results['matrix'] = np.eye(3)
+            w, h = new_w, new_h
+        else:
+            matrix, w, h = self.rotate.get_matrix_and_size(results)
+            results['matrix'] = matrix
+        rotate_matrix = np.eye(3)
+        rotate_matrix[:2] = results['matrix'][:2]
+
+        def flip_matrix(offset):
+            flip_w, flip_h = (new_w, new_h) \
+                    if self.rotate.rotate_after_flip else (w, h)
+            matrix = np.eye(3)
+            if results['h_flip']:
+                matrix[0] = [-1, 0, flip_w - offset]
+            if results['v_flip']:
+                matrix[1] = [0, -1, flip_h - offset]
+            return matrix
+
+        if self.rotate.rotate_after_flip:
+            bbox_matrix = rotate_matrix @ flip_matrix(0) @ bbox_matrix
+            img_matrix = rotate_matrix @ flip_matrix(1) @ img_matrix
+        else:
+            bbox_matrix = flip_matrix(0) @ rotate_matrix @ bbox_matrix
+            img_matrix = flip_matrix(1) @ rotate_matrix @ img_matrix
+        return bbox_matrix, img_matrix, w, h
+
+    def get_pad_size(self, w, h):
+        if self.size is not None:
+            return max(self.size[1], w), max(self.size[0], h)
+        elif self.size_divisor is not None:
+            divisor = self.size_divisor
+            return (int(np.ceil(w / divisor)) * divisor,
+                    int(np.ceil(h / divisor)) * divisor)
+        return w, h
+
+    def warp_img(self, results, img_matrix, w, h, pad_w, pad_h):
+        border_value = self.pad_val
+        if self.img_norm_cfg is not None:
+            # the border is normalized to about zero like the old padding
+            mean = self.img_norm_cfg['mean']
+            border_value = tuple(
+                (mean[::-1] if self.img_norm_cfg['to_rgb'] else mean).tolist())
+
+        img = cv2.warpAffine(results['img'], img_matrix[:2], (pad_w, pad_h),
+                             borderValue=border_value)
+        if self.img_norm_cfg is not None:
+            img = mmcv.imnormalize(img, self.img_norm_cfg['mean'],
+                                   self.img_norm_cfg['std'],
+                                   self.img_norm_cfg['to_rgb'])
+            img[h:] = self.pad_val
+            img[:, w:] = self.pad_val
+            results['img_norm_cfg'] = self.img_norm_cfg
+        results['img'] = img
+        results['img_shape'] = (h, w) + img.shape[2:]
+        results['pad_shape'] = img.shape
+        results['pad_fixed_size'] = self.size
+        results['pad_size_divisor'] = self.size_divisor
+
+        for k in results.get('img_fields', []):
+            if k != 'img':
+                results[k] = cv2.warpAffine(
+                    results[k], img_matrix[:2], (pad_w, pad_h))
+        for k in results.get('seg_fields', []):
+            results[k] = cv2.warpAffine(
+                results[k], img_matrix[:2], (pad_w, pad_h),
+                flags=cv2.INTER_NEAREST)
+
+    def warp_bboxes(self, results, bbox_matrix, w, h, pad_w, pad_h):
+        rotated = results['angle'] != 0
+        filt = rotated and self.rotate.keep_shape
+        img_bound = np.array([[0, 0, w, 0, w, h, 0, h]])
+        if_inwindow = None
+
+        for k in results.get('mask_fields', []):
+            mask_type = _mask_type(results[k])
+            polys = bt.warp(mask2poly(results[k]), bbox_matrix)
+            if filt:
+                iofs = bt.bbox_overlaps(polys, img_bound, mode='iof')
+                keep = iofs[:, 0] > self.rotate.keep_iof_thr
+                polys = polys[keep]
+                if k == 'gt_masks':
+                    if_inwindow = keep
+            if k == 'gt_masks' and rotated and 'gt_bboxes' in results:
+                results['gt_bboxes'] = bt.bbox2type(polys, 'hbb')
+            results[k] = poly2mask(polys, pad_w, pad_h, mask_type)
+
+        for k in results.get('bbox_fields', []):
+            if k == 'gt_bboxes' and rotated and 'gt_masks' in results:
+                continue
+            bboxes = bt.warp(results[k], bbox_matrix, keep_type=True)
+            if filt:
+                iofs = bt.bbox_overlaps(bboxes, img_bound, mode='iof')
+                keep = iofs[:, 0] > self.rotate.keep_iof_thr
+                bboxes = bboxes[keep]
+                if k == 'gt_bboxes' and if_inwindow is None:
+                    if_inwindow = keep
+            elif not rotated:
+                bboxes[:, 0::2] = np.clip(bboxes[:, 0::2], 0, w)
+                bboxes[:, 1::2] = np.clip(bboxes[:, 1::2], 0, h)
+            results[k] = bboxes
+
+        if if_inwindow is not None:
+            if 'gt_labels' in results:
+                results['gt_labels'] = results['gt_labels'][if_inwindow]
+            for k in results.get('aligned_fields', []):
+                results[k] = results[k][if_inwindow]
+
+    def __call__(self, results):
+        bbox_matrix, img_matrix, w, h = self.get_matrices(results)
+        pad_w, pad_h = self.get_pad_size(w, h)
+        self.warp_img(results, img_matrix, w, h, pad_w, pad_h)
+        self.warp_bboxes(results, bbox_matrix, w, h, pad_w, pad_h)
+        return results
+
+    def __repr__(self):
+        repr_str = self.__class__.__name__
+        repr_str += f'(resize={self.resize}, '
+        repr_str += f'h_flip_ratio={self.flip.h_flip_ratio}, '
+        repr_str += f'v_flip_ratio={self.flip.v_flip_ratio}, '
+        repr_str += f'angles={self.rotate.angles}, '
+        repr_str += f'img_norm_cfg={self.img_norm_cfg}, '
+        repr_str += f'size={self.size}, size_divisor={self.size_divisor})'
+        return repr_str
+
+
 @PIPELINES.register_module()
 class MultiScaleFlipRotateAug(object):
 
@@ -4,7 +4,7 @@ import torch.nn.functional as F
 from mmdet.core import obb2hbb
 from mmcv.cnn import normal_init
 
-from mmdet.ops import arb_batched_nms
+from mmdet.ops import arb_batched_nms, multi_img_arb_batched_nms
 from mmdet.models.builder import HEADS
 from .obb_anchor_head import OBBAnchorHead
 from ..rpn_test_mixin import RPNTestMixin
@@ -77,6 +77,145 @@ class OBBRPNHead(RPNTestMixin, OBBAnchorHead):
         return dict(
             loss_rpn_cls=losses['loss_cls'], loss_rpn_bbox=losses['loss_bbox'])
 
+    def get_bboxes(self,
+                   cls_scores,
+                   bbox_preds,
+                   img_metas,
+                   cfg=None,
+                   rescale=False):
+        """Transform network outputs of a batch into proposals.
+
+        The proposals of all images are nms-ed in one call, grouped by the
+        image and the level they come from.
+
+        Returns:
+            list[Tensor]: Proposals of each image.
+        """
+        assert len(cls_scores) == len(bbox_preds)
+        cfg = self.test_cfg if cfg is None else cfg
+        num_levels = len(cls_scores)
+
+        device = cls_scores[0].device
+        featmap_sizes = [cls_scores[i].shape[-2:] for i in range(num_levels)]
+        mlvl_anchors = self.anchor_generator.grid_anchors(
+            featmap_sizes, device=device)
+
+        img_shapes = [img_meta['img_shape'] for img_meta in img_metas]
+        proposals, hproposals, scores, ids, img_inds = self._get_proposals(
+            [cls_score.detach() for cls_score in cls_scores],
+            [bbox_pred.detach() for bbox_pred in bbox_preds],
+            mlvl_anchors, img_shapes, cfg)
+
+        # TODO: remove the hard coded nms type
+        nms_cfg = dict(type='nms', iou_thr=cfg.nms_thr)
+        nms_results = multi_img_arb_batched_nms(
+            hproposals, scores, img_inds, ids, nms_cfg, len(img_metas))
+
+        dets = torch.cat([proposals, scores[:, None]], dim=1)
+        return [dets[keep][:cfg.nms_post] for _, keep in nms_results]
+
+    def _get_proposals(self,
+                       cls_scores,
+                       bbox_preds,
+                       mlvl_anchors,
+                       img_shapes,
+                       cfg):
+        """Decode the top scored anchors of a batch.
+
+        The top scored anchors of every level are selected for all images
+        with one topk into tensors preallocated from nms_pre, and only the
+        selected anchors are decoded, in one call when the images share the
+        same shape.
+
+        Args:
+            cls_scores (list[Tensor]): Box scores for each scale level
+                with shape (N, num_anchors * num_classes, H, W).
+            bbox_preds (list[Tensor]): Box energies / deltas for each scale
+                level with shape (N, num_anchors * reg_dim, H, W).
+            mlvl_anchors (list[Tensor]): Box reference for each scale level
+                with shape (num_total_anchors, 4).
+            img_shapes (list[tuple[int]]): Shape of each input image.
+            cfg (mmcv.Config): Test / postprocessing configuration.
+
+        Returns:
+            tuple[Tensor]: proposals, their horizontal bboxes for nms,
+                scores, level ids and image ids of all images before nms.
+        """
+        num_imgs = cls_scores[0].size(0)
+        level_sizes = [anchors.size(0) for anchors in mlvl_anchors]
+        if cfg.nms_pre > 0:
+            level_sizes = [min(size, cfg.nms_pre) for size in level_sizes]
+        num_proposals = sum(level_sizes)
+
+        scores = cls_scores[0].new_empty(num_imgs, num_proposals)
+        deltas = bbox_preds[0].new_empty(
+            num_imgs, num_proposals, self.reg_dim)
+        anchors = mlvl_anchors[0].new_empty(
+            num_imgs, num_proposals, mlvl_anchors[0].size(-1))
+        # bboxes from different level should be independent during NMS,
+        # level_ids are used as labels for batched NMS to separate them
+        level_ids = scores.new_empty(num_proposals, dtype=torch.long)
+
+        start = 0
+        for idx, size in enumerate(level_sizes):
+            rpn_cls_score = cls_scores[idx]
+            rpn_bbox_pred = bbox_preds[idx]
+            assert rpn_cls_score.size()[-2:] == rpn_bbox_pred.size()[-2:]
+            rpn_cls_score = rpn_cls_score.permute(0, 2, 3, 1)
+            if self.use_sigmoid_cls:
+                rpn_cls_score = rpn_cls_score.reshape(num_imgs, -1)
+                lvl_scores = rpn_cls_score.sigmoid()
+            else:
+                rpn_cls_score = rpn_cls_score.reshape(num_imgs, -1, 2)
+                # we set FG labels to [0, num_class-1] and BG label to
+                # num_class in other heads since mmdet v2.0, However we
+                # keep BG label as 0 and FG label as 1 in rpn head
+                lvl_scores = rpn_cls_score.softmax(dim=-1)[..., 1]
+            rpn_bbox_pred = rpn_bbox_pred.permute(0, 2, 3, 1).reshape(
+                num_imgs, -1, self.reg_dim)
+
+            end = start + size
+            if size < lvl_scores.size(1):
+                lvl_scores, topk_inds = lvl_scores.topk(size, dim=1)
+                rpn_bbox_pred = rpn_bbox_pred.gather(
+                    1, topk_inds[..., None].expand(-1, -1, self.reg_dim))
+                scores[:, start:end] = lvl_scores
+                deltas[:, start:end] = rpn_bbox_pred
+                anchors[:, start:end] = mlvl_anchors[idx][topk_inds]
+            else:
+                scores[:, start:end] = lvl_scores
+                deltas[:, start:end] = rpn_bbox_pred
+                anchors[:, start:end] = mlvl_anchors[idx]
+            level_ids[start:end] = idx
+            start = end
+
+        if all(img_shape == img_shapes[0] for img_shape in img_shapes):
+            proposals = self.bbox_coder.decode(
+                anchors.view(-1, anchors.size(-1)),
+                deltas.view(-1, self.reg_dim),
+                max_shape=img_shapes[0])
+        else:
+            proposals = torch.cat([
+                self.bbox_coder.decode(_anchors, _deltas, max_shape=img_shape)
+                for _anchors, _deltas, img_shape in zip(
+                    anchors, deltas, img_shapes)
+            ])
+        scores = scores.view(-1)
+        ids = level_ids.repeat(num_imgs)
+        img_inds = torch.arange(
+            num_imgs, device=scores.device).repeat_interleave(num_proposals)
+
+        if cfg.min_bbox_size > 0:
+            w, h = proposals[:, 2], proposals[:, 3]
+            valid_mask = (w >= cfg.min_bbox_size) & (h >= cfg.min_bbox_size)
+            if not valid_mask.all():
+                proposals = proposals[valid_mask]
+                scores = scores[valid_mask]
+                ids = ids[valid_mask]
+                img_inds = img_inds[valid_mask]
+
+        return proposals, obb2hbb(proposals), scores, ids, img_inds
+
     def _get_bboxes_single(self,
                            cls_scores,
                            bbox_preds,
@@ -108,62 +247,12 @@ class OBBRPNHead(RPNTestMixin, OBBAnchorHead):
                 5-th column is a score between 0 and 1.
         """
         cfg = self.test_cfg if cfg is None else cfg
-        # bboxes from different level should be independent during NMS,
-        # level_ids are used as labels for batched NMS to separate them
-        level_ids = []
-        mlvl_scores = []
-        mlvl_bbox_preds = []
-        mlvl_valid_anchors = []
-        for idx in range(len(cls_scores)):
-            rpn_cls_score = cls_scores[idx]
-            rpn_bbox_pred = bbox_preds[idx]
-            assert rpn_cls_score.size()[-2:] == rpn_bbox_pred.size()[-2:]
-            rpn_cls_score = rpn_cls_score.permute(1, 2, 0)
-            if self.use_sigmoid_cls:
-                rpn_cls_score = rpn_cls_score.reshape(-1)
-                scores = rpn_cls_score.sigmoid()
-            else:
-                rpn_cls_score = rpn_cls_score.reshape(-1, 2)
-                # we set FG labels to [0, num_class-1] and BG label to
-                # num_class in other heads since mmdet v2.0, However we
-                # keep BG label as 0 and FG label as 1 in rpn head
-                scores = rpn_cls_score.softmax(dim=1)[:, 1]
-            rpn_bbox_pred = rpn_bbox_pred.permute(1, 2, 0).reshape(-1, self.reg_dim)
-            anchors = mlvl_anchors[idx]
-            if cfg.nms_pre > 0 and scores.shape[0] > cfg.nms_pre:
-                # sort is faster than topk
-                # _, topk_inds = scores.topk(cfg.nms_pre)
-                ranked_scores, rank_inds = scores.sort(descending=True)
-                topk_inds = rank_inds[:cfg.nms_pre]
-                scores = ranked_scores[:cfg.nms_pre]
-                rpn_bbox_pred = rpn_bbox_pred[topk_inds, :]
-                anchors = anchors[topk_inds, :]
-            mlvl_scores.append(scores)
-            mlvl_bbox_preds.append(rpn_bbox_pred)
-            mlvl_valid_anchors.append(anchors)
-            level_ids.append(
-                scores.new_full((scores.size(0), ), idx, dtype=torch.long))
-
-        scores = torch.cat(mlvl_scores)
-        anchors = torch.cat(mlvl_valid_anchors)
-        rpn_bbox_pred = torch.cat(mlvl_bbox_preds)
-        proposals = self.bbox_coder.decode(
-            anchors, rpn_bbox_pred, max_shape=img_shape)
-        ids = torch.cat(level_ids)
-
-        if cfg.min_bbox_size > 0:
-            w, h = proposals[:, 2], proposals[:, 3]
-            valid_inds = torch.nonzero(
-                (w >= cfg.min_bbox_size)
-                & (h >= cfg.min_bbox_size),
-                as_tuple=False).squeeze()
-            if valid_inds.sum().item() != len(proposals):
-                proposals = proposals[valid_inds, :]
-                scores = scores[valid_inds]
-                ids = ids[valid_inds]
+        proposals, hproposals, scores, ids, _ = self._get_proposals(
+            [cls_score[None] for cls_score in cls_scores],
+            [bbox_pred[None] for bbox_pred in bbox_preds],
+            mlvl_anchors, [img_shape], cfg)
 
         # TODO: remove the hard coded nms type
-        hproposals = obb2hbb(proposals)
         nms_cfg = dict(type='nms', iou_thr=cfg.nms_thr)
         _, keep = arb_batched_nms(hproposals, scores, ids, nms_cfg)
 
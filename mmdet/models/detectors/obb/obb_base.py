@@ -8,6 +8,41 @@ from ..base import BaseDetector
 
 class OBBBaseDetector(BaseDetector):
 
+    def forward_test(self, imgs, img_metas, **kwargs):
+        """
+        Args:
+            imgs (List[Tensor]): the outer list indicates test-time
+                augmentations and inner Tensor should have a shape NxCxHxW,
+                which contains all images in the batch.
+            img_metas (List[List[dict]]): the outer list indicates test-time
+                augs (multiscale, flip, etc.) and the inner list indicates
+                images in a batch.
+
+        Returns:
+            The result of the image when there is one image in the batch,
+            otherwise a list of results in the order of the images.
+        """
+        for var, name in [(imgs, 'imgs'), (img_metas, 'img_metas')]:
+            if not isinstance(var, list):
+                raise TypeError(f'{name} must be a list, but got {type(var)}')
+
+        num_augs = len(imgs)
+        if num_augs != len(img_metas):
+            raise ValueError(f'num of augmentations ({len(imgs)}) '
+                             f'!= num of image meta ({len(img_metas)})')
+        samples_per_gpu = imgs[0].size(0)
+
+        if num_augs == 1:
+            if 'proposals' in kwargs:
+                kwargs['proposals'] = kwargs['proposals'][0]
+            results = self.simple_test(imgs[0], img_metas[0], **kwargs)
+            return results[0] if samples_per_gpu == 1 else results
+        else:
+            # TODO: support test augmentation for predefined proposals
+            assert 'proposals' not in kwargs
+            assert samples_per_gpu == 1
+            return self.aug_test(imgs, img_metas, **kwargs)
+
     def show_result(self,
                     img,
                     result,
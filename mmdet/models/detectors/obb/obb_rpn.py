@@ -111,7 +111,7 @@ class OBBRPN(OBBBaseDetector, RotateAugRPNTestMixin):
                 Defaults to False.
 
         Returns:
-            np.ndarray: proposals
+            list[np.ndarray]: proposals of every image.
         """
         x = self.extract_feat(img)
         proposal_list = self.rpn_head.simple_test_rpn(x, img_metas)
@@ -124,8 +124,7 @@ class OBBRPN(OBBBaseDetector, RotateAugRPNTestMixin):
                 else:
                     proposals[:, :4] /= scale_factor
 
-        # TODO: remove this restriction
-        return proposal_list[0].cpu().numpy()
+        return [proposals.cpu().numpy() for proposals in proposal_list]
 
     def aug_test(self, imgs, img_metas, rescale=False):
         """Test function with test time augmentation
@@ -106,7 +106,7 @@ class OBBSingleStageDetector(OBBBaseDetector):
                 Defaults to False.
 
         Returns:
-            np.ndarray: proposals
+            list[list[np.ndarray]]: detection results of every image.
         """
         x = self.extract_feat(img)
         outs = self.bbox_head(x)
@@ -117,7 +117,7 @@ class OBBSingleStageDetector(OBBBaseDetector):
             arb2result(det_bboxes, det_labels, self.bbox_head.num_classes, bbox_type)
             for det_bboxes, det_labels in bbox_list
         ]
-        return bbox_results[0]
+        return bbox_results
 
     def aug_test(self, imgs, img_metas, rescale=False):
         """Test function with test time augmentation"""
@@ -16,6 +16,12 @@ class OBBConvFCBBoxHeadRefine(OBBoxHead):
                                     /-> cls convs -> cls fcs -> cls
         shared convs -> shared fcs
                                     \-> reg convs -> reg fcs -> reg
+
+    The classification branch runs on the features re-extracted from the
+    regressed boxes. ``roi_chunk_size`` limits the number of RoIs in one
+    re-extraction to bound the peak memory with many proposals, and
+    ``reuse_roi_feats`` classifies on the first-stage RoI features instead,
+    which skips the re-extraction at the cost of accuracy.
     """  # noqa: W605
 
     def __init__(self,
@@ -29,6 +35,8 @@ class OBBConvFCBBoxHeadRefine(OBBoxHead):
                  fc_out_channels=1024,
                  conv_cfg=None,
                  norm_cfg=None,
+                 roi_chunk_size=None,
+                 reuse_roi_feats=False,
                  *args,
                  **kwargs):
         super(OBBConvFCBBoxHeadRefine, self).__init__(*args, **kwargs)
@@ -50,6 +58,8 @@ class OBBConvFCBBoxHeadRefine(OBBoxHead):
         self.fc_out_channels = fc_out_channels
         self.conv_cfg = conv_cfg
         self.norm_cfg = norm_cfg
+        self.roi_chunk_size = roi_chunk_size
+        self.reuse_roi_feats = reuse_roi_feats
 
         # add shared convs and fcs
         self.shared_convs, self.shared_fcs, last_layer_dim = \
@@ -188,16 +198,24 @@ class OBBConvFCBBoxHeadRefine(OBBoxHead):
         # our implementation
         # 1. regression bboxes
         bbox_pred = self.fc_reg(x) if self.with_reg else None
+        if not self.with_cls:
+            return None, bbox_pred
+        if self.reuse_roi_feats:
+            return self.fc_cls(x), bbox_pred
+
         # 2. bbox roi refine
         bbox = self.bbox_coder.decode(rois[:, 1:], bbox_pred.detach())
-        roisx = torch.empty(rois.size(0), 6).to(bbox.device)
-        roisx[:, 0] = rois[:, 0]
-        roisx[:, 1:] = bbox
-        x = self.roiobb(feats, roisx)
+        roisx = torch.cat([rois[:, :1], bbox], dim=1)
         # 3. classification branch
-        cls_score = self.fc_cls(x) if self.with_cls else None
-
-
+        chunk_size = self.roi_chunk_size
+        if chunk_size is None or roisx.size(0) <= chunk_size:
+            cls_score = self.fc_cls(self.roiobb(feats, roisx))
+        else:
+            # only the refined features of one chunk are alive at a time
+            cls_score = torch.cat([
+                self.fc_cls(self.roiobb(feats, _roisx))
+                for _roisx in roisx.split(chunk_size, dim=0)
+            ])
         return cls_score, bbox_pred
 
 
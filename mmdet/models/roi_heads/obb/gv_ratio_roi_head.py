@@ -4,7 +4,7 @@ import numpy as np
 
 from .obb_standard_roi_head import OBBStandardRoIHead
 from mmdet.core import (arb2roi, arb2result, arb_mapping, merge_rotate_aug_arb,
-                        multiclass_arb_nms)
+                        multiclass_arb_nms, multi_img_multiclass_arb_nms)
 from mmdet.models.builder import HEADS
 
 
@@ -30,6 +30,9 @@ class GVRatioRoIHead(OBBStandardRoIHead):
             bbox_feats = self.shared_head(bbox_feats)
         outputs = self.bbox_head(bbox_feats)
         cls_score, bbox_pred, fix_pred, ratio_pred = outputs
+        self._record(inputs=x, rois=rois, bbox_feats=bbox_feats,
+                     cls_score=cls_score, bbox_pred=bbox_pred,
+                     fix_pred=fix_pred, ratio_pred=ratio_pred)
         bbox_results = dict(
             cls_score=cls_score, bbox_pred=bbox_pred,
             fix_pred=fix_pred, ratio_pred=ratio_pred,
@@ -61,22 +64,35 @@ class GVRatioRoIHead(OBBStandardRoIHead):
                     rescale=False):
         rois = arb2roi(proposal_list, bbox_type=self.bbox_head.start_bbox_type)
         bbox_results = self._bbox_forward(x, rois)
-        img_shape = img_metas[0]['img_shape']
-        scale_factor = img_metas[0]['scale_factor']
-        det_bboxes, det_labels = self.bbox_head.get_bboxes(
-            rois,
-            bbox_results['cls_score'],
-            bbox_results['bbox_pred'],
-            bbox_results['fix_pred'],
-            bbox_results['ratio_pred'],
-            img_shape,
-            scale_factor,
-            rescale=rescale,
-            cfg=self.test_cfg)
 
-        bbox_results = arb2result(det_bboxes, det_labels, self.bbox_head.num_classes,
-                                  bbox_type=self.bbox_head.end_bbox_type)
-        return bbox_results
+        num_proposals_per_img = tuple(len(p) for p in proposal_list)
+        rois = rois.split(num_proposals_per_img, 0)
+        preds = [bbox_results[k].split(num_proposals_per_img, 0) for k in
+                 ['cls_score', 'bbox_pred', 'fix_pred', 'ratio_pred']]
+
+        bboxes, scores, img_inds = [], [], []
+        for i, img_meta in enumerate(img_metas):
+            bbox, score = self.bbox_head.get_bboxes(
+                rois[i],
+                *[pred[i] for pred in preds],
+                img_meta['img_shape'],
+                img_meta['scale_factor'],
+                rescale=rescale,
+                cfg=None)
+            bboxes.append(bbox)
+            scores.append(score)
+            img_inds.append(score.new_full((score.size(0), ), i,
+                                           dtype=torch.long))
+
+        det_results = multi_img_multiclass_arb_nms(
+            torch.cat(bboxes), torch.cat(scores), torch.cat(img_inds),
+            len(img_metas), self.test_cfg.score_thr, self.test_cfg.nms,
+            self.test_cfg.max_per_img, bbox_type=self.bbox_head.end_bbox_type)
+        return [
+            arb2result(det_bboxes, det_labels, self.bbox_head.num_classes,
+                       bbox_type=self.bbox_head.end_bbox_type)
+            for det_bboxes, det_labels in det_results
+        ]
 
     def aug_test(self, feats, proposal_list, img_metas, rescale=False):
         aug_bboxes = []
@@ -1,13 +1,26 @@
 from abc import ABCMeta, abstractmethod
+from contextlib import contextmanager
 
+import torch
 import torch.nn as nn
 
 from mmdet.models.builder import build_shared_head
 
 
+def _detach(tensors):
+    if isinstance(tensors, torch.Tensor):
+        return tensors.detach()
+    if isinstance(tensors, (list, tuple)):
+        return [_detach(t) for t in tensors]
+    return tensors
+
+
 class OBBBaseRoIHead(nn.Module, metaclass=ABCMeta):
     """Base class for RoIHeads"""
 
+    # (names, captured) of the active capture context
+    _capture = None
+
     def __init__(self,
                  bbox_roi_extractor=None,
                  bbox_head=None,
@@ -35,6 +48,43 @@ class OBBBaseRoIHead(nn.Module, metaclass=ABCMeta):
         """bool: whether the RoI head contains a `shared_head`"""
         return hasattr(self, 'shared_head') and self.shared_head is not None
 
+    @contextmanager
+    def capture(self, *names):
+        """Record intermediate tensors of the RoI head, e.g. to visualize
+        the RoI features.
+
+        Tensors recorded by the forwards inside the context are detached and
+        appended to the lists of the yielded dict, nothing is kept after
+        the dict is released.
+
+        Args:
+            names (str): names to record, e.g. ``'inputs'``, ``'rois'``,
+                ``'bbox_feats'``, ``'cls_score'`` and ``'bbox_pred'``. All
+                tensors are recorded if no name is given.
+
+        Example:
+            >>> with model.roi_head.capture('rois', 'bbox_feats') as captured:
+            >>>     result = model(return_loss=False, rescale=True, **data)
+            >>> rois = captured['rois'][0]
+        """
+        captured = dict()
+        old_capture = self._capture
+        self._capture = (set(names), captured)
+        try:
+            yield captured
+        finally:
+            self._capture = old_capture
+
+    def _record(self, **tensors):
+        """Record tensors for the active capture context."""
+        if self._capture is None:
+            return
+        names, captured = self._capture
+        for name, tensor in tensors.items():
+            if names and name not in names:
+                continue
+            captured.setdefault(name, []).append(_detach(tensor))
+
     @abstractmethod
     def init_weights(self, pretrained):
         """Initialize the weights in head
@@ -126,11 +126,11 @@ class OBBStandardRoIHead(OBBBaseRoIHead, OBBoxTestMixin):
         # TODO: a more flexible way to decide which feature maps to use
         bbox_feats = self.bbox_roi_extractor(
             x[:self.bbox_roi_extractor.num_inputs], rois)
-        global cls_score, bbox_pred, boxfeat, boxroi, inputs
-        boxroi, inputs, boxfeat = rois, x, bbox_feats
         if self.with_shared_head:
             bbox_feats = self.shared_head(bbox_feats)
         cls_score, bbox_pred = self.bbox_head(bbox_feats)
+        self._record(inputs=x, rois=rois, bbox_feats=bbox_feats,
+                     cls_score=cls_score, bbox_pred=bbox_pred)
         bbox_results = dict(
             cls_score=cls_score, bbox_pred=bbox_pred, bbox_feats=bbox_feats)
         return bbox_results
@@ -178,9 +178,11 @@ class OBBStandardRoIHead(OBBBaseRoIHead, OBBoxTestMixin):
 
         det_bboxes, det_labels = self.simple_test_bboxes(
             x, img_metas, proposal_list, self.test_cfg, rescale=rescale)
-        bbox_results = arb2result(det_bboxes, det_labels, self.bbox_head.num_classes,
-                                  bbox_type=self.bbox_head.end_bbox_type)
-
+        bbox_results = [
+            arb2result(det_bboxes[i], det_labels[i], self.bbox_head.num_classes,
+                       bbox_type=self.bbox_head.end_bbox_type)
+            for i in range(len(det_bboxes))
+        ]
         return bbox_results
 
     def aug_test(self, x, proposal_list, img_metas, rescale=False):
@@ -5,7 +5,8 @@ import numpy as np
 import torch
 
 from mmdet.core import (arb2roi, arb_mapping, merge_rotate_aug_arb,
-                        get_bbox_type, multiclass_arb_nms)
+                        get_bbox_type, multiclass_arb_nms,
+                        multi_img_multiclass_arb_nms)
 
 logger = logging.getLogger(__name__)
 
@@ -56,20 +57,44 @@ class OBBoxTestMixin(object):
                            proposals,
                            rcnn_test_cfg,
                            rescale=False):
-        """Test only det bboxes without augmentation."""
+        """Test only det bboxes without augmentation.
+
+        The RoIs of all images are forwarded together, split back to decode
+        them with the meta of every image, then nms-ed together.
+
+        Returns:
+            tuple[list[Tensor], list[Tensor]]: det bboxes and det labels of
+                every image.
+        """
         rois = arb2roi(proposals, bbox_type=self.bbox_head.start_bbox_type)
         bbox_results = self._bbox_forward(x, rois)
-        img_shape = img_metas[0]['img_shape']
-        scale_factor = img_metas[0]['scale_factor']
-        det_bboxes, det_labels = self.bbox_head.get_bboxes(
-            rois,
-            bbox_results['cls_score'],
-            bbox_results['bbox_pred'],
-            img_shape,
-            scale_factor,
-            rescale=rescale,
-            cfg=rcnn_test_cfg)
-        return det_bboxes, det_labels
+
+        num_proposals_per_img = tuple(len(p) for p in proposals)
+        rois = rois.split(num_proposals_per_img, 0)
+        cls_scores = bbox_results['cls_score'].split(num_proposals_per_img, 0)
+        bbox_preds = bbox_results['bbox_pred'].split(num_proposals_per_img, 0)
+
+        bboxes, scores, img_inds = [], [], []
+        for i, img_meta in enumerate(img_metas):
+            bbox, score = self.bbox_head.get_bboxes(
+                rois[i],
+                cls_scores[i],
+                bbox_preds[i],
+                img_meta['img_shape'],
+                img_meta['scale_factor'],
+                rescale=rescale,
+                cfg=None)
+            bboxes.append(bbox)
+            scores.append(score)
+            img_inds.append(score.new_full((score.size(0), ), i,
+                                           dtype=torch.long))
+
+        det_results = multi_img_multiclass_arb_nms(
+            torch.cat(bboxes), torch.cat(scores), torch.cat(img_inds),
+            len(img_metas), rcnn_test_cfg.score_thr, rcnn_test_cfg.nms,
+            rcnn_test_cfg.max_per_img, bbox_type=self.bbox_head.end_bbox_type)
+        det_bboxes, det_labels = zip(*det_results)
+        return list(det_bboxes), list(det_labels)
 
     def aug_test_bboxes(self, feats, img_metas, proposal_list, rcnn_test_cfg):
         """Test det bboxes with test time augmentation."""
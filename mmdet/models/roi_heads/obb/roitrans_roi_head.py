@@ -4,7 +4,7 @@ import numpy as np
 
 from mmdet.core import (hbb_mapping, build_assigner,
                         build_sampler, merge_rotate_aug_arb,
-                        multiclass_arb_nms)
+                        multiclass_arb_nms, multi_img_multiclass_arb_nms)
 from mmdet.core import arb2roi, arb2result
 from mmdet.core import regular_obb, get_bbox_dim
 from mmdet.models.builder import HEADS, build_head, build_roi_extractor
@@ -91,6 +91,8 @@ class RoITransRoIHead(OBBBaseRoIHead):
         bbox_head = self.bbox_head[stage]
         bbox_feats = bbox_roi_extractor(x[:bbox_roi_extractor.num_inputs], rois)
         cls_score, bbox_pred = bbox_head(bbox_feats)
+        self._record(inputs=x, rois=rois, bbox_feats=bbox_feats,
+                     cls_score=cls_score, bbox_pred=bbox_pred)
 
         bbox_results = dict(
             cls_score=cls_score, bbox_pred=bbox_pred, bbox_feats=bbox_feats)
@@ -189,9 +191,7 @@ class RoITransRoIHead(OBBBaseRoIHead):
     def simple_test(self, x, proposal_list, img_metas, rescale=False):
         """Test without augmentation."""
         assert self.with_bbox, 'Bbox head must be implemented.'
-        img_shape = img_metas[0]['img_shape']
-        ori_shape = img_metas[0]['ori_shape']
-        scale_factor = img_metas[0]['scale_factor']
+        num_proposals_per_img = tuple(len(p) for p in proposal_list)
 
         # "ms" in variable names means multi-stage
         ms_scores = []
@@ -204,25 +204,49 @@ class RoITransRoIHead(OBBBaseRoIHead):
 
             if i < self.num_stages - 1:
                 bbox_label = bbox_results['cls_score'].argmax(dim=1)
-                rois = self.bbox_head[i].regress_by_class(
-                    rois, bbox_label, bbox_results['bbox_pred'], img_metas[0])
+                rois = torch.cat([
+                    self.bbox_head[i].regress_by_class(
+                        _rois, _label, _bbox_pred, img_meta)
+                    for _rois, _label, _bbox_pred, img_meta in zip(
+                        rois.split(num_proposals_per_img, 0),
+                        bbox_label.split(num_proposals_per_img, 0),
+                        bbox_results['bbox_pred'].split(num_proposals_per_img, 0),
+                        img_metas)
+                ])
 
         score_weights = rcnn_test_cfg.score_weights
         assert len(score_weights) == len(ms_scores)
         cls_score = sum([w * s for w, s in zip(score_weights, ms_scores)]) \
                 / sum(score_weights)
 
-        det_bboxes, det_labels = self.bbox_head[-1].get_bboxes(
-            rois,
-            cls_score,
-            bbox_results['bbox_pred'],
-            img_shape,
-            scale_factor,
-            rescale=rescale,
-            cfg=rcnn_test_cfg)
-        results = arb2result(det_bboxes, det_labels, self.bbox_head[-1].num_classes,
-                             bbox_type=self.bbox_head[-1].end_bbox_type)
-        return results
+        rois = rois.split(num_proposals_per_img, 0)
+        cls_score = cls_score.split(num_proposals_per_img, 0)
+        bbox_pred = bbox_results['bbox_pred'].split(num_proposals_per_img, 0)
+        bboxes, scores, img_inds = [], [], []
+        for i, img_meta in enumerate(img_metas):
+            bbox, score = self.bbox_head[-1].get_bboxes(
+                rois[i],
+                cls_score[i],
+                bbox_pred[i],
+                img_meta['img_shape'],
+                img_meta['scale_factor'],
+                rescale=rescale,
+                cfg=None)
+            bboxes.append(bbox)
+            scores.append(score)
+            img_inds.append(score.new_full((score.size(0), ), i,
+                                           dtype=torch.long))
+
+        end_bbox_type = self.bbox_head[-1].end_bbox_type
+        det_results = multi_img_multiclass_arb_nms(
+            torch.cat(bboxes), torch.cat(scores), torch.cat(img_inds),
+            len(img_metas), rcnn_test_cfg.score_thr, rcnn_test_cfg.nms,
+            rcnn_test_cfg.max_per_img, bbox_type=end_bbox_type)
+        return [
+            arb2result(det_bboxes, det_labels, self.bbox_head[-1].num_classes,
+                       bbox_type=end_bbox_type)
+            for det_bboxes, det_labels in det_results
+        ]
 
     def aug_test(self, features, proposal_list, img_metas, rescale=False):
         rcnn_test_cfg = self.test_cfg
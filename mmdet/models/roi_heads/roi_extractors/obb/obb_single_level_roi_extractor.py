@@ -51,28 +51,59 @@ class OBBSingleRoIExtractor(OBBBaseRoIExtractor):
         target_lvls = target_lvls.clamp(min=0, max=num_levels - 1).long()
         return target_lvls
 
-    @force_fp32(apply_to=('feats', ), out_fp16=True)
-    def forward(self, feats, rois, roi_scale_factor=None):
-        """Forward function"""
-        out_size = self.roi_layers[0].out_size
+    def extract_by_levels(self, feats, rois, target_lvls):
+        """Pool every RoI on the level it is mapped to.
+
+        RoIs are sorted by levels once, every level pools a contiguous slice
+        of them, and the pooled features are put back in the input order by
+        one inverse permutation.
+        """
         num_levels = len(feats)
-        roi_feats = feats[0].new_zeros(
-            rois.size(0), self.out_channels, *out_size)
+        sorted_lvls, order = target_lvls.sort()
+        num_rois_per_lvl = torch.bincount(
+            sorted_lvls, minlength=num_levels).tolist()
 
+        lvl_feats, empty_lvls = [], []
+        for i, rois_ in enumerate(rois[order].split(num_rois_per_lvl)):
+            if rois_.size(0) > 0:
+                lvl_feats.append(self.roi_layers[i](feats[i], rois_))
+            else:
+                empty_lvls.append(i)
+
+        if lvl_feats:
+            inv_order = torch.empty_like(order)
+            inv_order[order] = torch.arange(
+                order.size(0), device=order.device)
+            roi_feats = torch.cat(lvl_feats).index_select(0, inv_order)
+        else:
+            out_size = self.roi_layers[0].out_size
+            roi_feats = feats[0].new_zeros(
+                rois.size(0), self.out_channels, *out_size)
+
+        # layers of empty levels are kept in the graph with zero weights,
+        # so that distributed training sees gradients of all parameters
+        if self.training:
+            for i in empty_lvls:
+                for param in self.roi_layers[i].parameters():
+                    roi_feats = roi_feats + param.view(-1)[0] * 0.
+        return roi_feats
+
+    def _forward(self, feats, rois, roi_scale_factor=None):
+        """Return the RoI features and the rescaled RoIs."""
+        num_levels = len(feats)
         if num_levels == 1:
             if len(rois) == 0:
-                return roi_feats
-            return self.roi_layers[0](feats[0], rois)
+                out_size = self.roi_layers[0].out_size
+                return feats[0].new_zeros(
+                    rois.size(0), self.out_channels, *out_size), rois
+            return self.roi_layers[0](feats[0], rois), rois
 
         rois = self.roi_rescale(rois, self.extend_factor)
         target_lvls = self.map_roi_levels(rois, num_levels)
         rois = self.roi_rescale(rois, roi_scale_factor)
-        for i in range(num_levels):
-            inds = target_lvls == i
-            if inds.any():
-                rois_ = rois[inds, :]
-                roi_feats_t = self.roi_layers[i](feats[i], rois_)
-                roi_feats[inds] = roi_feats_t
-            else:
-                roi_feats += sum(x.view(-1)[0] for x in self.parameters()) * 0.
-        return roi_feats
+        return self.extract_by_levels(feats, rois, target_lvls), rois
+
+    @force_fp32(apply_to=('feats', ), out_fp16=True)
+    def forward(self, feats, rois, roi_scale_factor=None):
+        """Forward function"""
+        return self._forward(feats, rois, roi_scale_factor)[0]
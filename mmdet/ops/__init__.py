@@ -22,7 +22,8 @@ from .utils import get_compiler_version, get_compiling_cuda_version
 from .wrappers import Conv2d, ConvTranspose2d, Linear, MaxPool2d
 
 from .roi_align_rotated import roi_align_rotated, RoIAlignRotated
-from .nms_rotated import obb_nms, poly_nms, BT_nms, arb_batched_nms
+from .nms_rotated import (obb_nms, poly_nms, BT_nms, arb_batched_nms,
+                          multi_img_arb_batched_nms)
 from .box_iou_rotated import obb_overlaps
 
 __all__ = [
@@ -39,7 +40,7 @@ __all__ = [
     'SAConv2d',
 
     'roi_align_rotated', 'RoIAlignRotated', 'obb_nms', 'BT_nms',
-    'arb_batched_nms', 'obb_overlaps',
+    'arb_batched_nms', 'multi_img_arb_batched_nms', 'obb_overlaps',
 
     'OBBDeformRoIPooling', 'OBBDeformRoIPoolingPack',
     'OBBModulatedDeformRoIPoolingPack'
@@ -1,21 +1,73 @@
 // Copyright (c) Facebook, Inc. and its affiliates. All Rights Reserved
 #include <torch/types.h>
+#include <cmath>
+#include <vector>
 #include "box_iou_rotated_utils.h"
 
 
+// Half width and half height of the horizontal extent of every box.
+template <typename T>
+std::vector<T> box_half_extents(const T* boxes, const int64_t num_boxes) {
+  std::vector<T> extents(num_boxes * 2);
+  for (int64_t i = 0; i < num_boxes; i++) {
+    auto box = boxes + i * 5;
+    T c = std::fabs(std::cos(box[4])), s = std::fabs(std::sin(box[4]));
+    extents[i * 2] = (box[2] * c + box[3] * s) / 2;
+    extents[i * 2 + 1] = (box[2] * s + box[3] * c) / 2;
+  }
+  return extents;
+}
+
+// Boxes whose horizontal extents do not overlap have no intersection, the
+// exact polygon intersection is only computed for the rest.
+template <typename T>
+inline T box_iou_rotated_pair(
+    const T* box1,
+    const T* box2,
+    const T* extent1,
+    const T* extent2,
+    const bool iou_or_iof) {
+  if (std::fabs(box1[0] - box2[0]) >= extent1[0] + extent2[0] ||
+      std::fabs(box1[1] - box2[1]) >= extent1[1] + extent2[1]) {
+    return 0;
+  }
+  return single_box_iou_rotated<T>(box1, box2, iou_or_iof);
+}
+
 template <typename T>
 void box_iou_rotated_cpu_kernel(
     const at::Tensor& boxes1,
     const at::Tensor& boxes2,
     const bool iou_or_iof,
+    const bool aligned,
     at::Tensor& ious) {
   auto num_boxes1 = boxes1.size(0);
   auto num_boxes2 = boxes2.size(0);
+  auto data1 = boxes1.data_ptr<T>();
+  auto data2 = boxes2.data_ptr<T>();
+  auto output = ious.data_ptr<T>();
+
+  auto extents1 = box_half_extents<T>(data1, num_boxes1);
+  auto extents2 = box_half_extents<T>(data2, num_boxes2);
+
+  if (aligned) {
+#pragma omp parallel for schedule(guided) if (num_boxes1 > 256)
+    for (int64_t i = 0; i < num_boxes1; i++) {
+      output[i] = box_iou_rotated_pair<T>(
+          data1 + i * 5, data2 + i * 5, extents1.data() + i * 2,
+          extents2.data() + i * 2, iou_or_iof);
+    }
+    return;
+  }
 
-  for (int i = 0; i < num_boxes1; i++) {
-    for (int j = 0; j < num_boxes2; j++) {
-      ious[i * num_boxes2 + j] = single_box_iou_rotated<T>(
-          boxes1[i].data_ptr<T>(), boxes2[j].data_ptr<T>(), iou_or_iof);
+#pragma omp parallel for schedule(guided) if (num_boxes1 * num_boxes2 > 4096)
+  for (int64_t i = 0; i < num_boxes1; i++) {
+    auto box1 = data1 + i * 5;
+    auto extent1 = extents1.data() + i * 2;
+    auto row = output + i * num_boxes2;
+    for (int64_t j = 0; j < num_boxes2; j++) {
+      row[j] = box_iou_rotated_pair<T>(
+          box1, data2 + j * 5, extent1, extents2.data() + j * 2, iou_or_iof);
     }
   }
 }
@@ -24,15 +76,14 @@ at::Tensor box_iou_rotated_cpu(
     // input must be contiguous:
     const at::Tensor& boxes1,
     const at::Tensor& boxes2,
-    const bool iou_or_iof) {
+    const bool iou_or_iof,
+    const bool aligned) {
   auto num_boxes1 = boxes1.size(0);
   auto num_boxes2 = boxes2.size(0);
-  at::Tensor ious =
-      at::empty({num_boxes1 * num_boxes2}, boxes1.options().dtype(at::kFloat));
-
-  box_iou_rotated_cpu_kernel<float>(boxes1, boxes2, iou_or_iof, ious);
+  auto shape = aligned ? std::vector<int64_t>{num_boxes1, 1} :
+                         std::vector<int64_t>{num_boxes1, num_boxes2};
+  at::Tensor ious = at::empty(shape, boxes1.options().dtype(at::kFloat));
 
-  // reshape from 1d array to 2d array
-  auto shape = std::vector<int64_t>{num_boxes1, num_boxes2};
-  return ious.reshape(shape);
+  box_iou_rotated_cpu_kernel<float>(boxes1, boxes2, iou_or_iof, aligned, ious);
+  return ious;
 }
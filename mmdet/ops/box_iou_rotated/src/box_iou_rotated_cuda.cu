@@ -62,11 +62,26 @@ __global__ void box_iou_rotated_cuda_kernel(
   }
 }
 
+template <typename T>
+__global__ void box_iou_rotated_aligned_cuda_kernel(
+    const int n_boxes,
+    const T* dev_boxes1,
+    const T* dev_boxes2,
+    const bool iou_or_iof,
+    T* dev_ious) {
+  for (int i = blockIdx.x * blockDim.x + threadIdx.x; i < n_boxes;
+       i += blockDim.x * gridDim.x) {
+    dev_ious[i] = single_box_iou_rotated<T>(
+        dev_boxes1 + i * 5, dev_boxes2 + i * 5, iou_or_iof);
+  }
+}
+
 at::Tensor box_iou_rotated_cuda(
     // input must be contiguous
     const at::Tensor& boxes1,
     const at::Tensor& boxes2,
-    const bool iou_or_iof) {
+    const bool iou_or_iof,
+    const bool aligned) {
   using scalar_t = float;
   AT_ASSERTM(
       boxes1.scalar_type() == at::kFloat, "boxes1 must be a float tensor");
@@ -79,6 +94,27 @@ at::Tensor box_iou_rotated_cuda(
   auto num_boxes1 = boxes1.size(0);
   auto num_boxes2 = boxes2.size(0);
 
+  if (aligned) {
+    at::Tensor ious =
+        at::empty({num_boxes1, 1}, boxes1.options().dtype(at::kFloat));
+    if (num_boxes1 > 0) {
+      const int threads = 512;
+      const int blocks = std::min(
+          at::cuda::ATenCeilDiv(static_cast<int>(num_boxes1), threads), 4096);
+      cudaStream_t stream = at::cuda::getCurrentCUDAStream();
+
+      box_iou_rotated_aligned_cuda_kernel<scalar_t>
+          <<<blocks, threads, 0, stream>>>(
+              num_boxes1,
+              boxes1.data_ptr<scalar_t>(),
+              boxes2.data_ptr<scalar_t>(),
+              iou_or_iof,
+              ious.data_ptr<scalar_t>());
+      AT_CUDA_CHECK(cudaGetLastError());
+    }
+    return ious;
+  }
+
   at::Tensor ious =
       at::empty({num_boxes1 * num_boxes2}, boxes1.options().dtype(at::kFloat));
 
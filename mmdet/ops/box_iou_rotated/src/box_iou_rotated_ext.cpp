@@ -5,26 +5,37 @@
 at::Tensor box_iou_rotated_cuda(
     const at::Tensor& boxes1,
     const at::Tensor& boxes2,
-    const bool iou_or_iof);
+    const bool iou_or_iof,
+    const bool aligned);
 #endif
 
 at::Tensor box_iou_rotated_cpu(
     const at::Tensor& boxes1,
     const at::Tensor& boxes2,
-    const bool iou_or_iof);
+    const bool iou_or_iof,
+    const bool aligned);
 
 
+// When aligned is true, boxes1 and boxes2 have the same length and only the
+// overlaps of the pairs with the same index are computed, in shape (n, 1).
 inline at::Tensor box_iou_rotated(
     const at::Tensor& boxes1,
     const at::Tensor& boxes2,
-    const bool iou_or_iof) {
+    const bool iou_or_iof,
+    const bool aligned) {
   assert(boxes1.device().is_cuda() == boxes2.device().is_cuda());
+  if (aligned) {
+    AT_ASSERTM(
+        boxes1.size(0) == boxes2.size(0),
+        "boxes1 and boxes2 must have the same length when aligned");
+  }
   if (boxes1.device().is_cuda()) {
 #ifdef WITH_CUDA
     return box_iou_rotated_cuda(
         boxes1.contiguous(),
 	boxes2.contiguous(),
-	iou_or_iof);
+	iou_or_iof,
+	aligned);
 #else
     AT_ERROR("Not compiled with GPU support");
 #endif
@@ -33,7 +44,8 @@ inline at::Tensor box_iou_rotated(
   return box_iou_rotated_cpu(
       boxes1.contiguous(),
       boxes2.contiguous(),
-      iou_or_iof);
+      iou_or_iof,
+      aligned);
 }
   
 PYBIND11_MODULE(TORCH_EXTENSION_NAME, m) {
@@ -1,3 +1,5 @@
-from .nms_rotated_wrapper import obb_nms, poly_nms, BT_nms, arb_batched_nms
+from .nms_rotated_wrapper import (obb_nms, poly_nms, BT_nms, arb_batched_nms,
+                                  multi_img_arb_batched_nms)
 
-__all__ = ['obb_nms', 'poly_nms', 'BT_nms', 'arb_batched_nms']
+__all__ = ['obb_nms', 'poly_nms', 'BT_nms', 'arb_batched_nms',
+           'multi_img_arb_batched_nms']
@@ -14,7 +14,9 @@ def obb2hbb(obboxes):
     return torch.cat([center-bias, center+bias], dim=1)
 
 
-def obb_nms(dets, iou_thr, device_id=None):
+def obb_nms(dets, iou_thr, device_id=None, labels=None):
+    """Rotated NMS, boxes with different labels never suppress each other
+    if labels is given."""
     if isinstance(dets, torch.Tensor):
         is_numpy = False
         dets_th = dets
@@ -26,6 +28,11 @@ def obb_nms(dets, iou_thr, device_id=None):
         raise TypeError('dets must be eithr a Tensor or numpy array, '
                         f'but got {type(dets)}')
 
+    if labels is None:
+        labels_th = dets_th.new_zeros(0, dtype=torch.int64)
+    else:
+        labels_th = torch.as_tensor(labels, device=dets_th.device).long()
+
     if dets_th.numel() == 0:
         inds = dets_th.new_zeros(0, dtype=torch.int64)
     else:
@@ -35,9 +42,11 @@ def obb_nms(dets, iou_thr, device_id=None):
             ori_inds = torch.arange(dets_th.size(0))
             ori_inds = ori_inds[~too_small]
             dets_th = dets_th[~too_small]
+            if labels_th.numel() > 0:
+                labels_th = labels_th[~too_small]
 
         bboxes, scores = dets_th[:, :5], dets_th[:, 5]
-        inds = nms_rotated_ext.nms_rotated(bboxes, scores, iou_thr)
+        inds = nms_rotated_ext.nms_rotated(bboxes, scores, labels_th, iou_thr)
         if too_small.any():
             inds = ori_inds[inds]
 
@@ -58,8 +67,6 @@ def poly_nms(dets, iou_thr, device_id=None):
         raise TypeError('dets must be eithr a Tensor or numpy array, '
                         f'but got {type(dets)}')
 
-    if dets_th.device == torch.device('cpu'):
-        raise NotImplementedError
     inds = nms_rotated_ext.nms_poly(dets_th.float(), iou_thr)
 
     if is_numpy:
@@ -90,6 +97,14 @@ def BT_nms(dets, iou_thr, device_id=None):
 def arb_batched_nms(bboxes, scores, inds, nms_cfg, class_agnostic=False):
     nms_cfg_ = nms_cfg.copy()
     class_agnostic = nms_cfg_.pop('class_agnostic', class_agnostic)
+    nms_type = nms_cfg_.pop('type', 'BT_nms')
+    if nms_type == 'obb_nms' and not class_agnostic:
+        # groups are separated inside the kernel, coordinates are kept as
+        # they are to avoid losing precision with large offsets.
+        dets, keep = obb_nms(
+            torch.cat([bboxes, scores[:, None]], -1), labels=inds, **nms_cfg_)
+        return dets, keep
+
     if class_agnostic:
         bboxes_for_nms = bboxes
     else:
@@ -103,7 +118,6 @@ def arb_batched_nms(bboxes, scores, inds, nms_cfg, class_agnostic=False):
         else:
             bboxes_for_nms = bboxes + offsets[:, None]
 
-    nms_type = nms_cfg_.pop('type', 'BT_nms')
     try:
         nms_op = eval(nms_type)
     except NameError:
@@ -115,3 +129,44 @@ def arb_batched_nms(bboxes, scores, inds, nms_cfg, class_agnostic=False):
     bboxes = bboxes[keep]
     scores = dets[:, -1]
     return torch.cat([bboxes, scores[:, None]], -1), keep
+
+
+def multi_img_arb_batched_nms(bboxes, scores, img_inds, inds, nms_cfg,
+                              num_imgs, class_agnostic=False):
+    """arb_batched_nms over the boxes of all images in one call.
+
+    Boxes are grouped by the key (img_inds, inds), so only boxes of the same
+    image and the same class or level can suppress each other.
+
+    Args:
+        bboxes (Tensor): boxes of all images.
+        scores (Tensor): scores of the boxes.
+        img_inds (Tensor): image index of the boxes.
+        inds (Tensor): class or level index of the boxes.
+        nms_cfg (dict): same as arb_batched_nms.
+        num_imgs (int): number of images.
+        class_agnostic (bool): if True, boxes are only grouped by images.
+
+    Returns:
+        list[tuple[Tensor, Tensor]]: dets and kept indices of every image, in
+            descending order of scores, the indices are of the inputs.
+    """
+    if bboxes.numel() == 0:
+        dets = torch.cat([bboxes, scores[:, None]], -1)
+        keep = img_inds.new_zeros((0, ), dtype=torch.long)
+        return [(dets, keep) for _ in range(num_imgs)]
+
+    nms_cfg_ = nms_cfg.copy()
+    class_agnostic = nms_cfg_.pop('class_agnostic', class_agnostic)
+    if class_agnostic:
+        groups = img_inds
+    else:
+        groups = img_inds * (inds.max() + 1) + inds
+
+    dets, keep = arb_batched_nms(bboxes, scores, groups, nms_cfg_)
+    keep_img_inds = img_inds[keep]
+    results = []
+    for i in range(num_imgs):
+        img_mask = keep_img_inds == i
+        results.append((dets[img_mask], keep[img_mask]))
+    return results
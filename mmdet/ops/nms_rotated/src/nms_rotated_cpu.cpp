@@ -2,6 +2,10 @@
 // https://github.com/facebookresearch/detectron2/tree/master/detectron2/layers/csrc/nms_rotated
 // Copyright (c) Facebook, Inc. and its affiliates. All Rights Reserved
 #include <torch/types.h>
+#include <algorithm>
+#include <cmath>
+#include <numeric>
+#include <vector>
 #include "box_iou_rotated_utils.h"
 
 
@@ -9,6 +13,7 @@ template <typename scalar_t>
 at::Tensor nms_rotated_cpu_kernel(
     const at::Tensor& dets,
     const at::Tensor& scores,
+    const at::Tensor& labels,
     const float iou_threshold) {
   // nms_rotated_cpu_kernel is modified from torchvision's nms_cpu_kernel,
   // however, the code in this function is much shorter because
@@ -19,6 +24,9 @@ at::Tensor nms_rotated_cpu_kernel(
   AT_ASSERTM(
       dets.scalar_type() == scores.scalar_type(),
       "dets should have the same type as scores");
+  AT_ASSERTM(
+      labels.numel() == 0 || labels.numel() == dets.size(0),
+      "labels should be empty or have one label for every box");
 
   if (dets.numel() == 0) {
     return at::empty({0}, dets.options().dtype(at::kLong));
@@ -33,9 +41,62 @@ at::Tensor nms_rotated_cpu_kernel(
   auto suppressed = suppressed_t.data_ptr<uint8_t>();
   auto keep = keep_t.data_ptr<int64_t>();
   auto order = order_t.data_ptr<int64_t>();
+  auto boxes = dets.data_ptr<scalar_t>();
+
+  // Boxes with different labels never suppress each other, which groups
+  // boxes of different images or classes without offsetting coordinates.
+  std::vector<int64_t> groups(ndets, 0);
+  if (labels.numel() > 0) {
+    auto labels_ptr = labels.data_ptr<int64_t>();
+    std::copy(labels_ptr, labels_ptr + ndets, groups.begin());
+  }
+
+  // Horizontal extents and circumscribed circles of the boxes are computed
+  // once. When the threshold is positive, only boxes whose extents and
+  // circles both overlap can suppress each other, so candidates are swept
+  // over boxes of the same group sorted by the left of their extents, and
+  // the exact IoU is only computed for the rest.
+  std::vector<scalar_t> half_w(ndets), half_h(ndets), radius(ndets);
+  std::vector<scalar_t> lefts(ndets);
+  std::vector<int64_t> rank(ndets), xorder(ndets);
+  scalar_t max_half_w = 0;
+  for (int64_t i = 0; i < ndets; i++) {
+    auto box = boxes + i * 5;
+    scalar_t c = std::fabs(std::cos(box[4])), s = std::fabs(std::sin(box[4]));
+    half_w[i] = (box[2] * c + box[3] * s) / 2;
+    half_h[i] = (box[2] * s + box[3] * c) / 2;
+    radius[i] = std::sqrt(box[2] * box[2] + box[3] * box[3]) / 2;
+    lefts[i] = box[0] - half_w[i];
+    max_half_w = std::max(max_half_w, half_w[i]);
+    rank[order[i]] = i;
+  }
+  std::iota(xorder.begin(), xorder.end(), 0);
+  std::sort(xorder.begin(), xorder.end(), [&](int64_t a, int64_t b) {
+    return groups[a] < groups[b] ||
+        (groups[a] == groups[b] && lefts[a] < lefts[b]);
+  });
+  // group_begin and group_end are the range of the group of every box in
+  // the sorted order.
+  std::vector<scalar_t> sorted_lefts(ndets);
+  std::vector<int64_t> group_begin(ndets), group_end(ndets);
+  for (int64_t k = 0, begin = 0; k < ndets; k++) {
+    sorted_lefts[k] = lefts[xorder[k]];
+    if (k + 1 == ndets || groups[xorder[k + 1]] != groups[xorder[k]]) {
+      for (int64_t g = begin; g <= k; g++) {
+        group_begin[xorder[g]] = begin;
+        group_end[xorder[g]] = k + 1;
+      }
+      begin = k + 1;
+    }
+  }
 
   int64_t num_to_keep = 0;
 
+  // Candidates of every kept box are gathered with the cheap rejections
+  // first, then their exact IoUs are computed in parallel, since suppression
+  // of the candidates by a kept box is independent.
+  std::vector<int64_t> candidates;
+  candidates.reserve(ndets);
   for (int64_t _i = 0; _i < ndets; _i++) {
     auto i = order[_i];
     if (suppressed[i] == 1) {
@@ -43,15 +104,46 @@ at::Tensor nms_rotated_cpu_kernel(
     }
 
     keep[num_to_keep++] = i;
+    candidates.clear();
 
-    for (int64_t _j = _i + 1; _j < ndets; _j++) {
-      auto j = order[_j];
-      if (suppressed[j] == 1) {
-        continue;
+    if (iou_threshold <= 0) {
+      for (int64_t _j = _i + 1; _j < ndets; _j++) {
+        auto j = order[_j];
+        if (suppressed[j] == 0 && groups[j] == groups[i]) {
+          candidates.push_back(j);
+        }
       }
+    } else {
+      auto right = boxes[i * 5] + half_w[i];
+      auto end = group_end[i];
+      auto start = std::lower_bound(
+          sorted_lefts.begin() + group_begin[i], sorted_lefts.begin() + end,
+          lefts[i] - 2 * max_half_w);
+      for (int64_t k = start - sorted_lefts.begin();
+           k < end && sorted_lefts[k] <= right; k++) {
+        auto j = xorder[k];
+        if (rank[j] <= _i || suppressed[j] == 1) {
+          continue;
+        }
+
+        auto dx = boxes[i * 5] - boxes[j * 5];
+        auto dy = boxes[i * 5 + 1] - boxes[j * 5 + 1];
+        auto r = radius[i] + radius[j];
+        if (dx * dx + dy * dy > r * r ||
+            std::fabs(dx) >= half_w[i] + half_w[j] ||
+            std::fabs(dy) >= half_h[i] + half_h[j]) {
+          continue;
+        }
+        candidates.push_back(j);
+      }
+    }
 
+    int64_t num_candidates = candidates.size();
+#pragma omp parallel for schedule(guided) if (num_candidates > 64)
+    for (int64_t k = 0; k < num_candidates; k++) {
+      auto j = candidates[k];
       auto ovr = single_box_iou_rotated<scalar_t>(
-          dets[i].data_ptr<scalar_t>(), dets[j].data_ptr<scalar_t>());
+          boxes + i * 5, boxes + j * 5);
       if (ovr >= iou_threshold) {
         suppressed[j] = 1;
       }
@@ -64,11 +156,13 @@ at::Tensor nms_rotated_cpu(
     // input must be contiguous
     const at::Tensor& dets,
     const at::Tensor& scores,
+    const at::Tensor& labels,
     const float iou_threshold) {
   auto result = at::empty({0}, dets.options());
 
   AT_DISPATCH_FLOATING_TYPES(dets.scalar_type(), "nms_rotated", [&] {
-    result = nms_rotated_cpu_kernel<scalar_t>(dets, scores, iou_threshold);
+    result = nms_rotated_cpu_kernel<scalar_t>(
+        dets, scores, labels, iou_threshold);
   });
   return result;
 }
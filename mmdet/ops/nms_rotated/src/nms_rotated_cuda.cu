@@ -14,6 +14,7 @@ __global__ void nms_rotated_cuda_kernel(
     const int n_boxes,
     const float iou_threshold,
     const T* dev_boxes,
+    const int64_t* dev_labels,
     unsigned long long* dev_mask) {
   // nms_rotated_cuda_kernel is modified from torchvision's nms_cuda_kernel
 
@@ -31,7 +32,12 @@ __global__ void nms_rotated_cuda_kernel(
   // (x1, y1, x2, y2), each rotated box is represented with 5 values
   // (x_center, y_center, width, height, angle_degrees) here.
   __shared__ T block_boxes[threadsPerBlock * 5];
+  __shared__ int64_t block_labels[threadsPerBlock];
   if (threadIdx.x < col_size) {
+    if (dev_labels != nullptr) {
+      block_labels[threadIdx.x] =
+          dev_labels[threadsPerBlock * col_start + threadIdx.x];
+    }
     block_boxes[threadIdx.x * 5 + 0] =
         dev_boxes[(threadsPerBlock * col_start + threadIdx.x) * 5 + 0];
     block_boxes[threadIdx.x * 5 + 1] =
@@ -48,6 +54,8 @@ __global__ void nms_rotated_cuda_kernel(
   if (threadIdx.x < row_size) {
     const int cur_box_idx = threadsPerBlock * row_start + threadIdx.x;
     const T* cur_box = dev_boxes + cur_box_idx * 5;
+    const int64_t cur_label =
+        dev_labels != nullptr ? dev_labels[cur_box_idx] : 0;
     int i = 0;
     unsigned long long t = 0;
     int start = 0;
@@ -55,6 +63,10 @@ __global__ void nms_rotated_cuda_kernel(
       start = threadIdx.x + 1;
     }
     for (i = start; i < col_size; i++) {
+      // boxes with different labels are in different groups
+      if (dev_labels != nullptr && cur_label != block_labels[i]) {
+        continue;
+      }
       // Instead of devIoU used by original horizontal nms, here
       // we use the single_box_iou_rotated function from box_iou_rotated_utils.h
       if (single_box_iou_rotated<T>(cur_box, block_boxes + i * 5) >
@@ -72,6 +84,7 @@ at::Tensor nms_rotated_cuda(
     // input must be contiguous
     const at::Tensor& dets,
     const at::Tensor& scores,
+    const at::Tensor& labels,
     float iou_threshold) {
   // using scalar_t = float;
   AT_ASSERTM(dets.is_cuda(), "dets must be a CUDA tensor");
@@ -80,6 +93,8 @@ at::Tensor nms_rotated_cuda(
 
   auto order_t = std::get<1>(scores.sort(0, /* descending=*/true));
   auto dets_sorted = dets.index_select(0, order_t);
+  auto labels_sorted = labels.numel() > 0 ?
+      labels.index_select(0, order_t) : labels;
 
   auto dets_num = dets.size(0);
 
@@ -99,6 +114,8 @@ at::Tensor nms_rotated_cuda(
             dets_num,
             iou_threshold,
             dets_sorted.data_ptr<scalar_t>(),
+            labels_sorted.numel() > 0 ?
+                labels_sorted.data_ptr<int64_t>() : nullptr,
             (unsigned long long*)mask.data_ptr<int64_t>());
       });
 
@@ -9,6 +9,7 @@
 at::Tensor nms_rotated_cuda(
     const at::Tensor& dets,
     const at::Tensor& scores,
+    const at::Tensor& labels,
     const float iou_threshold);
 
 at::Tensor poly_nms_cuda(
@@ -19,23 +20,34 @@ at::Tensor poly_nms_cuda(
 at::Tensor nms_rotated_cpu(
     const at::Tensor& dets,
     const at::Tensor& scores,
+    const at::Tensor& labels,
     const float iou_threshold);
 
+at::Tensor poly_nms_cpu(
+    const at::Tensor& dets,
+    const float threshold);
+
 
+// labels can be an empty tensor, otherwise only boxes with the same label
+// suppress each other.
 inline at::Tensor nms_rotated(
     const at::Tensor& dets,
     const at::Tensor& scores,
+    const at::Tensor& labels,
     const float iou_threshold) {
   assert(dets.device().is_cuda() == scores.device().is_cuda());
   if (dets.device().is_cuda()) {
 #ifdef WITH_CUDA
     return nms_rotated_cuda(
-        dets.contiguous(), scores.contiguous(), iou_threshold);
+        dets.contiguous(), scores.contiguous(), labels.contiguous(),
+        iou_threshold);
 #else
     AT_ERROR("Not compiled with GPU support");
 #endif
   }
-  return nms_rotated_cpu(dets.contiguous(), scores.contiguous(), iou_threshold);
+  return nms_rotated_cpu(
+      dets.contiguous(), scores.contiguous(), labels.contiguous(),
+      iou_threshold);
 }
 
 
@@ -51,7 +63,7 @@ inline at::Tensor nms_poly(
     AT_ERROR("POLY_NMS is not compiled with GPU support");
 #endif
   }
-  AT_ERROR("POLY_NMS is not implemented on CPU");
+  return poly_nms_cpu(dets.contiguous(), iou_threshold);
 }
 
 PYBIND11_MODULE(TORCH_EXTENSION_NAME, m) {
@@ -1,5 +1,204 @@
+// CPU counterpart of poly_nms_cuda.cu, the polygon clipping is the same.
 #include <torch/extension.h>
+#include <algorithm>
+#include <cmath>
+#include <vector>
+
+namespace {
+
+#define maxn 10
+const double eps = 1E-8;
+
+template <typename T>
+struct Point {
+  T x, y;
+};
+
+template <typename T>
+inline int sig(T d) {
+  return (d > eps) - (d < -eps);
+}
+
+template <typename T>
+inline bool point_eq(const Point<T>& a, const Point<T>& b) {
+  return sig(a.x - b.x) == 0 && sig(a.y - b.y) == 0;
+}
+
+template <typename T>
+inline T cross(const Point<T>& o, const Point<T>& a, const Point<T>& b) {
+  return (a.x - o.x) * (b.y - o.y) - (b.x - o.x) * (a.y - o.y);
+}
+
+template <typename T>
+inline T area(Point<T>* ps, int n) {
+  ps[n] = ps[0];
+  T res = 0;
+  for (int i = 0; i < n; i++) {
+    res += ps[i].x * ps[i + 1].y - ps[i].y * ps[i + 1].x;
+  }
+  return res / 2;
+}
+
+template <typename T>
+inline int line_cross(
+    const Point<T>& a, const Point<T>& b,
+    const Point<T>& c, const Point<T>& d, Point<T>& p) {
+  T s1 = cross(a, b, c);
+  T s2 = cross(a, b, d);
+  if (sig(s1) == 0 && sig(s2) == 0) return 2;
+  if (sig(s2 - s1) == 0) return 0;
+  p.x = (c.x * s2 - d.x * s1) / (s2 - s1);
+  p.y = (c.y * s2 - d.y * s1) / (s2 - s1);
+  return 1;
+}
+
+template <typename T>
+inline void polygon_cut(
+    Point<T>* p, int& n, const Point<T>& a, const Point<T>& b) {
+  Point<T> pp[maxn];
+  int m = 0;
+  p[n] = p[0];
+  for (int i = 0; i < n; i++) {
+    if (sig(cross(a, b, p[i])) > 0) pp[m++] = p[i];
+    if (sig(cross(a, b, p[i])) != sig(cross(a, b, p[i + 1])))
+      line_cross(a, b, p[i], p[i + 1], pp[m++]);
+  }
+  n = 0;
+  for (int i = 0; i < m; i++)
+    if (!i || !point_eq(pp[i], pp[i - 1])) p[n++] = pp[i];
+  while (n > 1 && point_eq(p[n - 1], p[0])) n--;
+}
+
+// signed intersection area of triangles oab and ocd, o is the origin
+template <typename T>
+inline T triangle_intersect_area(
+    Point<T> a, Point<T> b, Point<T> c, Point<T> d) {
+  Point<T> o = {0, 0};
+  int s1 = sig(cross(o, a, b));
+  int s2 = sig(cross(o, c, d));
+  if (s1 == 0 || s2 == 0) return 0;
+  if (s1 == -1) std::swap(a, b);
+  if (s2 == -1) std::swap(c, d);
+  Point<T> p[maxn] = {o, a, b};
+  int n = 3;
+  polygon_cut(p, n, o, c);
+  polygon_cut(p, n, c, d);
+  polygon_cut(p, n, d, o);
+  T res = std::fabs(area(p, n));
+  if (s1 * s2 == -1) res = -res;
+  return res;
+}
+
+template <typename T>
+inline T poly_iou(const T* p, const T* q, T area_p, T area_q) {
+  // The triangles are fanned from the origin, so both polygons are moved
+  // next to it first to keep the clipping well conditioned in float.
+  Point<T> ps1[maxn], ps2[maxn];
+  T ox = p[0], oy = p[1];
+  for (int i = 0; i < 4; i++) {
+    ps1[i] = {p[i * 2] - ox, p[i * 2 + 1] - oy};
+    ps2[i] = {q[i * 2] - ox, q[i * 2 + 1] - oy};
+  }
+  if (area(ps1, 4) < 0) std::reverse(ps1, ps1 + 4);
+  if (area(ps2, 4) < 0) std::reverse(ps2, ps2 + 4);
+  ps1[4] = ps1[0];
+  ps2[4] = ps2[0];
+
+  T inter_area = 0;
+  for (int i = 0; i < 4; i++) {
+    for (int j = 0; j < 4; j++) {
+      inter_area += triangle_intersect_area(
+          ps1[i], ps1[i + 1], ps2[j], ps2[j + 1]);
+    }
+  }
+  T union_area = area_p + area_q - inter_area;
+  if (union_area == 0) {
+    return (inter_area + 1) / (union_area + 1);
+  }
+  return inter_area / union_area;
+}
+
+}  // namespace
 
 template <typename scalar_t>
 at::Tensor poly_nms_cpu_kernel(const at::Tensor& dets, const float threshold) {
+  AT_ASSERTM(dets.device().is_cpu(), "dets must be a CPU tensor");
+
+  if (dets.numel() == 0) {
+    return at::empty({0}, dets.options().dtype(at::kLong));
+  }
+
+  auto scores = dets.select(1, 8).contiguous();
+  auto order_t = std::get<1>(scores.sort(0, /* descending=*/true));
+
+  auto ndets = dets.size(0);
+  at::Tensor suppressed_t = at::zeros({ndets}, dets.options().dtype(at::kByte));
+  at::Tensor keep_t = at::zeros({ndets}, dets.options().dtype(at::kLong));
+
+  auto suppressed = suppressed_t.data_ptr<uint8_t>();
+  auto keep = keep_t.data_ptr<int64_t>();
+  auto order = order_t.data_ptr<int64_t>();
+  auto polys = dets.data_ptr<scalar_t>();
+
+  // Areas and horizontal extents are computed once, so most pairs are
+  // rejected without clipping when their extents do not overlap.
+  std::vector<scalar_t> areas(ndets), extents(ndets * 4);
+  for (int64_t i = 0; i < ndets; i++) {
+    auto p = polys + i * 9;
+    Point<scalar_t> ps[maxn];
+    for (int k = 0; k < 4; k++) {
+      ps[k] = {p[k * 2], p[k * 2 + 1]};
+    }
+    areas[i] = std::fabs(area(ps, 4));
+
+    auto e = extents.data() + i * 4;
+    e[0] = std::min(std::min(p[0], p[2]), std::min(p[4], p[6]));
+    e[1] = std::min(std::min(p[1], p[3]), std::min(p[5], p[7]));
+    e[2] = std::max(std::max(p[0], p[2]), std::max(p[4], p[6]));
+    e[3] = std::max(std::max(p[1], p[3]), std::max(p[5], p[7]));
+  }
+
+  int64_t num_to_keep = 0;
+
+  for (int64_t _i = 0; _i < ndets; _i++) {
+    auto i = order[_i];
+    if (suppressed[i] == 1) {
+      continue;
+    }
+
+    keep[num_to_keep++] = i;
+
+    auto ei = extents.data() + i * 4;
+    // Suppression of the remaining boxes by box i is independent, so the
+    // IoU row is computed in parallel.
+#pragma omp parallel for schedule(guided) if (ndets - _i > 512)
+    for (int64_t _j = _i + 1; _j < ndets; _j++) {
+      auto j = order[_j];
+      if (suppressed[j] == 1) {
+        continue;
+      }
+
+      auto ej = extents.data() + j * 4;
+      if (threshold >= 0 && (ej[0] > ei[2] || ej[2] < ei[0] ||
+                             ej[1] > ei[3] || ej[3] < ei[1])) {
+        continue;
+      }
+
+      auto ovr = poly_iou<scalar_t>(
+          polys + i * 9, polys + j * 9, areas[i], areas[j]);
+      if (ovr > threshold) {
+        suppressed[j] = 1;
+      }
+    }
+  }
+  return keep_t.narrow(/*dim=*/0, /*start=*/0, /*length=*/num_to_keep);
+}
+
+at::Tensor poly_nms_cpu(const at::Tensor& dets, const float threshold) {
+  auto result = at::empty({0}, dets.options());
 
+  AT_DISPATCH_FLOATING_TYPES(dets.scalar_type(), "poly_nms", [&] {
+    result = poly_nms_cpu_kernel<scalar_t>(dets, threshold);
+  });
+  return result;
+}
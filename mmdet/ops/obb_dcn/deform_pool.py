@@ -72,7 +72,9 @@ class DeformRoIPoolingFunction(Function):
 
         assert 0.0 <= ctx.trans_std <= 1.0
         if not data.is_cuda:
-            raise NotImplementedError
+            # only the forward is implemented on CPU, for inference
+            data, rois = data.contiguous(), rois.contiguous()
+            offset = offset.contiguous()
 
         n = rois.shape[0]
         output = data.new_empty(n, out_channels, out_size, out_size)
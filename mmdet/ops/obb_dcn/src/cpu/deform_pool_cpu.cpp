@@ -0,0 +1,173 @@
+// CPU counterpart of DeformablePSROIPoolForwardKernel in
+// cuda/deform_pool_cuda_kernel.cu, the sampling is the same.
+#include <torch/extension.h>
+
+#include <algorithm>
+#include <cmath>
+
+template <typename scalar_t>
+inline scalar_t bilinear_interp(
+    const scalar_t *data,
+    const scalar_t x,
+    const scalar_t y,
+    const int width,
+    const int height)
+{
+  int x1 = floor(x);
+  int x2 = ceil(x);
+  int y1 = floor(y);
+  int y2 = ceil(y);
+  scalar_t dist_x = (scalar_t)(x - x1);
+  scalar_t dist_y = (scalar_t)(y - y1);
+  scalar_t value11 = data[y1 * width + x1];
+  scalar_t value12 = data[y2 * width + x1];
+  scalar_t value21 = data[y1 * width + x2];
+  scalar_t value22 = data[y2 * width + x2];
+  scalar_t value = (1 - dist_x) * (1 - dist_y) * value11 + (1 - dist_x) * dist_y * value12 + dist_x * (1 - dist_y) * value21 + dist_x * dist_y * value22;
+  return value;
+}
+
+template <typename scalar_t>
+void DeformablePSROIPoolForwardCPUKernel(
+    const int num_bbox,
+    const scalar_t *bottom_data,
+    const scalar_t spatial_scale,
+    const int channels,
+    const int height, const int width,
+    const int pooled_height, const int pooled_width,
+    const scalar_t *bottom_rois, const scalar_t *bottom_trans,
+    const int no_trans,
+    const scalar_t trans_std,
+    const int sample_per_part,
+    const int output_dim,
+    const int group_size,
+    const int part_size,
+    const int num_classes,
+    const int channels_each_class,
+    scalar_t *top_data,
+    scalar_t *top_count)
+{
+  // RoIs are independent, every thread pools all the bins of its RoIs.
+#pragma omp parallel for schedule(guided)
+  for (int n = 0; n < num_bbox; n++)
+  {
+    const scalar_t *offset_bottom_rois = bottom_rois + n * 6;
+    int roi_batch_ind = offset_bottom_rois[0];
+    scalar_t roi_start_w = (scalar_t)(offset_bottom_rois[1]-offset_bottom_rois[3]/2.0) * spatial_scale - 0.5;
+    scalar_t roi_start_h = (scalar_t)(offset_bottom_rois[2]-offset_bottom_rois[4]/2.0) * spatial_scale - 0.5;
+    scalar_t roi_end_w = (scalar_t)((offset_bottom_rois[1]+offset_bottom_rois[3]/2.0) + 1.) * spatial_scale - 0.5;
+    scalar_t roi_end_h = (scalar_t)((offset_bottom_rois[2]+offset_bottom_rois[4]/2.0) + 1.) * spatial_scale - 0.5;
+    scalar_t roi_center_w = offset_bottom_rois[1] * spatial_scale - 0.5;
+    scalar_t roi_center_h = offset_bottom_rois[2] * spatial_scale - 0.5;
+    scalar_t theta = offset_bottom_rois[5];
+    scalar_t cos_theta = cos(theta);
+    scalar_t sin_theta = sin(theta);
+
+    // Force too small ROIs to be 1x1
+    scalar_t roi_width = std::max(roi_end_w - roi_start_w, (scalar_t)0.1); //avoid 0
+    scalar_t roi_height = std::max(roi_end_h - roi_start_h, (scalar_t)0.1);
+
+    // Compute w and h at bottom
+    scalar_t bin_size_h = roi_height / (scalar_t)(pooled_height);
+    scalar_t bin_size_w = roi_width / (scalar_t)(pooled_width);
+
+    scalar_t sub_bin_size_h = bin_size_h / (scalar_t)(sample_per_part);
+    scalar_t sub_bin_size_w = bin_size_w / (scalar_t)(sample_per_part);
+
+    const scalar_t *offset_bottom_data = bottom_data + (roi_batch_ind * channels) * height * width;
+    for (int ctop = 0; ctop < output_dim; ctop++)
+    {
+      int class_id = ctop / channels_each_class;
+      for (int ph = 0; ph < pooled_height; ph++)
+      {
+        for (int pw = 0; pw < pooled_width; pw++)
+        {
+          int index = ((n * output_dim + ctop) * pooled_height + ph) * pooled_width + pw;
+
+          int part_h = floor((scalar_t)(ph) / pooled_height * part_size);
+          int part_w = floor((scalar_t)(pw) / pooled_width * part_size);
+          scalar_t trans_x = no_trans ? (scalar_t)(0) : bottom_trans[(((n * num_classes + class_id) * 2) * part_size + part_h) * part_size + part_w] * (scalar_t)trans_std;
+          scalar_t trans_y = no_trans ? (scalar_t)(0) : bottom_trans[(((n * num_classes + class_id) * 2 + 1) * part_size + part_h) * part_size + part_w] * (scalar_t)trans_std;
+
+          scalar_t wstart = (scalar_t)(pw)*bin_size_w - roi_width/2.0;
+          scalar_t hstart = (scalar_t)(ph)*bin_size_h - roi_height/2.0;
+
+          scalar_t sum = 0;
+          int count = 0;
+          int gw = floor((scalar_t)(pw)*group_size / pooled_width);
+          int gh = floor((scalar_t)(ph)*group_size / pooled_height);
+          gw = std::min(std::max(gw, 0), group_size - 1);
+          gh = std::min(std::max(gh, 0), group_size - 1);
+
+          scalar_t yy = trans_y * roi_height * cos_theta - trans_x * roi_width * sin_theta;
+          scalar_t xx = trans_y * roi_height * sin_theta + trans_x * roi_width * cos_theta;
+          int c = (ctop * group_size + gh) * group_size + gw;
+          for (int ih = 0; ih < sample_per_part; ih++)
+          {
+            for (int iw = 0; iw < sample_per_part; iw++)
+            {
+              scalar_t w = wstart + iw * sub_bin_size_w;
+              scalar_t h = hstart + ih * sub_bin_size_h;
+
+              scalar_t y = h * cos_theta - w * sin_theta + roi_center_h + yy;
+              scalar_t x = h * sin_theta + w * cos_theta + roi_center_w + xx;
+              w = x; h = y;
+
+              // bilinear interpolation
+              if (w < -0.5 || w > width - 0.5 || h < -0.5 || h > height - 0.5)
+              {
+                continue;
+              }
+              w = std::min(std::max(w, (scalar_t)0.), (scalar_t)(width - 1.));
+              h = std::min(std::max(h, (scalar_t)0.), (scalar_t)(height - 1.));
+
+              scalar_t val = bilinear_interp(offset_bottom_data + c * height * width, w, h, width, height);
+              sum += val;
+              count++;
+            }
+          }
+          top_data[index] = count == 0 ? (scalar_t)(0) : sum / count;
+          top_count[index] = count;
+        }
+      }
+    }
+  }
+}
+
+void deform_psroi_pooling_cpu_forward(
+    at::Tensor input, at::Tensor bbox, at::Tensor trans, at::Tensor out,
+    at::Tensor top_count, const int no_trans, const float spatial_scale,
+    const int output_dim, const int group_size, const int pooled_size,
+    const int part_size, const int sample_per_part, const float trans_std) {
+  TORCH_CHECK(input.is_contiguous(), "input tensor has to be contiguous");
+  TORCH_CHECK(bbox.is_contiguous(), "bbox tensor has to be contiguous");
+  TORCH_CHECK(no_trans || trans.is_contiguous(),
+              "trans tensor has to be contiguous");
+
+  const int channels = input.size(1);
+  const int height = input.size(2);
+  const int width = input.size(3);
+  const int channels_trans = no_trans ? 2 : trans.size(1);
+
+  const int num_bbox = bbox.size(0);
+  if (num_bbox != out.size(0))
+    AT_ERROR("Output shape and bbox number wont match: (%d vs %d).",
+             out.size(0), num_bbox);
+
+  const int num_classes = no_trans ? 1 : channels_trans / 2;
+  const int channels_each_class = no_trans ? output_dim : output_dim / num_classes;
+
+  AT_DISPATCH_FLOATING_TYPES(
+      input.scalar_type(), "deformable_psroi_pool_forward_cpu", ([&] {
+        const scalar_t *bottom_data = input.data_ptr<scalar_t>();
+        const scalar_t *bottom_rois = bbox.data_ptr<scalar_t>();
+        const scalar_t *bottom_trans = no_trans ? NULL : trans.data_ptr<scalar_t>();
+        scalar_t *top_data = out.data_ptr<scalar_t>();
+        scalar_t *top_count_data = top_count.data_ptr<scalar_t>();
+
+        DeformablePSROIPoolForwardCPUKernel(
+            num_bbox, bottom_data, (scalar_t)spatial_scale, channels, height, width, pooled_size, pooled_size,
+            bottom_rois, bottom_trans, no_trans, (scalar_t)trans_std, sample_per_part, output_dim,
+            group_size, part_size, num_classes, channels_each_class, top_data, top_count_data);
+      }));
+}
@@ -26,6 +26,12 @@ void deform_psroi_pooling_cuda_backward(
     const int sample_per_part, const float trans_std);
 #endif
 
+void deform_psroi_pooling_cpu_forward(
+    at::Tensor input, at::Tensor bbox, at::Tensor trans, at::Tensor out,
+    at::Tensor top_count, const int no_trans, const float spatial_scale,
+    const int output_dim, const int group_size, const int pooled_size,
+    const int part_size, const int sample_per_part, const float trans_std);
+
 void deform_psroi_pooling_forward(
     at::Tensor input, at::Tensor bbox, at::Tensor trans, at::Tensor out,
     at::Tensor top_count, const int no_trans, const float spatial_scale,
@@ -40,7 +46,9 @@ void deform_psroi_pooling_forward(
     AT_ERROR("deform psroi pooling is not compiled with GPU support");
 #endif
   }
-  AT_ERROR("deform psroi pooling is not implemented on CPU");
+  return deform_psroi_pooling_cpu_forward(input, bbox, trans, out, top_count,
+      no_trans, spatial_scale, output_dim, group_size, pooled_size,
+      part_size, sample_per_part, trans_std);
 }
 
 void deform_psroi_pooling_backward(
@@ -59,7 +67,7 @@ void deform_psroi_pooling_backward(
     AT_ERROR("deform psroi pooling is not compiled with GPU support");
 #endif
   }
-  AT_ERROR("deform psroi pooling is not implemented on CPU");
+  AT_ERROR("deform psroi pooling backward is not implemented on CPU");
 }
 
 
@@ -127,69 +127,6 @@ void pre_calc_for_bilinear_interpolate(
   }
 }
 
-template <typename T>
-void bilinear_interpolate_gradient(
-    const int height,
-    const int width,
-    T y,
-    T x,
-    T& w1,
-    T& w2,
-    T& w3,
-    T& w4,
-    int& x_low,
-    int& x_high,
-    int& y_low,
-    int& y_high) {
-  // deal with cases that inverse elements are out of feature map boundary
-  if (y < -1.0 || y > height || x < -1.0 || x > width) {
-    // empty
-    w1 = w2 = w3 = w4 = 0.;
-    x_low = x_high = y_low = y_high = -1;
-    return;
-  }
-
-  if (y < 0) {
-    y = 0;
-  }
-
-  if (x < 0) {
-    x = 0;
-  }
-
-  y_low = (int)y;
-  x_low = (int)x;
-
-  if (y_low >= height - 1) {
-    y_high = y_low = height - 1;
-    y = (T)y_low;
-  } else {
-    y_high = y_low + 1;
-  }
-
-  if (x_low >= width - 1) {
-    x_high = x_low = width - 1;
-    x = (T)x_low;
-  } else {
-    x_high = x_low + 1;
-  }
-
-  T ly = y - y_low;
-  T lx = x - x_low;
-  T hy = 1. - ly, hx = 1. - lx;
-
-  // reference in forward
-  // T v1 = input[y_low * width + x_low];
-  // T v2 = input[y_low * width + x_high];
-  // T v3 = input[y_high * width + x_low];
-  // T v4 = input[y_high * width + x_high];
-  // T val = (w1 * v1 + w2 * v2 + w3 * v3 + w4 * v4);
-
-  w1 = hy * hx, w2 = hy * lx, w3 = ly * hx, w4 = ly * lx;
-
-  return;
-}
-
 template <class T>
 inline void add(T* address, const T& val) {
   *address += val;
@@ -208,11 +145,19 @@ void ROIAlignRotatedForward(
     const int sampling_ratio,
     const T* rois,
     T* output,
-    bool aligned) {
+    bool aligned,
+    bool channels_last) {
   int n_rois = nthreads / channels / pooled_width / pooled_height;
+  if (aligned) {
+    for (int n = 0; n < n_rois; n++) {
+      AT_ASSERTM(rois[n * 6 + 3] >= 0 && rois[n * 6 + 4] >= 0,
+		 "ROIs in ROIAlignRotated do not have non-negative size!");
+    }
+  }
+
   // (n, c, ph, pw) is an element in the pooled output
-  // can be parallelized using omp
-  // #pragma omp parallel for num_threads(32)
+  // RoIs are pooled in parallel, every RoI is written by a single thread.
+#pragma omp parallel for schedule(dynamic)
   for (int n = 0; n < n_rois; n++) {
     int index_n = n * channels * pooled_width * pooled_height;
 
@@ -232,10 +177,7 @@ void ROIAlignRotatedForward(
     T cos_theta = cos(theta);
     T sin_theta = sin(theta);
 
-    if (aligned) {
-      AT_ASSERTM(roi_width >= 0 && roi_height >= 0,
-		 "ROIs in ROIAlignRotated do not have non-negative size!");
-    } else {
+    if (!aligned) {
       roi_width = std::max(roi_width, (T)1.);
       roi_height = std::max(roi_height, (T)1.);
     }
@@ -281,6 +223,42 @@ void ROIAlignRotatedForward(
         sin_theta,
         pre_calc);
 
+    if (channels_last) {
+      // The channels of a pixel are contiguous in channels last input, so
+      // every sample is accumulated over all the channels at once.
+      const T* offset_input = input + roi_batch_ind * height * width * channels;
+      std::vector<T> output_val(channels);
+      int pre_calc_index = 0;
+
+      for (int ph = 0; ph < pooled_height; ph++) {
+        for (int pw = 0; pw < pooled_width; pw++) {
+          std::fill(output_val.begin(), output_val.end(), (T)0.);
+          for (int iy = 0; iy < roi_bin_grid_h; iy++) {
+            for (int ix = 0; ix < roi_bin_grid_w; ix++) {
+              PreCalc<T> pc = pre_calc[pre_calc_index];
+              const T* v1 = offset_input + pc.pos1 * channels;
+              const T* v2 = offset_input + pc.pos2 * channels;
+              const T* v3 = offset_input + pc.pos3 * channels;
+              const T* v4 = offset_input + pc.pos4 * channels;
+              for (int c = 0; c < channels; c++) {
+                output_val[c] += pc.w1 * v1[c] + pc.w2 * v2[c] +
+                    pc.w3 * v3[c] + pc.w4 * v4[c];
+              }
+
+              pre_calc_index += 1;
+            }
+          }
+
+          int index = index_n + ph * pooled_width + pw;
+          for (int c = 0; c < channels; c++) {
+            output[index + c * pooled_width * pooled_height] =
+                output_val[c] / count;
+          }
+        } // for pw
+      } // for ph
+      continue;
+    }
+
     for (int c = 0; c < channels; c++) {
       int index_n_c = index_n + c * pooled_width * pooled_height;
       const T* offset_input =
@@ -330,13 +308,8 @@ void ROIAlignRotatedBackward(
     const int h_stride,
     const int w_stride,
     bool aligned) {
-  for (int index = 0; index < nthreads; index++) {
-    // (n, c, ph, pw) is an element in the pooled output
-    int pw = index % pooled_width;
-    int ph = (index / pooled_width) % pooled_height;
-    int c = (index / pooled_width / pooled_height) % channels;
-    int n = index / pooled_width / pooled_height / channels;
-
+  int n_rois = nthreads / channels / pooled_width / pooled_height;
+  for (int n = 0; n < n_rois; n++) {
     const T* current_roi = rois + n * 6;
     int roi_batch_ind = current_roi[0];
 
@@ -363,14 +336,6 @@ void ROIAlignRotatedBackward(
     T bin_size_h = static_cast<T>(roi_height) / static_cast<T>(pooled_height);
     T bin_size_w = static_cast<T>(roi_width) / static_cast<T>(pooled_width);
 
-    T* offset_grad_input =
-        grad_input + ((roi_batch_ind * channels + c) * height * width);
-
-    int output_offset = n * n_stride + c * c_stride;
-    const T* offset_grad_output = grad_output + output_offset;
-    const T grad_output_this_bin =
-        offset_grad_output[ph * h_stride + pw * w_stride];
-
     // We use roi_bin_grid to sample the grid and mimic integral
     int roi_bin_grid_h = (sampling_ratio > 0)
         ? sampling_ratio
@@ -378,48 +343,78 @@ void ROIAlignRotatedBackward(
     int roi_bin_grid_w =
         (sampling_ratio > 0) ? sampling_ratio : ceil(roi_width / pooled_width);
 
+    // We do average (integral) pooling inside a bin
+    const T count = roi_bin_grid_h * roi_bin_grid_w; // e.g. = 4
+
+    // the indices and weights of the forward are shared by all channels
+    std::vector<PreCalc<T>> pre_calc(
+        roi_bin_grid_h * roi_bin_grid_w * pooled_width * pooled_height);
+
     // roi_start_h and roi_start_w are computed wrt the center of RoI (x, y).
     // Appropriate translation needs to be applied after.
     T roi_start_h = -roi_height / 2.0;
     T roi_start_w = -roi_width / 2.0;
 
-    // We do average (integral) pooling inside a bin
-    const T count = roi_bin_grid_h * roi_bin_grid_w; // e.g. = 4
+    pre_calc_for_bilinear_interpolate(
+        height,
+        width,
+        pooled_height,
+        pooled_width,
+        roi_bin_grid_h,
+        roi_bin_grid_w,
+        roi_start_h,
+        roi_start_w,
+        bin_size_h,
+        bin_size_w,
+        roi_bin_grid_h,
+        roi_bin_grid_w,
+        roi_center_h,
+        roi_center_w,
+        cos_theta,
+        sin_theta,
+        pre_calc);
+
+    // Every channel only accumulates into its own plane of grad_input, so
+    // the channels are back propagated in parallel without atomic adds.
+#pragma omp parallel for schedule(static)
+    for (int c = 0; c < channels; c++) {
+      T* offset_grad_input =
+          grad_input + ((roi_batch_ind * channels + c) * height * width);
 
-    for (int iy = 0; iy < roi_bin_grid_h; iy++) {
-      const T yy = roi_start_h + ph * bin_size_h +
-          static_cast<T>(iy + .5f) * bin_size_h /
-              static_cast<T>(roi_bin_grid_h); // e.g., 0.5, 1.5
-      for (int ix = 0; ix < roi_bin_grid_w; ix++) {
-        const T xx = roi_start_w + pw * bin_size_w +
-            static_cast<T>(ix + .5f) * bin_size_w /
-                static_cast<T>(roi_bin_grid_w);
-
-        // Rotate by theta around the center and translate
-        T y = yy * cos_theta - xx * sin_theta + roi_center_h;
-        T x = yy * sin_theta + xx * cos_theta + roi_center_w;
-
-        T w1, w2, w3, w4;
-        int x_low, x_high, y_low, y_high;
-
-        bilinear_interpolate_gradient(
-            height, width, y, x, w1, w2, w3, w4, x_low, x_high, y_low, y_high);
-
-        T g1 = grad_output_this_bin * w1 / count;
-        T g2 = grad_output_this_bin * w2 / count;
-        T g3 = grad_output_this_bin * w3 / count;
-        T g4 = grad_output_this_bin * w4 / count;
-
-        if (x_low >= 0 && x_high >= 0 && y_low >= 0 && y_high >= 0) {
-          // atomic add is not needed for now since it is single threaded
-          add(offset_grad_input + y_low * width + x_low, static_cast<T>(g1));
-          add(offset_grad_input + y_low * width + x_high, static_cast<T>(g2));
-          add(offset_grad_input + y_high * width + x_low, static_cast<T>(g3));
-          add(offset_grad_input + y_high * width + x_high, static_cast<T>(g4));
-        } // if
-      } // ix
-    } // iy
-  } // for
+      int output_offset = n * n_stride + c * c_stride;
+      const T* offset_grad_output = grad_output + output_offset;
+      int pre_calc_index = 0;
+
+      for (int ph = 0; ph < pooled_height; ph++) {
+        for (int pw = 0; pw < pooled_width; pw++) {
+          const T grad_output_this_bin =
+              offset_grad_output[ph * h_stride + pw * w_stride];
+
+          for (int iy = 0; iy < roi_bin_grid_h; iy++) {
+            for (int ix = 0; ix < roi_bin_grid_w; ix++) {
+              PreCalc<T> pc = pre_calc[pre_calc_index];
+              pre_calc_index += 1;
+              // samples out of the feature map have no weights
+              if (pc.w1 == (T)0. && pc.w2 == (T)0. && pc.w3 == (T)0. &&
+                  pc.w4 == (T)0.) {
+                continue;
+              }
+
+              T g1 = grad_output_this_bin * pc.w1 / count;
+              T g2 = grad_output_this_bin * pc.w2 / count;
+              T g3 = grad_output_this_bin * pc.w3 / count;
+              T g4 = grad_output_this_bin * pc.w4 / count;
+
+              add(offset_grad_input + pc.pos1, static_cast<T>(g1));
+              add(offset_grad_input + pc.pos2, static_cast<T>(g2));
+              add(offset_grad_input + pc.pos3, static_cast<T>(g3));
+              add(offset_grad_input + pc.pos4, static_cast<T>(g4));
+            } // ix
+          } // iy
+        } // pw
+      } // ph
+    } // c
+  } // n
 } // ROIAlignRotatedBackward
 
 at::Tensor ROIAlignRotated_forward_cpu(
@@ -452,7 +447,11 @@ at::Tensor ROIAlignRotated_forward_cpu(
     return output;
   }
 
-  auto input_ = input.contiguous(), rois_ = rois.contiguous();
+  // channels last input is pooled as it is instead of being copied
+  bool channels_last = !input.is_contiguous() &&
+      input.is_contiguous(at::MemoryFormat::ChannelsLast);
+  auto input_ = channels_last ? input : input.contiguous();
+  auto rois_ = rois.contiguous();
   AT_DISPATCH_FLOATING_TYPES_AND_HALF(
       input.scalar_type(), "ROIAlignRotated_forward", [&] {
         ROIAlignRotatedForward<scalar_t>(
@@ -467,7 +466,8 @@ at::Tensor ROIAlignRotated_forward_cpu(
             sampling_ratio,
             rois_.data_ptr<scalar_t>(),
             output.data_ptr<scalar_t>(),
-	    aligned);
+	    aligned,
+	    channels_last);
       });
   return output;
 }
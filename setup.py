@@ -85,10 +85,14 @@ def get_version():
     return locals()['__version__']
 
 
-def make_cuda_ext(name, module, sources, sources_cuda=[]):
+def make_cuda_ext(name, module, sources, sources_cuda=[], with_openmp=False):
 
     define_macros = []
     extra_compile_args = {'cxx': []}
+    extra_link_args = []
+    if with_openmp:
+        extra_compile_args['cxx'] += ['-fopenmp']
+        extra_link_args += ['-fopenmp']
 
     if torch.cuda.is_available() or os.getenv('FORCE_CUDA', '0') == '1':
         define_macros += [('WITH_CUDA', None)]
@@ -108,7 +112,8 @@ def make_cuda_ext(name, module, sources, sources_cuda=[]):
         name=f'{module}.{name}',
         sources=[os.path.join(*module.split('.'), p) for p in sources],
         define_macros=define_macros,
-        extra_compile_args=extra_compile_args)
+        extra_compile_args=extra_compile_args,
+        extra_link_args=extra_link_args)
 
 
 def parse_requirements(fname='requirements.txt', with_version=True):
@@ -269,11 +274,14 @@ if __name__ == '__main__':
             make_cuda_ext(
                 name='obb_deform_pool_ext',
                 module='mmdet.ops.obb_dcn',
-                sources=['src/deform_pool_ext.cpp'],
+                sources=[
+                    'src/deform_pool_ext.cpp', 'src/cpu/deform_pool_cpu.cpp'
+                ],
                 sources_cuda=[
                     'src/cuda/deform_pool_cuda.cpp',
                     'src/cuda/deform_pool_cuda_kernel.cu'
-                ]),
+                ],
+                with_openmp=True),
             make_cuda_ext(
                 name='sigmoid_focal_loss_ext',
                 module='mmdet.ops.sigmoid_focal_loss',
@@ -316,18 +324,21 @@ if __name__ == '__main__':
                     'src/roi_align_rotated_cpu.cpp',
                     'src/roi_align_rotated_ext.cpp'
                 ],
-                sources_cuda=['src/roi_align_rotated_cuda.cu']),
+                sources_cuda=['src/roi_align_rotated_cuda.cu'],
+                with_openmp=True),
             make_cuda_ext(
                 name='nms_rotated_ext',
                 module='mmdet.ops.nms_rotated',
                 sources=[
                     'src/nms_rotated_cpu.cpp',
+                    'src/poly_nms_cpu.cpp',
                     'src/nms_rotated_ext.cpp'
                 ],
                 sources_cuda=[
                     'src/nms_rotated_cuda.cu',
                     'src/poly_nms_cuda.cu',
-                ]),
+                ],
+                with_openmp=True),
             make_cuda_ext(
                 name='box_iou_rotated_ext',
                 module='mmdet.ops.box_iou_rotated',
@@ -335,7 +346,8 @@ if __name__ == '__main__':
                     'src/box_iou_rotated_cpu.cpp',
                     'src/box_iou_rotated_ext.cpp'
                 ],
-                sources_cuda=['src/box_iou_rotated_cuda.cu']),
+                sources_cuda=['src/box_iou_rotated_cuda.cu'],
+                with_openmp=True),
         ],
         cmdclass={'build_ext': BuildExtension},
         zip_safe=False)
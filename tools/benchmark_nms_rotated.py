@@ -0,0 +1,115 @@
+import argparse
+import time
+
+import numpy as np
+import torch
+
+from mmdet.ops import obb_overlaps
+from mmdet.ops.nms_rotated import obb_nms
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='Benchmark obb_nms on CPU over DOTA-like proposals')
+    parser.add_argument(
+        '--nums', type=int, nargs='+', default=[2000, 5000, 20000],
+        help='numbers of boxes')
+    parser.add_argument(
+        '--iou-thrs', type=float, nargs='+', default=[0.8, 0.1],
+        help='0.8 as the RPN and 0.1 as the RCNN of the DOTA configs')
+    parser.add_argument('--img-size', type=int, default=1024)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--check', action='store_true',
+                        help='compare with a greedy NMS over the full IoU '
+                        'matrix, only for at most 5000 boxes')
+    parser.add_argument('--seed', type=int, default=0)
+    return parser.parse_args()
+
+
+def random_dota_obbs(num, img_size, rng):
+    """Proposals jittered around objects like those of DOTA patches.
+
+    Objects are small and elongated, packed in clusters sharing an angle,
+    e.g. vehicles in parking lots and ships in harbors. Every object gets a
+    few proposals around it, and a tenth of the boxes are background.
+    """
+    num_bg = num // 10
+    num_objs = max((num - num_bg) // 8, 1)
+    num_clusters = max(num_objs // 20, 1)
+
+    cluster_ctr = rng.uniform(0, img_size, (num_clusters, 2))
+    cluster_theta = rng.uniform(-np.pi / 2, np.pi / 2, num_clusters)
+    cluster_inds = rng.randint(0, num_clusters, num_objs)
+    ctr = cluster_ctr[cluster_inds] + rng.normal(0, 60, (num_objs, 2))
+    long_side = np.exp(rng.normal(np.log(30), 0.6, num_objs))
+    ratio = rng.uniform(1, 4, num_objs)
+    theta = cluster_theta[cluster_inds] + rng.normal(0, 0.1, num_objs)
+    objs = np.stack([ctr[:, 0], ctr[:, 1], long_side, long_side / ratio,
+                     theta], axis=1)
+
+    num_fg = num - num_bg
+    obj_inds = rng.randint(0, num_objs, num_fg)
+    fg = objs[obj_inds].copy()
+    offset = rng.normal(0, 0.1, (num_fg, 2))
+    scale = np.exp(rng.normal(0, 0.1, (num_fg, 2)))
+    fg[:, :2] += offset * fg[:, 2:3]
+    fg[:, 2:4] *= scale
+    fg[:, 4] += rng.normal(0, 0.1, num_fg)
+    fg_scores = np.clip(1 - np.abs(offset).sum(1) - rng.uniform(0, 0.3,
+                                                                num_fg), 0, 1)
+
+    bg = np.stack([
+        rng.uniform(0, img_size, num_bg), rng.uniform(0, img_size, num_bg),
+        rng.uniform(8, 150, num_bg), rng.uniform(8, 150, num_bg),
+        rng.uniform(-np.pi / 2, np.pi / 2, num_bg)], axis=1)
+    bg_scores = rng.uniform(0, 0.3, num_bg)
+
+    bboxes = np.concatenate([fg, bg], axis=0)
+    bboxes[:, 4] = (bboxes[:, 4] + np.pi / 2) % np.pi - np.pi / 2
+    scores = np.concatenate([fg_scores, bg_scores])
+    dets = np.concatenate([bboxes, scores[:, None]], axis=1)
+    return torch.from_numpy(dets).float()
+
+
+def greedy_nms(dets, iou_thr):
+    ious = obb_overlaps(dets[:, :5], dets[:, :5]).numpy()
+    order = np.argsort(-dets[:, 5].numpy(), kind='stable')
+    suppressed = np.zeros(len(order), dtype=np.bool_)
+    keep = []
+    for i in order:
+        if suppressed[i]:
+            continue
+        keep.append(i)
+        suppressed |= ious[i] >= iou_thr
+    return np.array(keep, dtype=np.int64)
+
+
+def timeit(dets, iou_thr, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        _, inds = obb_nms(dets, iou_thr)
+        times.append(time.perf_counter() - start)
+    return min(times), inds
+
+
+def main():
+    args = parse_args()
+    rng = np.random.RandomState(args.seed)
+    print(f'torch threads: {torch.get_num_threads()}')
+    for num in args.nums:
+        dets = random_dota_obbs(num, args.img_size, rng)
+        for iou_thr in args.iou_thrs:
+            nms_time, inds = timeit(dets, iou_thr, args.repeat)
+            msg = (f'{num:>6d} boxes, iou_thr {iou_thr}: obb_nms '
+                   f'{nms_time*1000:.1f} ms, keep {len(inds)}')
+            if args.check and num <= 5000:
+                ref_inds = greedy_nms(dets, iou_thr)
+                same = np.array_equal(
+                    np.sort(inds.numpy()), np.sort(ref_inds))
+                msg += f', same keep: {same}'
+            print(msg)
+
+
+if __name__ == '__main__':
+    main()
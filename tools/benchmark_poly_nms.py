@@ -0,0 +1,60 @@
+import argparse
+import time
+
+import BboxToolkit as bt
+import numpy as np
+
+from mmdet.ops.nms_rotated import BT_nms, poly_nms
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='Benchmark poly_nms on CPU against BT_nms')
+    parser.add_argument(
+        '--nums', type=int, nargs='+', default=[1000, 5000, 20000],
+        help='numbers of boxes')
+    parser.add_argument('--iou-thr', type=float, default=0.1)
+    parser.add_argument('--img-size', type=int, default=4000)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--skip-bt', action='store_true',
+                        help='only time poly_nms')
+    parser.add_argument('--seed', type=int, default=0)
+    return parser.parse_args()
+
+
+def random_polys(num, img_size, rng):
+    ctr = rng.uniform(0, img_size, (num, 2))
+    wh = rng.uniform(10, 100, (num, 2))
+    theta = rng.uniform(-np.pi / 2, np.pi / 2, (num, 1))
+    polys = bt.obb2poly(np.concatenate([ctr, wh, theta], axis=1))
+    scores = rng.uniform(0, 1, (num, 1))
+    return np.concatenate([polys, scores], axis=1).astype(np.float32)
+
+
+def timeit(func, dets, iou_thr, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        _, inds = func(dets, iou_thr)
+        times.append(time.perf_counter() - start)
+    return min(times), inds
+
+
+def main():
+    args = parse_args()
+    rng = np.random.RandomState(args.seed)
+    for num in args.nums:
+        dets = random_polys(num, args.img_size, rng)
+        poly_time, poly_inds = timeit(poly_nms, dets, args.iou_thr,
+                                      args.repeat)
+        msg = f'{num:>6d} boxes: poly_nms {poly_time*1000:.1f} ms'
+        if not args.skip_bt:
+            bt_time, bt_inds = timeit(BT_nms, dets, args.iou_thr, 1)
+            same = np.array_equal(np.sort(poly_inds), np.sort(bt_inds))
+            msg += (f', BT_nms {bt_time*1000:.1f} ms, '
+                    f'speedup {bt_time/poly_time:.1f}x, same keep: {same}')
+        print(msg)
+
+
+if __name__ == '__main__':
+    main()